@@ -0,0 +1,156 @@
+"""Frame rate of the pygame client drawing many moving entities over the map.
+
+Compares redrawing every tile and flipping the whole display each frame, as the
+client used to, with the cached map surface and dirty rects of `GameClient.draw`.
+Entities move every frame, a part of them outside of the screen.
+
+run with `uv run benchmarks/client_fps.py`, add `--headless` to draw off screen
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+# don't read or write the map cache of the player
+cache_dir = tempfile.TemporaryDirectory()
+os.environ["MAP_CACHE_DIR"] = cache_dir.name
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--map-size", type=int, default=100)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--headless", action="store_true")
+    return parser.parse_args()
+
+
+class OfflineSocket:
+    """Drops what the client sends"""
+
+    async def send(self, message: bytes) -> None:
+        pass
+
+
+def draw_full(client) -> None:
+    """What GameClient.draw used to do"""
+    import pygame
+
+    from src.game_client.client import (
+        HEIGHT,
+        NPC_SIZE,
+        OLIVE,
+        PLAYER_SIZE,
+        RED,
+        SCREEN_SCALE_X,
+        SCREEN_SCALE_Y,
+        WHITE,
+        WIDTH,
+    )
+
+    game_state = client.game_state
+    client.screen.fill(WHITE)
+    tile_width = WIDTH / game_state.map_width
+    tile_height = HEIGHT / game_state.map_height
+    for (start_x, start_y), rows in game_state.map_blocks():
+        for y, row in enumerate(rows.tolist(), start=start_y):
+            for x, tile in enumerate(row, start=start_x):
+                color = WHITE if tile else (0, 0, 0)
+                pygame.draw.rect(
+                    client.screen,
+                    color,
+                    (x * tile_width, y * tile_height, tile_width, tile_height),
+                )
+    player = game_state.player
+    pygame.draw.rect(
+        client.screen,
+        RED,
+        (
+            player.pos_x * SCREEN_SCALE_X,
+            player.pos_y * SCREEN_SCALE_Y,
+            PLAYER_SIZE,
+            PLAYER_SIZE,
+        ),
+    )
+    for npc_id in game_state.npc_ids:
+        npc = game_state.entities[npc_id]
+        pygame.draw.rect(
+            client.screen,
+            OLIVE,
+            (
+                npc.pos_x * SCREEN_SCALE_X,
+                npc.pos_y * SCREEN_SCALE_Y,
+                NPC_SIZE,
+                NPC_SIZE,
+            ),
+        )
+    font = pygame.font.Font("freesansbold.ttf", 25)
+    text_surface = font.render(f"fps: {int(client.clock.get_fps())}", True, RED, WHITE)
+    client.screen.blit(text_surface, text_surface.get_rect(topright=(WIDTH, 0)))
+    pygame.display.flip()
+
+
+def fps(client, draw, frames: int) -> float:
+    entities = [
+        client.game_state.entities[npc_id] for npc_id in client.game_state.npc_ids
+    ]
+    start = time.perf_counter()
+    for _ in range(frames):
+        for entity in entities:
+            entity.pos_x += random.uniform(-0.4, 0.4)
+            entity.pos_y += random.uniform(-0.4, 0.4)
+        draw(client)
+    return frames / (time.perf_counter() - start)
+
+
+async def main():
+    args = parse_args()
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+    from src.common.entity import NPCEntity
+    from src.common.world import GameState
+    from src.game_client.client import GameClient
+
+    server_state = GameState()
+    server_state.generate_map(args.map_size, args.map_size, seed=0)
+    map_data = server_state.get_map_data()
+
+    print(f"{'entities':>9} {'path':>12} {'fps':>8}")
+    for num_entities in args.entities:
+        client = GameClient("player", "player", OfflineSocket())
+        client.game_state.set_map(map_data)
+        for i in range(num_entities):
+            npc_id = f"npc-{i}"
+            # some of them off the screen
+            client.game_state.entities[npc_id] = NPCEntity(
+                id=npc_id,
+                type="enemy",
+                pos_x=random.uniform(
+                    -GameState.WORLD_WIDTH / 4, GameState.WORLD_WIDTH * 1.25
+                ),
+                pos_y=random.uniform(
+                    -GameState.WORLD_HEIGHT / 4, GameState.WORLD_HEIGHT * 1.25
+                ),
+            )
+            client.game_state.npc_ids.add(npc_id)
+
+        for path, draw in (
+            ("full redraw", draw_full),
+            ("dirty rects", GameClient.draw),
+        ):
+            rate = fps(client, draw, args.frames)
+            print(f"{num_entities:>9} {path:>12} {rate:>8.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
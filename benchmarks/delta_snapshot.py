@@ -0,0 +1,123 @@
+"""Bandwidth of full world snapshots against deltas of the last acknowledged snapshot.
+
+Most entities are idle: every send only `--moving` of them have moved. Clients
+acknowledge each snapshot `--ack-delay` sends after receiving it.
+
+run with `uv run benchmarks/delta_snapshot.py`
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import argparse
+import random
+import time
+from collections import deque
+
+from src.common.snapshot import (
+    diff_positions,
+    entity_state_fragment,
+    world_snapshot_message,
+)
+from src.game_server.delta import SnapshotBaselines
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--moving", type=float, default=0.05)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--sends", type=int, default=50)
+    parser.add_argument("--ack-delay", type=int, default=2)
+    parser.add_argument("--max-unacked", type=int, default=30)
+    return parser.parse_args()
+
+
+def snapshot_bytes(
+    positions: dict[int, tuple[float, float]],
+    tick: int,
+    baselines: SnapshotBaselines | None,
+) -> int:
+    if baselines is not None and baselines.up_to_date(positions):
+        return 0
+    baseline_tick, baseline = (0, None) if baselines is None else baselines.baseline()
+    changes, removed = diff_positions(baseline, positions)
+    message = world_snapshot_message(
+        tick,
+        [
+            entity_state_fragment(handle, *positions[handle], changed)
+            for handle, changed in changes
+        ],
+        baseline_tick,
+        removed,
+    )
+    if baselines is not None:
+        baselines.record(tick, dict(positions))
+    return len(message)
+
+
+def run(args, num_entities: int) -> tuple[float, float, float, float]:
+    positions = {
+        handle: (random.uniform(0, 100), random.uniform(0, 100))
+        for handle in range(1, num_entities + 1)
+    }
+    handles = list(positions)
+    clients = [SnapshotBaselines(args.max_unacked) for _ in range(args.clients)]
+    in_flight = deque()
+
+    full_bytes = delta_bytes = 0
+    full_seconds = delta_seconds = 0.0
+    for tick in range(1, args.sends + 1):
+        for handle in random.sample(handles, int(num_entities * args.moving)):
+            pos_x, pos_y = positions[handle]
+            positions[handle] = (pos_x + random.choice([-1, 1]), pos_y)
+
+        start = time.perf_counter()
+        for _ in clients:
+            full_bytes += snapshot_bytes(positions, tick, None)
+        full_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for baselines in clients:
+            delta_bytes += snapshot_bytes(positions, tick, baselines)
+        delta_seconds += time.perf_counter() - start
+
+        in_flight.append(tick)
+        if len(in_flight) > args.ack_delay:
+            acked_tick = in_flight.popleft()
+            for baselines in clients:
+                baselines.ack(acked_tick)
+
+    return (
+        full_bytes / args.sends,
+        delta_bytes / args.sends,
+        full_seconds / args.sends * 1000,
+        delta_seconds / args.sends * 1000,
+    )
+
+
+def main():
+    args = parse_args()
+    random.seed(0)
+    print(
+        f"{args.clients} clients, {args.moving:.0%} of the entities moving, "
+        f"acks {args.ack_delay} sends late, {args.sends} sends"
+    )
+    print(
+        f"{'entities':>8} {'full KB/send':>13} {'delta KB/send':>14} "
+        f"{'saved':>7} {'full ms':>8} {'delta ms':>9}"
+    )
+    for num_entities in args.entities:
+        full_bytes, delta_bytes, full_ms, delta_ms = run(args, num_entities)
+        print(
+            f"{num_entities:>8} {full_bytes / 1024:>13.1f} {delta_bytes / 1024:>14.1f} "
+            f"{1 - delta_bytes / full_bytes:>7.1%} {full_ms:>8.2f} {delta_ms:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
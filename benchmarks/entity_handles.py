@@ -0,0 +1,82 @@
+"""Bytes per position update with uuid entity ids against entity handles.
+
+run with `uv run benchmarks/entity_handles.py`
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import uuid
+
+from src.common.common_models import (
+    NpcPositionUpdateMessage,
+    PositionData,
+    PositionUpdateMessage,
+    SocketMessage,
+)
+from src.common.snapshot import entity_state_fragment
+
+HANDLES = [1, 200, 20_000, 2_000_000]
+
+
+def main():
+    entity_id = str(uuid.uuid4())
+    position_data = PositionData(pos_x=42.5, pos_y=17.25)
+
+    print(f"{'message':>20} {'uuid':>6} " + " ".join(f"{h:>9}" for h in HANDLES))
+
+    by_id = SocketMessage(
+        position_update=PositionUpdateMessage(
+            player_id=entity_id, position_data=position_data
+        )
+    ).ByteSize()
+    by_handle = [
+        SocketMessage(
+            position_update=PositionUpdateMessage(
+                player_handle=handle, position_data=position_data
+            )
+        ).ByteSize()
+        for handle in HANDLES
+    ]
+    print(
+        f"{'position_update':>20} {by_id:>6} "
+        + " ".join(f"{size:>9}" for size in by_handle)
+    )
+
+    by_id = SocketMessage(
+        npc_position_update=NpcPositionUpdateMessage(
+            npc_id=entity_id, position_data=position_data
+        )
+    ).ByteSize()
+    by_handle = [
+        SocketMessage(
+            npc_position_update=NpcPositionUpdateMessage(
+                npc_handle=handle, position_data=position_data
+            )
+        ).ByteSize()
+        for handle in HANDLES
+    ]
+    print(
+        f"{'npc_position_update':>20} {by_id:>6} "
+        + " ".join(f"{size:>9}" for size in by_handle)
+    )
+
+    # a snapshot entry with a string id costs the id plus its tag and length
+    by_handle = [
+        len(entity_state_fragment(handle, position_data.pos_x, position_data.pos_y))
+        for handle in HANDLES
+    ]
+    by_id = len(entity_state_fragment(0, position_data.pos_x, position_data.pos_y))
+    by_id += 2 + len(entity_id)
+    print(
+        f"{'snapshot entity':>20} {by_id:>6} "
+        + " ".join(f"{size:>9}" for size in by_handle)
+    )
+
+
+if __name__ == "__main__":
+    main()
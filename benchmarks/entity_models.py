@@ -0,0 +1,86 @@
+"""Memory per entity and mutation throughput of the slotted dataclass entities against
+the pydantic models they replaced.
+
+run with `uv run benchmarks/entity_models.py`
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import argparse
+import time
+import tracemalloc
+import uuid
+
+from pydantic import BaseModel, Field
+
+from src.common.entity import NPCEntity
+
+
+class PydanticEntity(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+
+
+class PydanticNPCEntity(PydanticEntity):
+    pos_x: float
+    pos_y: float
+    type: str
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, default=100_000)
+    parser.add_argument("--updates", type=int, default=10)
+    return parser.parse_args()
+
+
+def create(entity_class: type, count: int) -> list:
+    return [
+        entity_class(id=str(i), type="enemy", pos_x=float(i), pos_y=float(i))
+        for i in range(count)
+    ]
+
+
+def run(entity_class: type, count: int, updates: int) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    entities = create(entity_class, count)
+    create_seconds = time.perf_counter() - start
+    memory, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        for entity in entities:
+            entity.pos_x += 1.0
+            entity.pos_y -= 1.0
+    update_seconds = time.perf_counter() - start
+
+    return {
+        "bytes": memory / count,
+        "creates": count / create_seconds,
+        "writes": 2 * count * updates / update_seconds,
+    }
+
+
+def main():
+    args = parse_args()
+    print(f"{args.entities} npcs, {args.updates} position updates each")
+    print(f"{'model':>10} {'bytes/entity':>13} {'creates/s':>12} {'writes/s':>12}")
+    for name, entity_class in (
+        ("pydantic", PydanticNPCEntity),
+        ("dataclass", NPCEntity),
+    ):
+        result = run(entity_class, args.entities, args.updates)
+        print(
+            f"{name:>10} {result['bytes']:>13.0f} {result['creates']:>12,.0f} "
+            f"{result['writes']:>12,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
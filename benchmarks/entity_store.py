@@ -0,0 +1,95 @@
+"""Time of a world update with the dict entity store against the numpy array store.
+
+run with `uv run benchmarks/entity_store.py`
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import argparse
+import random
+import time
+
+from src.common.common_models import PositionData
+from src.common.entity import NPCEntity, PlayerEntity
+from src.common.world import ArrayGameState, GameState
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--npcs", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def populate(game_state: GameState, num_npcs: int, num_players: int) -> None:
+    for i in range(num_npcs):
+        game_state.add_npc(
+            NPCEntity(
+                id=f"npc-{i}",
+                type="enemy",
+                pos_x=random.uniform(0, game_state.WORLD_WIDTH),
+                pos_y=random.uniform(0, game_state.WORLD_HEIGHT),
+            )
+        )
+    for i in range(num_players):
+        game_state.add_player(
+            PlayerEntity(
+                id=f"player-{i}",
+                player_id=f"player-{i}",
+                pos_x=random.uniform(0, game_state.WORLD_WIDTH),
+                pos_y=random.uniform(0, game_state.WORLD_HEIGHT),
+            )
+        )
+
+
+def run(game_state: GameState, ticks: int, num_players: int) -> tuple[float, float]:
+    """(ms per game_tick, ms per round of player position updates)"""
+    start = time.perf_counter()
+    for _ in range(ticks):
+        game_state.game_tick()
+    tick_ms = (time.perf_counter() - start) / ticks * 1000
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for i in range(num_players):
+            game_state.update_entity_position(
+                f"player-{i}",
+                PositionData(
+                    pos_x=random.uniform(0, game_state.WORLD_WIDTH),
+                    pos_y=random.uniform(0, game_state.WORLD_HEIGHT),
+                ),
+            )
+    update_ms = (time.perf_counter() - start) / ticks * 1000
+    return tick_ms, update_ms
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+    print(f"{args.players} players, {args.ticks} ticks")
+    print(
+        f"{'npcs':>8} {'store':>6} {'tick ms':>9} {'npcs/s':>12} "
+        f"{'player updates ms':>18}"
+    )
+    for num_npcs in args.npcs:
+        for name, game_state in (
+            ("dict", GameState()),
+            ("arrays", ArrayGameState(seed=args.seed)),
+        ):
+            populate(game_state, num_npcs, args.players)
+            tick_ms, update_ms = run(game_state, args.ticks, args.players)
+            print(
+                f"{num_npcs:>8} {name:>6} {tick_ms:>9.2f} "
+                f"{num_npcs / tick_ms * 1000:>12,.0f} {update_ms:>18.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
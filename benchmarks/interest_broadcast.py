@@ -0,0 +1,157 @@
+"""Compare the traffic of all-to-all position broadcasts against area of interest filtering.
+
+Every simulated player moves and sends one position update per tick. With all-to-all
+fan-out each update is forwarded to every other player, with interest management only
+to the players within `GameState.INTEREST_RADIUS`, plus the enter/leave events.
+
+run with `uv run benchmarks/interest_broadcast.py`
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import argparse
+import random
+import time
+
+from src.common.common_models import (
+    EntityEnteredMessage,
+    EntityLeftMessage,
+    PositionData,
+    PositionUpdateMessage,
+    SocketMessage,
+)
+from src.common.entity import PlayerEntity
+from src.common.interest import InterestManager
+from src.common.world import GameState
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--ticks", type=int, default=10)
+    parser.add_argument("--radius", type=float, default=GameState.INTEREST_RADIUS)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def position_update_bytes(player: PlayerEntity) -> bytes:
+    return SocketMessage(
+        position_update=PositionUpdateMessage(
+            player_id=player.id,
+            position_data=PositionData(pos_x=player.pos_x, pos_y=player.pos_y),
+        )
+    ).SerializeToString()
+
+
+def move_players(game_state: GameState) -> None:
+    for player_id in game_state.player_ids:
+        player = game_state.entities[player_id]
+        new_position = PositionData(
+            pos_x=min(
+                max(player.pos_x + random.uniform(-2, 2), 0), game_state.WORLD_WIDTH
+            ),
+            pos_y=min(
+                max(player.pos_y + random.uniform(-2, 2), 0), game_state.WORLD_HEIGHT
+            ),
+        )
+        game_state.update_entity_position(player_id, new_position)
+
+
+def run(num_players: int, ticks: int, radius: float) -> dict:
+    game_state = GameState()
+    interest = InterestManager(game_state.grid, radius)
+    for _ in range(num_players):
+        player = PlayerEntity(
+            player_id="",
+            pos_x=random.uniform(0, game_state.WORLD_WIDTH),
+            pos_y=random.uniform(0, game_state.WORLD_HEIGHT),
+        )
+        player.player_id = player.id
+        game_state.add_player(player)
+        interest.add_client(player.id)
+    # initial interest sets are not part of the steady state traffic
+    for player_id in game_state.player_ids:
+        interest.refresh(player_id)
+
+    all_messages = all_bytes = 0
+    aoi_messages = aoi_bytes = 0
+    aoi_seconds = 0.0
+    for _ in range(ticks):
+        move_players(game_state)
+        updates = {
+            player_id: position_update_bytes(game_state.entities[player_id])
+            for player_id in game_state.player_ids
+        }
+
+        # all-to-all: every update goes to every other player
+        for message in updates.values():
+            all_messages += num_players - 1
+            all_bytes += len(message) * (num_players - 1)
+
+        # area of interest: enter/leave events, then updates to viewers only
+        start = time.perf_counter()
+        for player_id in game_state.player_ids:
+            entered, left = interest.refresh(player_id)
+            for entity_id in entered:
+                entity = game_state.entities[entity_id]
+                message = SocketMessage(
+                    entity_entered=EntityEnteredMessage(
+                        entity_id=entity_id,
+                        entity_type="player",
+                        position_data=PositionData(
+                            pos_x=entity.pos_x, pos_y=entity.pos_y
+                        ),
+                    )
+                ).SerializeToString()
+                aoi_messages += 1
+                aoi_bytes += len(message)
+            for entity_id in left:
+                message = SocketMessage(
+                    entity_left=EntityLeftMessage(entity_id=entity_id)
+                ).SerializeToString()
+                aoi_messages += 1
+                aoi_bytes += len(message)
+        for player_id, message in updates.items():
+            num_viewers = len(interest.viewers_of(player_id))
+            aoi_messages += num_viewers
+            aoi_bytes += len(message) * num_viewers
+        aoi_seconds += time.perf_counter() - start
+
+    return {
+        "players": num_players,
+        "all_messages": all_messages / ticks,
+        "all_bytes": all_bytes / ticks,
+        "aoi_messages": aoi_messages / ticks,
+        "aoi_bytes": aoi_bytes / ticks,
+        "aoi_ms": aoi_seconds / ticks * 1000,
+    }
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+    print(
+        f"world {GameState.WORLD_WIDTH}x{GameState.WORLD_HEIGHT}, "
+        f"interest radius {args.radius}, {args.ticks} ticks"
+    )
+    print(
+        f"{'players':>8} {'all msgs/tick':>14} {'all KB/tick':>12} "
+        f"{'aoi msgs/tick':>14} {'aoi KB/tick':>12} {'saved':>7} {'aoi ms/tick':>12}"
+    )
+    for num_players in args.players:
+        result = run(num_players, args.ticks, args.radius)
+        saved = 1 - result["aoi_bytes"] / result["all_bytes"]
+        print(
+            f"{result['players']:>8} {result['all_messages']:>14.0f} "
+            f"{result['all_bytes'] / 1024:>12.1f} {result['aoi_messages']:>14.0f} "
+            f"{result['aoi_bytes'] / 1024:>12.1f} {saved:>7.1%} {result['aoi_ms']:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
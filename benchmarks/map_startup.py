@@ -0,0 +1,71 @@
+"""Server startup time with a map generated in memory against a memory mapped map file.
+
+Generating the whole map is what the server did on every boot. Opening a map file
+only reads its header, the tiles are read when the chunks around the first players
+are streamed.
+
+run with `uv run benchmarks/map_startup.py`
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import argparse
+import tempfile
+import time
+
+from src.common.world import GameState
+from src.common.world_map import WorldMap
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 4_000, 10_000])
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def first_chunks(world_map: WorldMap) -> None:
+    """Read the chunks a first player in the middle of the map is sent"""
+    center = world_map.chunk_of(world_map.width // 2, world_map.height // 2)
+    for key in world_map.chunks_within(center, GameState.MAP_CHUNK_RADIUS):
+        world_map.chunk(key)
+
+
+def main():
+    args = parse_args()
+    print(
+        f"{'tiles':>13} {'generate ms':>12} {'file MB':>8} {'open ms':>8} "
+        f"{'first chunks ms':>16}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            start = time.perf_counter()
+            WorldMap(size, size, args.seed).to_array()
+            generate_ms = (time.perf_counter() - start) * 1000
+
+            path = Path(directory) / f"{size}.map"
+            WorldMap(size, size, args.seed).save(path)
+
+            start = time.perf_counter()
+            world_map = WorldMap.load(path)
+            open_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            first_chunks(world_map)
+            first_chunks_ms = (time.perf_counter() - start) * 1000
+
+            print(
+                f"{f'{size}x{size}':>13} {generate_ms:>12.1f} "
+                f"{path.stat().st_size / 1e6:>8.1f} {open_ms:>8.2f} "
+                f"{first_chunks_ms:>16.2f}"
+            )
+            del world_map
+
+
+if __name__ == "__main__":
+    main()
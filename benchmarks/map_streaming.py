@@ -0,0 +1,80 @@
+"""Cost of creating a map and of the first map traffic of a joining player, by map size.
+
+Small maps are sent whole, larger ones are streamed in chunks around the player: the
+join cost should stay flat as the world grows.
+
+run with `uv run benchmarks/map_streaming.py`
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import argparse
+import time
+import tracemalloc
+
+from src.common.world import GameState
+from src.common.world_map import ChunkKey
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[20, 250, 1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def join(game_state: GameState) -> list[bytes]:
+    """Map messages a player joining in the middle of the world gets"""
+    messages = [game_state.map_message()]
+    if game_state.map_streamed:
+        center: ChunkKey = game_state.map_chunk_at(
+            game_state.WORLD_WIDTH / 2, game_state.WORLD_HEIGHT / 2
+        )
+        messages += [
+            game_state.map_chunk_message(key)
+            for key in game_state.map.chunks_within(center, game_state.MAP_CHUNK_RADIUS)
+        ]
+    return messages
+
+
+def main():
+    args = parse_args()
+    # first use costs (imports, numpy setup) are not part of a join
+    warm_up = GameState()
+    warm_up.generate_map(300, 300, seed=args.seed)
+    join(warm_up)
+
+    print(
+        f"{'tiles':>15} {'mode':>8} {'create ms':>10} {'join ms':>9} "
+        f"{'join KB':>9} {'memory KB':>10}"
+    )
+    for size in args.sizes:
+        tracemalloc.start()
+        game_state = GameState()
+
+        start = time.perf_counter()
+        game_state.generate_map(size, size, seed=args.seed)
+        create_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        messages = join(game_state)
+        join_ms = (time.perf_counter() - start) * 1000
+
+        memory, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        mode = "stream" if game_state.map_streamed else "whole"
+        print(
+            f"{f'{size}x{size}':>15} {mode:>8} {create_ms:>10.2f} {join_ms:>9.2f} "
+            f"{sum(map(len, messages)) / 1000:>9.1f} {memory / 1000:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
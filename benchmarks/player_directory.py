@@ -0,0 +1,122 @@
+"""Connect throughput of a reconnect storm, querying SQLite against the player directory.
+
+Every simulated client looks its player up and updates its last_seen, as
+`authenticate` does, all of them at once as after a server restart. The old path ran
+two queries and a commit per connection on the event loop, the directory loads the
+concurrent misses with batched queries in a thread and defers the last_seen writes.
+
+The largest gap between two iterations of a 1ms ticker tells how long the event loop
+(and so the game loop) stalled.
+
+run with `uv run benchmarks/player_directory.py`
+"""
+
+import sys
+import os
+from pathlib import Path
+import tempfile
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+# use a throwaway database, before config is imported
+db_dir = tempfile.TemporaryDirectory()
+os.environ["SQLITE_DB_URL"] = f"sqlite:///{db_dir.name}/benchmark.db"
+
+import argparse
+import asyncio
+from datetime import datetime
+import time
+import uuid
+
+from src.database.models import Player
+from src.database.player_directory import PlayerDirectory
+from src.database.sqlite_db import get_db_session
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 1000])
+    return parser.parse_args()
+
+
+def create_players(count: int) -> list[str]:
+    player_ids = [str(uuid.uuid4()) for _ in range(count)]
+    with get_db_session() as db:
+        db.add_all(
+            Player(id=player_id, username=f"player-{player_id}")
+            for player_id in player_ids
+        )
+        db.commit()
+    return player_ids
+
+
+async def connect_sqlite(player_id: str) -> None:
+    """What authenticate and broadcast_player_connect used to do"""
+    with get_db_session() as db:
+        player = db.query(Player).filter(Player.id == player_id).first()
+        player.last_seen = datetime.now()
+        db.commit()
+    with get_db_session() as db:
+        player = db.query(Player).filter(Player.id == player_id).first()
+        _username = player.username
+
+
+async def connect_directory(directory: PlayerDirectory, player_id: str) -> None:
+    player = await directory.load(player_id)
+    directory.touch(player_id)
+    _username = player.username
+
+
+async def ticker(gaps: list[float], stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    previous = loop.time()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = loop.time()
+        gaps.append(now - previous)
+        previous = now
+
+
+async def storm(connect, player_ids: list[str]) -> tuple[float, float]:
+    """(connections per second, longest event loop stall in ms)"""
+    gaps = []
+    stop = asyncio.Event()
+    ticker_task = asyncio.create_task(ticker(gaps, stop))
+    await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(connect(player_id) for player_id in player_ids))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker_task
+    return len(player_ids) / elapsed, max(gaps) * 1000
+
+
+async def main():
+    args = parse_args()
+    print(
+        f"{'clients':>8} {'path':>16} {'conn/s':>10} {'max stall ms':>13} {'flush ms':>9}"
+    )
+    for num_clients in args.clients:
+        player_ids = create_players(num_clients)
+
+        rate, stall = await storm(connect_sqlite, player_ids)
+        print(f"{num_clients:>8} {'sqlite':>16} {rate:>10.0f} {stall:>13.1f} {'':>9}")
+
+        directory = PlayerDirectory(ttl=300, max_size=10_000)
+        for path in ("directory cold", "directory warm"):
+            rate, stall = await storm(
+                lambda player_id: connect_directory(directory, player_id), player_ids
+            )
+            start = time.perf_counter()
+            await asyncio.to_thread(directory.flush_last_seen)
+            flush_ms = (time.perf_counter() - start) * 1000
+            print(
+                f"{num_clients:>8} {path:>16} {rate:>10.0f} {stall:>13.1f} {flush_ms:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
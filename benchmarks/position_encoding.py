@@ -0,0 +1,81 @@
+"""Bytes of positions with float and quantized position encodings.
+
+Positions are random points of the world, with the world position scale.
+
+run with `uv run benchmarks/position_encoding.py`
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import argparse
+import random
+
+from src.common.common_models import (
+    PositionEncoding,
+    PositionUpdateMessage,
+    SocketMessage,
+)
+from src.common.snapshot import entity_state_fragment
+from src.common.world import GameState
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--positions", type=int, default=10_000)
+    parser.add_argument("--scale", type=float, default=GameState.POSITION_SCALE)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    random.seed(0)
+    game_state = GameState()
+    game_state.POSITION_SCALE = args.scale
+    positions = [
+        (
+            random.uniform(0, game_state.WORLD_WIDTH),
+            random.uniform(0, game_state.WORLD_HEIGHT),
+        )
+        for _ in range(args.positions)
+    ]
+
+    print(
+        f"world {game_state.WORLD_WIDTH}x{game_state.WORLD_HEIGHT}, "
+        f"scale {args.scale} (precision {1 / args.scale:g})"
+    )
+    print(
+        f"{'encoding':>10} {'position':>9} {'position_update':>16} {'snapshot entity':>16}"
+    )
+    for name, encoding in [
+        ("float", PositionEncoding.POSITION_ENCODING_FLOAT),
+        ("quantized", PositionEncoding.POSITION_ENCODING_QUANTIZED),
+    ]:
+        codec = game_state.position_codec(encoding)
+        position_bytes = update_bytes = entity_bytes = 0
+        for pos_x, pos_y in positions:
+            position_data = codec.encode(pos_x, pos_y)
+            position_bytes += position_data.ByteSize()
+            update_bytes += SocketMessage(
+                position_update=PositionUpdateMessage(
+                    player_handle=1000, position_data=position_data
+                )
+            ).ByteSize()
+            entity_bytes += len(
+                entity_state_fragment(
+                    1000, *codec.to_wire(pos_x, pos_y), quantized=codec.quantized
+                )
+            )
+        print(
+            f"{name:>10} {position_bytes / len(positions):>9.2f} "
+            f"{update_bytes / len(positions):>16.2f} "
+            f"{entity_bytes / len(positions):>16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,572 @@
+"""Microbenchmarks of the server hot paths, with json output to compare commits.
+
+Covers protobuf serialization of every socket message type, the game tick, the
+network send fan-out to mock websockets, the redis client, the map payload and the
+/map and /online-players http handlers.
+
+Redis is either a local `redis-server` (see REDIS_* in config.py) or, with
+`--redis fake`, an in-process fakeredis (`pip install fakeredis`). Each benchmark
+runs its operation in loops of at least 0.2s and reports the median time per
+operation of `--repeat` loops.
+
+    uv run benchmarks/suite.py --redis fake --json before.json
+    uv run benchmarks/suite.py --redis fake --compare before.json
+
+run with `uv run benchmarks/suite.py`
+"""
+
+import sys
+import os
+from pathlib import Path
+import tempfile
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+# use a throwaway database, before config is imported
+db_dir = tempfile.TemporaryDirectory()
+os.environ["SQLITE_DB_URL"] = f"sqlite:///{db_dir.name}/benchmark.db"
+
+import argparse
+import asyncio
+from datetime import datetime
+import json
+import platform
+import random
+import statistics
+import subprocess
+import timeit
+from typing import Callable
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis", choices=["fake", "local"], default="fake")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--filter", default="", help="only run the benchmarks whose name contains it"
+    )
+    parser.add_argument("--json", type=Path, help="write the results there")
+    parser.add_argument("--compare", type=Path, help="results of an earlier run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="slowdown reported as a regression by --compare",
+    )
+    return parser.parse_args()
+
+
+def use_fake_redis():
+    """Make the redis clients connect to an in-process fake redis"""
+    try:
+        import fakeredis
+    except ImportError:
+        sys.exit(
+            "--redis fake needs fakeredis, install it with `pip install fakeredis`"
+        )
+    import redis
+    import redis.asyncio
+
+    server = fakeredis.FakeServer()
+    redis.Redis = lambda **kwargs: fakeredis.FakeRedis(server=server)
+    redis.asyncio.Redis = lambda **kwargs: fakeredis.FakeAsyncRedis(server=server)
+
+
+class NullWebSocket:
+    """Client socket that drops what is sent to it"""
+
+    async def send(self, message: bytes) -> None:
+        pass
+
+
+class Suite:
+    def __init__(self, repeat: int, name_filter: str):
+        self.repeat = repeat
+        self.name_filter = name_filter
+        self.results: dict[str, dict] = {}
+
+    def wanted(self, name: str) -> bool:
+        return self.name_filter in name
+
+    def run(self, name: str, operation: Callable[[], object]) -> None:
+        if not self.wanted(name):
+            return
+        timer = timeit.Timer(operation)
+        number, _ = timer.autorange()
+        times = [t / number for t in timer.repeat(repeat=self.repeat, number=number)]
+        self.results[name] = {
+            "ns_per_op": statistics.median(times) * 1e9,
+            "min_ns_per_op": min(times) * 1e9,
+            "loops": number * self.repeat,
+        }
+        print(f"{name:<48} {self.results[name]['ns_per_op'] / 1000:>12.2f}")
+
+
+def sample_messages() -> dict[str, "SocketMessage"]:  # noqa: F821
+    """A representative message of every type a SocketMessage holds"""
+    from src.common.common_models import (
+        EntityEnteredMessage,
+        EntityLeftMessage,
+        MapChunk,
+        MapChunkDropped,
+        NewPlayerConnectedMessage,
+        NpcPositionUpdateMessage,
+        NpcSpawnedMessage,
+        PlayerAuthMessage,
+        PlayerDisconectedMessage,
+        PositionEncoding,
+        PositionUpdateMessage,
+        SessionInfoMessage,
+        SnapshotAckMessage,
+        SocketMessage,
+    )
+    from src.common.map_encoding import encode_tiles
+    from src.common.snapshot import entity_state_fragment, world_snapshot_message
+    from src.common.world import GameState
+
+    game_state = GameState()
+    game_state.generate_map(20, 20, seed=1)
+    codec = game_state.position_codec(game_state.POSITION_ENCODING)
+    position_data = codec.encode(42.5, 17.25)
+    player_id = "1b4e28ba-2fa1-11d2-883f-0016d3cca427"
+    encoding, tiles = encode_tiles(game_state.map.chunk((0, 0)))
+    snapshot = world_snapshot_message(
+        1234,
+        [
+            entity_state_fragment(
+                handle, *codec.to_wire(handle * 0.7, handle * 0.3), quantized=True
+            )
+            for handle in range(1, 31)
+        ],
+        baseline_tick=1230,
+    )
+
+    messages = {
+        "position_update": SocketMessage(
+            position_update=PositionUpdateMessage(
+                position_data=position_data, sequence=1234, timestamp_us=1
+            )
+        ),
+        "new_player_connected": SocketMessage(
+            new_player_connected=NewPlayerConnectedMessage(
+                player_id=player_id, username="player", player_handle=12
+            )
+        ),
+        "player_disconnected": SocketMessage(
+            player_disconnected=PlayerDisconectedMessage(player_id=player_id)
+        ),
+        "npc_position_update": SocketMessage(
+            npc_position_update=NpcPositionUpdateMessage(
+                npc_id=player_id, position_data=position_data
+            )
+        ),
+        "map_data": SocketMessage(map_data=game_state.get_map_data()),
+        "player_auth": SocketMessage(
+            player_auth=PlayerAuthMessage(
+                player_id=player_id,
+                position_encodings=[
+                    PositionEncoding.POSITION_ENCODING_QUANTIZED,
+                    PositionEncoding.POSITION_ENCODING_FLOAT,
+                ],
+                map_hash=bytes(16),
+            )
+        ),
+        "entity_entered": SocketMessage(
+            entity_entered=EntityEnteredMessage(
+                entity_id=player_id,
+                entity_type="player",
+                position_data=position_data,
+                handle=12,
+                username="bench-player",
+            )
+        ),
+        "entity_left": SocketMessage(
+            entity_left=EntityLeftMessage(entity_id=player_id)
+        ),
+        "world_snapshot": SocketMessage.FromString(snapshot),
+        "snapshot_ack": SocketMessage(snapshot_ack=SnapshotAckMessage(tick=1234)),
+        "npc_spawned": SocketMessage(
+            npc_spawned=NpcSpawnedMessage(
+                npc_id=player_id,
+                type="enemy",
+                position_data=position_data,
+                npc_handle=7,
+            )
+        ),
+        "session_info": SocketMessage(
+            session_info=SessionInfoMessage(
+                position_encoding=codec.encoding, position_scale=codec.scale
+            )
+        ),
+        "map_chunk": SocketMessage(
+            map_chunk=MapChunk(
+                chunk_x=3,
+                chunk_y=4,
+                width=20,
+                height=20,
+                encoding=encoding,
+                tiles=tiles,
+            )
+        ),
+        "map_chunk_dropped": SocketMessage(
+            map_chunk_dropped=MapChunkDropped(chunk_x=3, chunk_y=4)
+        ),
+    }
+    message_types = [
+        field.name for field in SocketMessage.DESCRIPTOR.oneofs_by_name["data"].fields
+    ]
+    missing = set(message_types) - set(messages)
+    if missing:
+        raise RuntimeError(f"No sample message for {sorted(missing)}")
+    return messages
+
+
+def bench_protobuf(suite: Suite) -> None:
+    from src.common.common_models import SocketMessage
+
+    for message_type, message in sample_messages().items():
+        data = message.SerializeToString()
+        suite.run(f"protobuf/serialize/{message_type}", message.SerializeToString)
+        suite.run(
+            f"protobuf/parse/{message_type}", lambda: SocketMessage.FromString(data)
+        )
+
+
+def bench_game_tick(suite: Suite) -> None:
+    from src.common.entity import NPCEntity
+    from src.common.world import ArrayGameState, GameState
+
+    for store, game_state_class in (("dict", GameState), ("arrays", ArrayGameState)):
+        for num_npcs in (100, 1_000, 10_000):
+            name = f"game_tick/{store}/npcs={num_npcs}"
+            if not suite.wanted(name):
+                continue
+            game_state = game_state_class()
+            for i in range(num_npcs):
+                game_state.add_npc(
+                    NPCEntity(
+                        id=f"npc-{i}",
+                        type="enemy",
+                        pos_x=random.uniform(0, game_state.WORLD_WIDTH),
+                        pos_y=random.uniform(0, game_state.WORLD_HEIGHT),
+                    )
+                )
+            suite.run(name, game_state.game_tick)
+
+
+def bench_broadcast(suite: Suite) -> None:
+    """Fan-out to mock websockets, until every queue is written: one network send
+    (interest, snapshots, queues) after an npc tick, with every client acknowledging
+    its snapshots, and one control message sent with `broadcast_to_others`"""
+    names = {
+        num_clients: (
+            f"broadcast/send_updates/clients={num_clients}",
+            f"broadcast/broadcast_to_others/clients={num_clients}",
+        )
+        for num_clients in (10, 100, 500)
+    }
+    if not any(suite.wanted(name) for group in names.values() for name in group):
+        return
+
+    from config import (
+        SEND_QUEUE_MAX_SIZE,
+        SLOW_CONSUMER_MAX_LAG_SECONDS,
+        SNAPSHOT_MAX_UNACKED,
+    )
+    from src.common.common_models import NewPlayerConnectedMessage, SocketMessage
+    from src.common.entity import NPCEntity, PlayerEntity
+    from src.game_server.api import websocket_server as ws
+    from src.game_server.broadcast import ClientConnection
+    from src.game_server.delta import SnapshotBaselines
+    from src.game_server.priority import PriorityAccumulator
+
+    game_state = ws.game_state
+    loop = asyncio.new_event_loop()
+    for i in range(200):
+        npc_id = f"bench-npc-{i}"
+        game_state.add_npc(
+            NPCEntity(
+                id=npc_id,
+                type="enemy",
+                pos_x=random.uniform(0, game_state.WORLD_WIDTH),
+                pos_y=random.uniform(0, game_state.WORLD_HEIGHT),
+            )
+        )
+        ws.entity_handles.assign(npc_id)
+
+    async def connect(player_id: str) -> None:
+        game_state.add_player(
+            PlayerEntity(
+                id=player_id,
+                player_id=player_id,
+                pos_x=random.uniform(0, game_state.WORLD_WIDTH),
+                pos_y=random.uniform(0, game_state.WORLD_HEIGHT),
+            )
+        )
+        ws.entity_handles.assign(player_id)
+        ws.position_codecs[player_id] = game_state.position_codec(
+            game_state.POSITION_ENCODING
+        )
+        ws.connected_clients[player_id] = ClientConnection(
+            player_id,
+            NullWebSocket(),
+            max_queue_size=SEND_QUEUE_MAX_SIZE,
+            policy=ws.slow_consumer_policy,
+            max_lag_seconds=SLOW_CONSUMER_MAX_LAG_SECONDS,
+        )
+        ws.interest.add_client(player_id)
+        ws.map_streamer.add_client(player_id)
+        ws.snapshot_baselines[player_id] = SnapshotBaselines(SNAPSHOT_MAX_UNACKED)
+        ws.update_priorities[player_id] = PriorityAccumulator()
+
+    def disconnect(player_id: str) -> None:
+        ws.connected_clients.pop(player_id).stop()
+        ws.interest.remove_client(player_id)
+        ws.map_streamer.remove_client(player_id)
+        del ws.snapshot_baselines[player_id]
+        del ws.update_priorities[player_id]
+        del ws.position_codecs[player_id]
+        game_state.delete_player(player_id)
+        ws.entity_handles.release(player_id)
+
+    async def drain() -> None:
+        """Let the writers empty the queues"""
+        while any(connection.queue for connection in ws.connected_clients.values()):
+            await asyncio.sleep(0)
+
+    async def send() -> None:
+        game_state.game_tick()
+        ws.send_updates()
+        for baselines in ws.snapshot_baselines.values():
+            baselines.ack(ws.network_tick)
+        await drain()
+
+    connected_message = SocketMessage(
+        new_player_connected=NewPlayerConnectedMessage(
+            player_id="1b4e28ba-2fa1-11d2-883f-0016d3cca427",
+            username="player",
+            player_handle=12,
+        )
+    ).SerializeToString()
+
+    async def broadcast() -> None:
+        ws.broadcast_to_others("bench-player-0", connected_message)
+        await drain()
+
+    for num_clients, (send_name, broadcast_name) in names.items():
+        if not suite.wanted(send_name) and not suite.wanted(broadcast_name):
+            continue
+        player_ids = [f"bench-player-{i}" for i in range(num_clients)]
+        for player_id in player_ids:
+            loop.run_until_complete(connect(player_id))
+        suite.run(send_name, lambda: loop.run_until_complete(send()))
+        suite.run(broadcast_name, lambda: loop.run_until_complete(broadcast()))
+        for player_id in player_ids:
+            disconnect(player_id)
+        # let the writers see their cancellation
+        loop.run_until_complete(asyncio.sleep(0))
+    loop.close()
+
+
+def bench_redis(suite: Suite) -> None:
+    names = (
+        "redis/save_player_position",
+        "redis/get_player_position",
+        "redis/get_online_players/players=100",
+        "redis/async/save_player_positions/players=100",
+        "redis/async/save_npcs/npcs=100",
+    )
+    if not any(suite.wanted(name) for name in names):
+        return
+
+    from src.common.common_models import NpcData, PositionData
+    from src.database.redis_db import (
+        NPC_PREFIX,
+        PLAYER_PREFIX,
+        AsyncRedisClient,
+        RedisClient,
+    )
+
+    client = RedisClient()
+    if not client.is_redis_available():
+        sys.exit("Could not connect to redis server, use --redis fake")
+    player_ids = [f"bench-player-{i}" for i in range(100)]
+    npcs = [
+        NpcData(id=f"bench-npc-{i}", type="enemy", pos_x=i * 0.5, pos_y=i * 0.25)
+        for i in range(100)
+    ]
+    loop = asyncio.new_event_loop()
+    try:
+        for player_id in player_ids:
+            client.add_player_to_online(player_id)
+        position_data = PositionData(pos_x=42.5, pos_y=17.25)
+        client.save_player_position(player_ids[0], position_data)
+
+        suite.run(
+            "redis/save_player_position",
+            lambda: client.save_player_position(player_ids[0], position_data),
+        )
+        suite.run(
+            "redis/get_player_position",
+            lambda: client.get_player_position(player_ids[0]),
+        )
+        suite.run("redis/get_online_players/players=100", client.get_online_players)
+
+        async_client = AsyncRedisClient()
+        positions = {player_id: (42.5, 17.25, 1.0) for player_id in player_ids}
+        suite.run(
+            "redis/async/save_player_positions/players=100",
+            lambda: loop.run_until_complete(
+                async_client.save_player_positions(positions)
+            ),
+        )
+        suite.run(
+            "redis/async/save_npcs/npcs=100",
+            lambda: loop.run_until_complete(async_client.save_npcs(npcs)),
+        )
+    finally:
+        # with --redis local this is the game's database, leave nothing behind
+        for player_id in player_ids:
+            client.remove_player_from_online(player_id)
+        client.redis_client.delete(
+            *(f"{PLAYER_PREFIX}{player_id}:position" for player_id in player_ids),
+            *(f"{NPC_PREFIX}{npc.id}" for npc in npcs),
+        )
+        loop.close()
+
+
+def bench_map(suite: Suite) -> None:
+    from src.common.world import GameState
+
+    # maps from MAP_STREAM_MIN_TILES are streamed, their map data has no tiles
+    for size in (20, 100, 250, 1_000):
+        game_state = GameState()
+        game_state.generate_map(size, size, seed=1)
+        suite.run(f"map/get_map_data/size={size}", game_state.get_map_data)
+        suite.run(f"map/map_message/size={size}", game_state.map_message)
+
+
+def bench_http(suite: Suite) -> None:
+    names = (
+        "http/map",
+        "http/map.png/window=256",
+        "http/map.png/window=256/changed",
+        "http/online_players/players=100",
+    )
+    if not any(suite.wanted(name) for name in names):
+        return
+    from starlette.requests import Request
+
+    from src.database.models import Player
+    from src.database.sqlite_db import get_db_session
+    from src.game_server.api import http_server
+    from src.game_server.game import game_state, player_directory
+
+    def request() -> Request:
+        return Request({"type": "http", "headers": []})
+
+    game_state.generate_map(20, 20, seed=1)
+    suite.run("http/map", lambda: http_server.get_map(request(), 0, 0, None, None))
+
+    game_state.generate_map(1_000, 1_000, seed=1)
+    suite.run(
+        "http/map.png/window=256",
+        lambda: http_server.get_map_png(request(), 0, 0, 256, 256),
+    )
+
+    def map_png_changed():
+        # a new map version, the window is rendered again
+        game_state.set_tile(0, 0, not game_state.map.tile(0, 0))
+        return http_server.get_map_png(request(), 0, 0, 256, 256)
+
+    suite.run("http/map.png/window=256/changed", map_png_changed)
+
+    with get_db_session() as db:
+        players = [Player(username=f"bench-player-{i}") for i in range(100)]
+        db.add_all(players)
+        db.commit()
+        player_ids = [player.id for player in players]
+    for player_id in player_ids:
+        http_server.redis_client.add_player_to_online(player_id)
+    player_directory.get_many(player_ids)
+    if len(http_server.get_online_players()) != len(player_ids):
+        raise RuntimeError("/online-players does not return the online players")
+    suite.run("http/online_players/players=100", http_server.get_online_players)
+    for player_id in player_ids:
+        http_server.redis_client.remove_player_from_online(player_id)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=src_path,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline_path: Path, threshold: float) -> int:
+    """Print the change of every benchmark against an earlier run. Returns how many
+    regressed more than the threshold."""
+    baseline = json.loads(baseline_path.read_text())
+    print(
+        f"\ncompared to {baseline['commit'] or baseline_path} ({baseline['date']})\n"
+        f"{'benchmark':<48} {'before us':>12} {'after us':>12} {'change':>8}"
+    )
+    regressions = 0
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        change = result["ns_per_op"] / before["ns_per_op"] - 1
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  regression"
+        print(
+            f"{name:<48} {before['ns_per_op'] / 1000:>12.2f} "
+            f"{result['ns_per_op'] / 1000:>12.2f} {change:>+8.1%}{flag}"
+        )
+    return regressions
+
+
+def main():
+    args = parse_args()
+    if args.redis == "fake":
+        use_fake_redis()
+    random.seed(0)
+
+    suite = Suite(args.repeat, args.filter)
+    print(f"{'benchmark':<48} {'us per op':>12}")
+    bench_protobuf(suite)
+    bench_game_tick(suite)
+    bench_broadcast(suite)
+    bench_redis(suite)
+    bench_map(suite)
+    bench_http(suite)
+
+    output = {
+        "commit": git_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "redis": args.redis,
+        "results": suite.results,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(output, indent=2) + "\n")
+    if args.compare:
+        regressions = compare(suite.results, args.compare, args.threshold)
+        if regressions:
+            sys.exit(
+                f"{regressions} benchmarks regressed more than {args.threshold:.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compare one message per npc per client against one world snapshot per client.
+
+The per npc messages are the ones sent before snapshots, with uuid npc ids.
+
+Every client is interested in every npc, which is the worst case for both approaches.
+
+run with `uv run benchmarks/world_snapshot.py`
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import argparse
+import random
+import time
+
+from src.common.common_models import (
+    NpcPositionUpdateMessage,
+    PositionData,
+    SocketMessage,
+)
+from src.common.entity import NPCEntity
+from src.common.snapshot import entity_state_fragment, world_snapshot_message
+from src.common.world import GameState
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--npcs", type=int, nargs="+", default=[5, 500, 5000])
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--ticks", type=int, default=20)
+    return parser.parse_args()
+
+
+def per_npc_messages(game_state: GameState, num_clients: int) -> tuple[int, int]:
+    """The previous broadcast: a message per npc, sent to every client"""
+    frames = num_bytes = 0
+    for npc_id in game_state.npc_ids:
+        npc_entity = game_state.entities[npc_id]
+        message = SocketMessage(
+            npc_position_update=NpcPositionUpdateMessage(
+                npc_id=npc_entity.id,
+                position_data=PositionData(
+                    pos_x=npc_entity.pos_x, pos_y=npc_entity.pos_y
+                ),
+            )
+        ).SerializeToString()
+        frames += num_clients
+        num_bytes += len(message) * num_clients
+    return frames, num_bytes
+
+
+def world_snapshots(game_state: GameState, num_clients: int) -> tuple[int, int]:
+    """A snapshot per client assembled from fragments serialized once per tick"""
+    fragments = {}
+    for handle, npc_id in enumerate(game_state.npc_ids, start=1):
+        npc_entity = game_state.entities[npc_id]
+        fragments[npc_id] = entity_state_fragment(
+            handle, npc_entity.pos_x, npc_entity.pos_y
+        )
+    frames = num_bytes = 0
+    for _ in range(num_clients):
+        message = world_snapshot_message(
+            game_state.tick, [fragments[npc_id] for npc_id in game_state.npc_ids]
+        )
+        frames += 1
+        num_bytes += len(message)
+    return frames, num_bytes
+
+
+def measure(broadcast, game_state: GameState, num_clients: int, ticks: int):
+    seconds = 0.0
+    for _ in range(ticks):
+        game_state.game_tick()
+        start = time.perf_counter()
+        frames, num_bytes = broadcast(game_state, num_clients)
+        seconds += time.perf_counter() - start
+    return frames, num_bytes, seconds / ticks * 1000
+
+
+def main():
+    args = parse_args()
+    random.seed(0)
+    print(f"{args.clients} clients, {args.ticks} ticks")
+    print(
+        f"{'npcs':>6} {'method':>10} {'frames/tick':>12} {'KB/tick':>10} {'ms/tick':>9}"
+    )
+    for num_npcs in args.npcs:
+        game_state = GameState()
+        for _ in range(num_npcs):
+            game_state.add_npc(
+                NPCEntity(
+                    type="enemy",
+                    pos_x=random.uniform(0, game_state.WORLD_WIDTH),
+                    pos_y=random.uniform(0, game_state.WORLD_HEIGHT),
+                )
+            )
+        for name, broadcast in [
+            ("per npc", per_npc_messages),
+            ("snapshot", world_snapshots),
+        ]:
+            frames, num_bytes, ms = measure(
+                broadcast, game_state, args.clients, args.ticks
+            )
+            print(
+                f"{num_npcs:>6} {name:>10} {frames:>12} "
+                f"{num_bytes / 1024:>10.1f} {ms:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Load test the game server with a swarm of headless bots, see `src.game_client.bot`.
+
+Creates the players over the http api, connects them all to the websocket server,
+ramping up at `--connect-rate` per second, then measures the traffic for `--duration`
+seconds once every bot is connected. Bots can be spread over several processes when
+one can't keep up.
+
+    uv run bin/load_test.py --players 2000 --processes 4 --duration 60
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import math
+import random
+import resource
+import time
+
+import requests
+
+from config import API_REMOTE_URL, WS_REMOTE_URL
+from src.game_client.bot import MOVEMENT_PATTERNS, Bot, LatencyHistogram, SwarmStats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument(
+        "--connect-rate", type=float, default=200, help="connections per second"
+    )
+    parser.add_argument(
+        "--send-rate", type=float, default=20, help="positions per second per bot"
+    )
+    parser.add_argument(
+        "--patterns",
+        nargs="+",
+        choices=sorted(MOVEMENT_PATTERNS),
+        default=sorted(MOVEMENT_PATTERNS),
+        help="movement patterns, given to the bots in turn",
+    )
+    parser.add_argument("--name-prefix", default="bot")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--api-url", default=API_REMOTE_URL)
+    parser.add_argument("--ws-url", default=WS_REMOTE_URL)
+    return parser.parse_args()
+
+
+def create_players(api_url: str, names: list[str]) -> list[str]:
+    """Player ids of the named players, created if needed"""
+    session = requests.Session()
+
+    def create(name: str) -> str:
+        r = session.post(f"{api_url}/players", json={"username": name})
+        r.raise_for_status()
+        return r.json()["id"]
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        return list(executor.map(create, names))
+
+
+def raise_open_files_limit(needed: int) -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+
+async def swarm(
+    player_ids: list[str], patterns: list[str], args: argparse.Namespace, seed: int
+) -> dict:
+    stats = SwarmStats()
+    stop = asyncio.Event()
+    rng = random.Random(seed)
+    connect_rate = args.connect_rate / args.processes
+
+    tasks = []
+    for index, player_id in enumerate(player_ids):
+        bot = Bot(player_id, patterns[index], stats, args.send_rate, rng)
+        tasks.append(asyncio.create_task(bot.run(args.ws_url, stop)))
+        await asyncio.sleep(1 / connect_rate)
+
+    # let the last connections finish before measuring
+    while stats.connected + stats.failed < len(player_ids):
+        await asyncio.sleep(0.1)
+    stats.reset_traffic()
+    await asyncio.sleep(args.duration)
+    result = stats.as_dict()
+
+    stop.set()
+    await asyncio.gather(*tasks)
+    return result
+
+
+def run_swarm(
+    player_ids: list[str], patterns: list[str], args: argparse.Namespace, seed: int
+) -> dict:
+    raise_open_files_limit(len(player_ids) + 256)
+    return asyncio.run(swarm(player_ids, patterns, args, seed))
+
+
+def report(results: list[dict], players: int, create_seconds: float) -> None:
+    connected = sum(result["connected"] for result in results)
+    failed = sum(result["failed"] for result in results)
+    closed = sum(result["closed"] for result in results)
+    ramp_seconds = max(result["last_connect"] for result in results) - min(
+        result["first_connect"] for result in results
+    )
+    # the processes measure at the same time, for about as long
+    window = max(result["window_seconds"] for result in results)
+    latencies = LatencyHistogram()
+    for result in results:
+        latencies.merge(result["latencies"])
+
+    def per_second(key: str) -> float:
+        return sum(result[key] for result in results) / window
+
+    rows = [
+        ("players created/s", f"{players / create_seconds:.0f}"),
+        ("connected", f"{connected} ({failed} failed, {closed} dropped)"),
+        ("connect rate/s", f"{connected / ramp_seconds:.0f}" if ramp_seconds else "-"),
+        (
+            "mean connect ms",
+            f"{sum(r['connect_seconds'] for r in results) / max(connected, 1) * 1000:.1f}",
+        ),
+        ("sent msg/s", f"{per_second('messages_sent'):.0f}"),
+        ("sent KB/s", f"{per_second('bytes_sent') / 1024:.1f}"),
+        ("received msg/s", f"{per_second('messages_received'):.0f}"),
+        ("received KB/s", f"{per_second('bytes_received') / 1024:.1f}"),
+        ("updates measured", f"{latencies.count}"),
+    ]
+    for name, fraction in (("p50", 0.5), ("p99", 0.99), ("p999", 0.999)):
+        rows.append(
+            (f"{name} latency ms", f"{latencies.percentile(fraction) * 1000:.1f}")
+        )
+    for name, value in rows:
+        print(f"{name:>20} {value}")
+
+
+def main():
+    args = parse_args()
+    names = [f"{args.name_prefix}-{index}" for index in range(args.players)]
+    patterns = [
+        args.patterns[index % len(args.patterns)] for index in range(args.players)
+    ]
+
+    start = time.perf_counter()
+    player_ids = create_players(args.api_url, names)
+    create_seconds = time.perf_counter() - start
+
+    if args.processes == 1:
+        results = [run_swarm(player_ids, patterns, args, args.seed)]
+    else:
+        shard_size = math.ceil(args.players / args.processes)
+        shards = [
+            range(start, min(start + shard_size, args.players))
+            for start in range(0, args.players, shard_size)
+        ]
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [
+                executor.submit(
+                    run_swarm,
+                    [player_ids[index] for index in shard],
+                    [patterns[index] for index in shard],
+                    args,
+                    args.seed + shard.start,
+                )
+                for shard in shards
+            ]
+            results = [future.result() for future in futures]
+    report(results, args.players, create_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Create map files for the game server, see `MAP_FILE` in config.py.
+
+generate a random map:
+    uv run bin/map_tool.py generate maps/world.map --width 10000 --height 10000
+import a map from an image (light pixels are walkable) or a text file (`#` is blocked):
+    uv run bin/map_tool.py import level.png maps/level.map
+"""
+
+import sys
+import os
+from pathlib import Path
+
+src_path = (Path(os.path.dirname(__file__)) / "..").resolve()
+sys.path.append(str(src_path))
+
+import argparse
+
+import numpy as np
+
+from src.common.world_map import WorldMap
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="generate a random map")
+    generate.add_argument("output", type=Path)
+    generate.add_argument("--width", type=int, required=True)
+    generate.add_argument("--height", type=int, required=True)
+    generate.add_argument("--seed", type=int, default=None)
+    generate.add_argument("--blocked-probability", type=float, default=0.2)
+
+    import_ = commands.add_parser("import", help="import an image or text map")
+    import_.add_argument("input", type=Path)
+    import_.add_argument("output", type=Path)
+
+    info = commands.add_parser("info", help="describe a map file")
+    info.add_argument("map_file", type=Path)
+    return parser.parse_args()
+
+
+def read_text_map(path: Path) -> np.ndarray:
+    rows = path.read_text().splitlines()
+    width = max((len(row) for row in rows), default=0)
+    # short rows are padded with walkable tiles
+    return np.array([[tile != "#" for tile in row.ljust(width)] for row in rows])
+
+
+def read_image_map(path: Path) -> np.ndarray:
+    # pygame is only needed to import images
+    import pygame
+
+    pixels = pygame.surfarray.array3d(pygame.image.load(path))
+    # surfarray is indexed [x, y]
+    return pixels.mean(axis=2).T >= 128
+
+
+def describe(path: Path, world_map: WorldMap) -> str:
+    return (
+        f"{path}: {world_map.width}x{world_map.height} tiles, seed {world_map.seed}, "
+        f"{path.stat().st_size} bytes"
+    )
+
+
+def main():
+    args = parse_args()
+    match args.command:
+        case "generate":
+            world_map = WorldMap(
+                args.width, args.height, args.seed, args.blocked_probability
+            )
+            world_map.save(args.output)
+            print(describe(args.output, world_map))
+        case "import":
+            if args.input.suffix == ".txt":
+                tiles = read_text_map(args.input)
+            else:
+                tiles = read_image_map(args.input)
+            world_map = WorldMap.from_array(tiles)
+            world_map.save(args.output)
+            print(describe(args.output, world_map))
+        case "info":
+            print(describe(args.map_file, WorldMap.load(args.map_file)))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
+# connection pool size of the game server asyncio client
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 16))
 
 # API configuration
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
@@ -25,3 +27,54 @@ WS_REMOTE_URL = os.getenv("WS_REMOTE_URL", f"ws://{WS_HOST}:{WS_PORT}")
 
 # Player configuration
 PLAYER_TIMEOUT_SECONDS = int(os.getenv("PLAYER_TIMEOUT_SECONDS", 300))  # 5 minutes
+# players kept in the in process player directory and for how long
+PLAYER_CACHE_MAX_SIZE = int(os.getenv("PLAYER_CACHE_MAX_SIZE", 10_000))
+PLAYER_CACHE_TTL_SECONDS = float(os.getenv("PLAYER_CACHE_TTL_SECONDS", 300))
+# seconds between writes of the players last_seen to the database
+PLAYER_LAST_SEEN_FLUSH_SECONDS = float(os.getenv("PLAYER_LAST_SEEN_FLUSH_SECONDS", 5))
+
+# Broadcast configuration
+SEND_QUEUE_MAX_SIZE = int(os.getenv("SEND_QUEUE_MAX_SIZE", 256))
+# one of drop_oldest, merge, disconnect
+SLOW_CONSUMER_POLICY = os.getenv("SLOW_CONSUMER_POLICY", "merge")
+SLOW_CONSUMER_MAX_LAG_SECONDS = float(os.getenv("SLOW_CONSUMER_MAX_LAG_SECONDS", 5))
+
+# Game loop configuration
+# entity store of the server world, "dict" or "arrays" (numpy, see ArrayGameState)
+ENTITY_STORE = os.getenv("ENTITY_STORE", "dict")
+# simulation ticks per second, 0 uses GameState.NPC_UPDATES_PER_SECOND
+TICK_RATE = int(os.getenv("TICK_RATE", 0))
+# world snapshots sent to clients per second
+NETWORK_SEND_RATE = int(os.getenv("NETWORK_SEND_RATE", 20))
+# snapshots sent without acknowledgement before falling back to a full snapshot
+SNAPSHOT_MAX_UNACKED = int(os.getenv("SNAPSHOT_MAX_UNACKED", 30))
+# bytes of entity updates sent to each client per world snapshot, the updates that
+# don't fit wait for the next one, most important first
+SNAPSHOT_BUDGET_BYTES = int(os.getenv("SNAPSHOT_BUDGET_BYTES", 1200))
+
+# Map configuration
+MAP_WIDTH = int(os.getenv("MAP_WIDTH", 20))
+MAP_HEIGHT = int(os.getenv("MAP_HEIGHT", 20))
+# 0 picks a random seed on every start
+MAP_SEED = int(os.getenv("MAP_SEED", 0))
+# map file to load instead of generating a map, see bin/map_tool.py
+MAP_FILE = os.getenv("MAP_FILE", "")
+# chunks of a streamed map sent to a client per network send at most
+MAP_CHUNKS_PER_SEND = int(os.getenv("MAP_CHUNKS_PER_SEND", 4))
+
+# Persistence configuration
+# seconds between writes of the latest player positions to redis
+PLAYER_POSITION_FLUSH_SECONDS = float(os.getenv("PLAYER_POSITION_FLUSH_SECONDS", 1))
+# seconds between writes of the npc states to redis
+NPC_STATE_FLUSH_SECONDS = float(os.getenv("NPC_STATE_FLUSH_SECONDS", 1))
+
+# Client configuration
+# maps received from the server are cached there, keyed by content hash
+MAP_CACHE_DIR = os.getenv(
+    "MAP_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "game", "maps")
+)
+MAP_CACHE_MAX_MAPS = int(os.getenv("MAP_CACHE_MAX_MAPS", 8))
+# player positions sent to the server per second, at most, when the player moves
+CLIENT_SEND_RATE = int(os.getenv("CLIENT_SEND_RATE", 20))
+# seconds between two sends of the player position when the player doesn't move
+CLIENT_KEEPALIVE_SECONDS = float(os.getenv("CLIENT_KEEPALIVE_SECONDS", 1))
@@ -9,4 +9,15 @@ from src.common.game_pb2 import (
     NpcData,
     PlayerAuthMessage,
     TileRow,
+    EntityEnteredMessage,
+    EntityLeftMessage,
+    EntityState,
+    WorldSnapshot,
+    SnapshotAckMessage,
+    NpcSpawnedMessage,
+    PositionEncoding,
+    SessionInfoMessage,
+    MapEncoding,
+    MapChunk,
+    MapChunkDropped,
 )
@@ -2,12 +2,16 @@ import json
 from src.common.common_models import (
     PositionData,
 )
-from pydantic import BaseModel
 
 
-class PositionComponent(BaseModel):
-    pos_x: float
-    pos_y: float
+# Components are mixins of slotted entity dataclasses, they must not add instance
+# attributes: they declare empty __slots__ and use the fields of the entity.
+
+
+class PositionComponent:
+    """Entity with pos_x and pos_y fields"""
+
+    __slots__ = ()
 
     def update_position(self, position: PositionData) -> None:
         self.pos_x = position.pos_x
@@ -15,6 +19,8 @@ class PositionComponent(BaseModel):
 
 
 class SerializePlayerJsonComponent:
+    __slots__ = ()
+
     def to_json_dict(self) -> dict:
         """subclasses should implement"""
         return {
@@ -28,6 +34,8 @@ class SerializePlayerJsonComponent:
 
 
 class SerializeNPCJsonComponent:
+    __slots__ = ()
+
     def to_json_dict(self) -> dict:
         """subclasses should implement"""
         return {
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from dataclasses import dataclass, field
 import uuid
 
 from src.common.component import (
@@ -8,18 +8,27 @@ from src.common.component import (
 )
 
 
-class Entity(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+# Entities are runtime state mutated every tick, they are not validated. Pydantic
+# models are only used at the API boundary, see src/game_server/api/http_server.py
 
 
+@dataclass(slots=True, kw_only=True)
+class Entity:
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+
+@dataclass(slots=True, kw_only=True)
 class CharacterEntity(Entity, PositionComponent):
-    pass
+    pos_x: float
+    pos_y: float
 
 
+@dataclass(slots=True, kw_only=True)
 class PlayerEntity(CharacterEntity, SerializePlayerJsonComponent):
     player_id: str
-    username: str = Field(default="Unknown Player")
+    username: str = "Unknown Player"
 
 
+@dataclass(slots=True, kw_only=True)
 class NPCEntity(CharacterEntity, SerializeNPCJsonComponent):
     type: str
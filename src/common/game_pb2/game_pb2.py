@@ -13,31 +13,53 @@ _sym_db = _symbol_database.Default()
 
 
 DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
-    b'\n\ngame.proto",\n\x0cPositionData\x12\r\n\x05pos_x\x18\x01 \x01(\x02\x12\r\n\x05pos_y\x18\x02 \x01(\x02"A\n\x07NpcData\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\r\n\x05pos_x\x18\x03 \x01(\x02\x12\r\n\x05pos_y\x18\x04 \x01(\x02"P\n\x15PositionUpdateMessage\x12\x11\n\tplayer_id\x18\x01 \x01(\t\x12$\n\rposition_data\x18\x02 \x01(\x0b\x32\r.PositionData"P\n\x18NpcPositionUpdateMessage\x12\x0e\n\x06npc_id\x18\x01 \x01(\t\x12$\n\rposition_data\x18\x02 \x01(\x0b\x32\r.PositionData"@\n\x19NewPlayerConnectedMessage\x12\x11\n\tplayer_id\x18\x01 \x01(\t\x12\x10\n\x08username\x18\x02 \x01(\t"&\n\x11PlayerAuthMessage\x12\x11\n\tplayer_id\x18\x01 \x01(\t"-\n\x18PlayerDisconectedMessage\x12\x11\n\tplayer_id\x18\x01 \x01(\t"\x18\n\x07TileRow\x12\r\n\x05tiles\x18\x01 \x03(\x08"@\n\x07MapData\x12\r\n\x05width\x18\x01 \x01(\x05\x12\x0e\n\x06height\x18\x02 \x01(\x05\x12\x16\n\x04rows\x18\x03 \x03(\x0b\x32\x08.TileRow"\xc3\x02\n\rSocketMessage\x12\x31\n\x0fposition_update\x18\x01 \x01(\x0b\x32\x16.PositionUpdateMessageH\x00\x12:\n\x14new_player_connected\x18\x02 \x01(\x0b\x32\x1a.NewPlayerConnectedMessageH\x00\x12\x38\n\x13player_disconnected\x18\x03 \x01(\x0b\x32\x19.PlayerDisconectedMessageH\x00\x12\x38\n\x13npc_position_update\x18\x04 \x01(\x0b\x32\x19.NpcPositionUpdateMessageH\x00\x12\x1c\n\x08map_data\x18\x05 \x01(\x0b\x32\x08.MapDataH\x00\x12)\n\x0bplayer_auth\x18\x06 \x01(\x0b\x32\x12.PlayerAuthMessageH\x00\x42\x06\n\x04\x64\x61tab\x06proto3'
+    b'\n\ngame.proto"L\n\x0cPositionData\x12\r\n\x05pos_x\x18\x01 \x01(\x02\x12\r\n\x05pos_y\x18\x02 \x01(\x02\x12\x0e\n\x06qpos_x\x18\x03 \x01(\x11\x12\x0e\n\x06qpos_y\x18\x04 \x01(\x11"A\n\x07NpcData\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\r\n\x05pos_x\x18\x03 \x01(\x02\x12\r\n\x05pos_y\x18\x04 \x01(\x02"\x8f\x01\n\x15PositionUpdateMessage\x12\x11\n\tplayer_id\x18\x01 \x01(\t\x12$\n\rposition_data\x18\x02 \x01(\x0b\x32\r.PositionData\x12\x15\n\rplayer_handle\x18\x03 \x01(\r\x12\x10\n\x08sequence\x18\x04 \x01(\r\x12\x14\n\x0ctimestamp_us\x18\x05 \x01(\x04"d\n\x18NpcPositionUpdateMessage\x12\x0e\n\x06npc_id\x18\x01 \x01(\t\x12$\n\rposition_data\x18\x02 \x01(\x0b\x32\r.PositionData\x12\x12\n\nnpc_handle\x18\x03 \x01(\r"W\n\x19NewPlayerConnectedMessage\x12\x11\n\tplayer_id\x18\x01 \x01(\t\x12\x10\n\x08username\x18\x02 \x01(\t\x12\x15\n\rplayer_handle\x18\x03 \x01(\r"k\n\x11NpcSpawnedMessage\x12\x12\n\nnpc_handle\x18\x01 \x01(\r\x12\x0e\n\x06npc_id\x18\x02 \x01(\t\x12\x0c\n\x04type\x18\x03 \x01(\t\x12$\n\rposition_data\x18\x04 \x01(\x0b\x32\r.PositionData"g\n\x11PlayerAuthMessage\x12\x11\n\tplayer_id\x18\x01 \x01(\t\x12-\n\x12position_encodings\x18\x02 \x03(\x0e\x32\x11.PositionEncoding\x12\x10\n\x08map_hash\x18\x03 \x01(\x0c"Z\n\x12SessionInfoMessage\x12,\n\x11position_encoding\x18\x01 \x01(\x0e\x32\x11.PositionEncoding\x12\x16\n\x0eposition_scale\x18\x02 \x01(\x02"-\n\x18PlayerDisconectedMessage\x12\x11\n\tplayer_id\x18\x01 \x01(\t"\x18\n\x07TileRow\x12\r\n\x05tiles\x18\x01 \x03(\x08"\xc8\x01\n\x07MapData\x12\r\n\x05width\x18\x01 \x01(\x05\x12\x0e\n\x06height\x18\x02 \x01(\x05\x12\x16\n\x04rows\x18\x03 \x03(\x0b\x32\x08.TileRow\x12\x1e\n\x08\x65ncoding\x18\x04 \x01(\x0e\x32\x0c.MapEncoding\x12\r\n\x05tiles\x18\x05 \x01(\x0c\x12\x0f\n\x07version\x18\x06 \x01(\x04\x12\x0c\n\x04hash\x18\x07 \x01(\x0c\x12\x0e\n\x06\x63\x61\x63hed\x18\x08 \x01(\x08\x12\x12\n\nchunk_size\x18\t \x01(\r\x12\x14\n\x0c\x63hunk_radius\x18\n \x01(\r"z\n\x08MapChunk\x12\x0f\n\x07\x63hunk_x\x18\x01 \x01(\x05\x12\x0f\n\x07\x63hunk_y\x18\x02 \x01(\x05\x12\r\n\x05width\x18\x03 \x01(\x05\x12\x0e\n\x06height\x18\x04 \x01(\x05\x12\x1e\n\x08\x65ncoding\x18\x05 \x01(\x0e\x32\x0c.MapEncoding\x12\r\n\x05tiles\x18\x06 \x01(\x0c"3\n\x0fMapChunkDropped\x12\x0f\n\x07\x63hunk_x\x18\x01 \x01(\x05\x12\x0f\n\x07\x63hunk_y\x18\x02 \x01(\x05"\x86\x01\n\x14\x45ntityEnteredMessage\x12\x11\n\tentity_id\x18\x01 \x01(\t\x12\x13\n\x0b\x65ntity_type\x18\x02 \x01(\t\x12$\n\rposition_data\x18\x03 \x01(\x0b\x32\r.PositionData\x12\x0e\n\x06handle\x18\x04 \x01(\r\x12\x10\n\x08username\x18\x05 \x01(\t"&\n\x11\x45ntityLeftMessage\x12\x11\n\tentity_id\x18\x01 \x01(\t"\xb5\x01\n\x0b\x45ntityState\x12\x0e\n\x06handle\x18\x01 \x01(\r\x12\x12\n\x05pos_x\x18\x02 \x01(\x02H\x00\x88\x01\x01\x12\x12\n\x05pos_y\x18\x03 \x01(\x02H\x01\x88\x01\x01\x12\x13\n\x06qpos_x\x18\x04 \x01(\x11H\x02\x88\x01\x01\x12\x13\n\x06qpos_y\x18\x05 \x01(\x11H\x03\x88\x01\x01\x12\x1a\n\x12input_timestamp_us\x18\x06 \x01(\x04\x42\x08\n\x06_pos_xB\x08\n\x06_pos_yB\t\n\x07_qpos_xB\t\n\x07_qpos_y"m\n\rWorldSnapshot\x12\x0c\n\x04tick\x18\x01 \x01(\r\x12\x1e\n\x08\x65ntities\x18\x02 \x03(\x0b\x32\x0c.EntityState\x12\x15\n\rbaseline_tick\x18\x03 \x01(\r\x12\x17\n\x0fremoved_handles\x18\x04 \x03(\r""\n\x12SnapshotAckMessage\x12\x0c\n\x04tick\x18\x01 \x01(\r"\x9d\x05\n\rSocketMessage\x12\x31\n\x0fposition_update\x18\x01 \x01(\x0b\x32\x16.PositionUpdateMessageH\x00\x12:\n\x14new_player_connected\x18\x02 \x01(\x0b\x32\x1a.NewPlayerConnectedMessageH\x00\x12\x38\n\x13player_disconnected\x18\x03 \x01(\x0b\x32\x19.PlayerDisconectedMessageH\x00\x12\x38\n\x13npc_position_update\x18\x04 \x01(\x0b\x32\x19.NpcPositionUpdateMessageH\x00\x12\x1c\n\x08map_data\x18\x05 \x01(\x0b\x32\x08.MapDataH\x00\x12)\n\x0bplayer_auth\x18\x06 \x01(\x0b\x32\x12.PlayerAuthMessageH\x00\x12/\n\x0e\x65ntity_entered\x18\x07 \x01(\x0b\x32\x15.EntityEnteredMessageH\x00\x12)\n\x0b\x65ntity_left\x18\x08 \x01(\x0b\x32\x12.EntityLeftMessageH\x00\x12(\n\x0eworld_snapshot\x18\t \x01(\x0b\x32\x0e.WorldSnapshotH\x00\x12+\n\x0csnapshot_ack\x18\n \x01(\x0b\x32\x13.SnapshotAckMessageH\x00\x12)\n\x0bnpc_spawned\x18\x0b \x01(\x0b\x32\x12.NpcSpawnedMessageH\x00\x12+\n\x0csession_info\x18\x0c \x01(\x0b\x32\x13.SessionInfoMessageH\x00\x12\x1e\n\tmap_chunk\x18\r \x01(\x0b\x32\t.MapChunkH\x00\x12-\n\x11map_chunk_dropped\x18\x0e \x01(\x0b\x32\x10.MapChunkDroppedH\x00\x42\x06\n\x04\x64\x61ta*P\n\x10PositionEncoding\x12\x1b\n\x17POSITION_ENCODING_FLOAT\x10\x00\x12\x1f\n\x1bPOSITION_ENCODING_QUANTIZED\x10\x01*Q\n\x0bMapEncoding\x12\x15\n\x11MAP_ENCODING_ROWS\x10\x00\x12\x15\n\x11MAP_ENCODING_BITS\x10\x01\x12\x14\n\x10MAP_ENCODING_RLE\x10\x02\x62\x06proto3'
 )
 
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, "game_pb2", globals())
 if _descriptor._USE_C_DESCRIPTORS == False:
     DESCRIPTOR._options = None
+    _POSITIONENCODING._serialized_start = 2435
+    _POSITIONENCODING._serialized_end = 2515
+    _MAPENCODING._serialized_start = 2517
+    _MAPENCODING._serialized_end = 2598
     _POSITIONDATA._serialized_start = 14
-    _POSITIONDATA._serialized_end = 58
-    _NPCDATA._serialized_start = 60
-    _NPCDATA._serialized_end = 125
-    _POSITIONUPDATEMESSAGE._serialized_start = 127
-    _POSITIONUPDATEMESSAGE._serialized_end = 207
-    _NPCPOSITIONUPDATEMESSAGE._serialized_start = 209
-    _NPCPOSITIONUPDATEMESSAGE._serialized_end = 289
-    _NEWPLAYERCONNECTEDMESSAGE._serialized_start = 291
-    _NEWPLAYERCONNECTEDMESSAGE._serialized_end = 355
-    _PLAYERAUTHMESSAGE._serialized_start = 357
-    _PLAYERAUTHMESSAGE._serialized_end = 395
-    _PLAYERDISCONECTEDMESSAGE._serialized_start = 397
-    _PLAYERDISCONECTEDMESSAGE._serialized_end = 442
-    _TILEROW._serialized_start = 444
-    _TILEROW._serialized_end = 468
-    _MAPDATA._serialized_start = 470
-    _MAPDATA._serialized_end = 534
-    _SOCKETMESSAGE._serialized_start = 537
-    _SOCKETMESSAGE._serialized_end = 860
+    _POSITIONDATA._serialized_end = 90
+    _NPCDATA._serialized_start = 92
+    _NPCDATA._serialized_end = 157
+    _POSITIONUPDATEMESSAGE._serialized_start = 160
+    _POSITIONUPDATEMESSAGE._serialized_end = 303
+    _NPCPOSITIONUPDATEMESSAGE._serialized_start = 305
+    _NPCPOSITIONUPDATEMESSAGE._serialized_end = 405
+    _NEWPLAYERCONNECTEDMESSAGE._serialized_start = 407
+    _NEWPLAYERCONNECTEDMESSAGE._serialized_end = 494
+    _NPCSPAWNEDMESSAGE._serialized_start = 496
+    _NPCSPAWNEDMESSAGE._serialized_end = 603
+    _PLAYERAUTHMESSAGE._serialized_start = 605
+    _PLAYERAUTHMESSAGE._serialized_end = 708
+    _SESSIONINFOMESSAGE._serialized_start = 710
+    _SESSIONINFOMESSAGE._serialized_end = 800
+    _PLAYERDISCONECTEDMESSAGE._serialized_start = 802
+    _PLAYERDISCONECTEDMESSAGE._serialized_end = 847
+    _TILEROW._serialized_start = 849
+    _TILEROW._serialized_end = 873
+    _MAPDATA._serialized_start = 876
+    _MAPDATA._serialized_end = 1076
+    _MAPCHUNK._serialized_start = 1078
+    _MAPCHUNK._serialized_end = 1200
+    _MAPCHUNKDROPPED._serialized_start = 1202
+    _MAPCHUNKDROPPED._serialized_end = 1253
+    _ENTITYENTEREDMESSAGE._serialized_start = 1256
+    _ENTITYENTEREDMESSAGE._serialized_end = 1390
+    _ENTITYLEFTMESSAGE._serialized_start = 1392
+    _ENTITYLEFTMESSAGE._serialized_end = 1430
+    _ENTITYSTATE._serialized_start = 1433
+    _ENTITYSTATE._serialized_end = 1614
+    _WORLDSNAPSHOT._serialized_start = 1616
+    _WORLDSNAPSHOT._serialized_end = 1725
+    _SNAPSHOTACKMESSAGE._serialized_start = 1727
+    _SNAPSHOTACKMESSAGE._serialized_end = 1761
+    _SOCKETMESSAGE._serialized_start = 1764
+    _SOCKETMESSAGE._serialized_end = 2433
 # @@protoc_insertion_point(module_scope)
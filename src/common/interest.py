@@ -0,0 +1,152 @@
+import math
+from typing import Iterator, MutableMapping
+
+Cell = tuple[int, int]
+
+
+class SpatialGrid:
+    """Uniform grid bucketing entity ids by the cell their position falls in.
+
+    Kept up to date by `GameState` whenever an entity is added, moved or removed,
+    so neighbourhood queries only touch the few cells around a point instead of
+    every entity in the world.
+
+    `positions` can be a view of positions stored elsewhere, see `EntityArrays`."""
+
+    cell_size: float
+    cells: dict[Cell, set[str]]
+    entity_cells: dict[str, Cell]
+    positions: MutableMapping[str, tuple[float, float]]
+
+    def __init__(
+        self,
+        cell_size: float,
+        positions: MutableMapping[str, tuple[float, float]] | None = None,
+    ):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entity_cells = {}
+        self.positions = positions if positions is not None else {}
+
+    def cell_of(self, pos_x: float, pos_y: float) -> Cell:
+        return (
+            math.floor(pos_x / self.cell_size),
+            math.floor(pos_y / self.cell_size),
+        )
+
+    def insert(self, entity_id: str, pos_x: float, pos_y: float) -> None:
+        if entity_id in self.entity_cells:
+            self.move(entity_id, pos_x, pos_y)
+            return
+        cell = self.cell_of(pos_x, pos_y)
+        self.cells.setdefault(cell, set()).add(entity_id)
+        self.entity_cells[entity_id] = cell
+        self.positions[entity_id] = (pos_x, pos_y)
+
+    def remove(self, entity_id: str) -> None:
+        cell = self.entity_cells.pop(entity_id, None)
+        self.positions.pop(entity_id, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        bucket.discard(entity_id)
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, entity_id: str, pos_x: float, pos_y: float) -> bool:
+        """Update the position of an entity. Returns True if it changed cell."""
+        self.positions[entity_id] = (pos_x, pos_y)
+        return self.move_to_cell(entity_id, self.cell_of(pos_x, pos_y))
+
+    def move_to_cell(self, entity_id: str, new_cell: Cell) -> bool:
+        """Move an entity whose position was already updated to the cell it is now in.
+        Returns True if it changed cell."""
+        old_cell = self.entity_cells[entity_id]
+        if new_cell == old_cell:
+            return False
+
+        bucket = self.cells[old_cell]
+        bucket.discard(entity_id)
+        if not bucket:
+            del self.cells[old_cell]
+        self.cells.setdefault(new_cell, set()).add(entity_id)
+        self.entity_cells[entity_id] = new_cell
+        return True
+
+    def query_radius(self, pos_x: float, pos_y: float, radius: float) -> Iterator[str]:
+        """Yield the ids of the entities within `radius` of the given point."""
+        min_x, min_y = self.cell_of(pos_x - radius, pos_y - radius)
+        max_x, max_y = self.cell_of(pos_x + radius, pos_y + radius)
+        radius_sq = radius * radius
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if not bucket:
+                    continue
+                for entity_id in bucket:
+                    other_x, other_y = self.positions[entity_id]
+                    dx = other_x - pos_x
+                    dy = other_y - pos_y
+                    if dx * dx + dy * dy <= radius_sq:
+                        yield entity_id
+
+
+class InterestManager:
+    """Track which entities each connected client is interested in.
+
+    A client is interested in every entity within `radius` of its own player.
+    `refresh` recomputes the set for a client and returns the entities that
+    entered and left it, so the server can send enter/leave events, and
+    `viewers` is the reverse index used to fan out updates of a single entity.
+    """
+
+    grid: SpatialGrid
+    radius: float
+    visible: dict[str, set[str]]
+    viewers: dict[str, set[str]]
+
+    def __init__(self, grid: SpatialGrid, radius: float):
+        self.grid = grid
+        self.radius = radius
+        self.visible = {}
+        self.viewers = {}
+
+    def add_client(self, client_id: str) -> None:
+        self.visible.setdefault(client_id, set())
+
+    def remove_client(self, client_id: str) -> None:
+        for entity_id in self.visible.pop(client_id, set()):
+            self._remove_viewer(entity_id, client_id)
+        # nobody can be interested in an entity that is gone
+        for viewer_id in self.viewers.pop(client_id, set()):
+            self.visible[viewer_id].discard(client_id)
+
+    def refresh(self, client_id: str) -> tuple[set[str], set[str]]:
+        """Recompute the interest set of a client. Returns (entered, left)."""
+        old_visible = self.visible.get(client_id, set())
+        position = self.grid.positions.get(client_id)
+        if position is None:
+            new_visible = set()
+        else:
+            new_visible = set(self.grid.query_radius(*position, self.radius))
+            new_visible.discard(client_id)
+
+        entered = new_visible - old_visible
+        left = old_visible - new_visible
+        for entity_id in entered:
+            self.viewers.setdefault(entity_id, set()).add(client_id)
+        for entity_id in left:
+            self._remove_viewer(entity_id, client_id)
+        self.visible[client_id] = new_visible
+        return entered, left
+
+    def viewers_of(self, entity_id: str) -> set[str]:
+        return self.viewers.get(entity_id, set())
+
+    def _remove_viewer(self, entity_id: str, client_id: str) -> None:
+        viewers = self.viewers.get(entity_id)
+        if viewers is None:
+            return
+        viewers.discard(client_id)
+        if not viewers:
+            del self.viewers[entity_id]
@@ -0,0 +1,78 @@
+"""Compact encodings of the tile map of `MapData`.
+
+Tiles are bit-packed, or run-length encoded when the map has long runs of equal tiles
+and that is smaller. See `MapEncoding` in game.proto.
+"""
+
+import hashlib
+import struct
+
+import numpy as np
+
+from src.common.common_models import MapChunk, MapData, MapEncoding
+from src.common.snapshot import encode_varint
+
+
+def encode_tiles(tiles: np.ndarray) -> tuple[int, bytes]:
+    """(encoding, payload) of a 2d array of tiles, whichever encoding is smaller"""
+    flat = np.ascontiguousarray(tiles, dtype=bool).ravel()
+    bits = np.packbits(flat, bitorder="little").tobytes()
+    if not len(flat):
+        return MapEncoding.MAP_ENCODING_BITS, bits
+
+    run_starts = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    # every run takes at least one byte, don't bother when they can't beat the bits
+    if len(run_starts) + 2 >= len(bits):
+        return MapEncoding.MAP_ENCODING_BITS, bits
+    run_lengths = np.diff(run_starts, prepend=0, append=len(flat))
+    rle = bytes([int(flat[0])]) + b"".join(
+        encode_varint(n) for n in run_lengths.tolist()
+    )
+    if len(rle) < len(bits):
+        return MapEncoding.MAP_ENCODING_RLE, rle
+    return MapEncoding.MAP_ENCODING_BITS, bits
+
+
+def tiles_hash(tiles: np.ndarray) -> bytes:
+    """Content hash of a 2d array of tiles, independent of the encoding"""
+    tiles = np.ascontiguousarray(tiles, dtype=bool)
+    digest = hashlib.blake2b(struct.pack("<II", *tiles.shape), digest_size=16)
+    digest.update(np.packbits(tiles.ravel(), bitorder="little").tobytes())
+    return digest.digest()
+
+
+def decode_varints(data: bytes, offset: int = 0) -> list[int]:
+    values = []
+    value = shift = 0
+    for byte in data[offset:]:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+    return values
+
+
+def decode_tiles(map_data: MapData | MapChunk) -> np.ndarray:
+    """Tiles of a `MapData` or `MapChunk` as a (height, width) bool array"""
+    shape = (map_data.height, map_data.width)
+    match map_data.encoding:
+        case MapEncoding.MAP_ENCODING_BITS:
+            flat = np.unpackbits(
+                np.frombuffer(map_data.tiles, dtype=np.uint8),
+                count=shape[0] * shape[1],
+                bitorder="little",
+            )
+            return flat.astype(bool).reshape(shape)
+        case MapEncoding.MAP_ENCODING_RLE:
+            if not map_data.tiles:
+                return np.zeros(shape, dtype=bool)
+            run_lengths = decode_varints(map_data.tiles, offset=1)
+            # runs alternate between the first tile and its opposite
+            values = (np.arange(len(run_lengths)) + map_data.tiles[0]) % 2
+            return np.repeat(values.astype(bool), run_lengths).reshape(shape)
+        case _:
+            return np.array([row.tiles for row in map_data.rows], dtype=bool).reshape(
+                shape
+            )
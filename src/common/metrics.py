@@ -0,0 +1,266 @@
+"""Counters, gauges and histograms exported in the Prometheus text format.
+
+Cheap enough for the per-message paths: updating a metric takes no lock and allocates
+nothing beyond the number it adds. Metrics are written by the event loop and read by
+the http api thread when scraped, readers may see a histogram a few observations
+apart from its sum. The rare threads writing the same metric concurrently (e.g. the
+sqlite queries of the http api and of the player directory) may lose an update, which
+metrics can afford.
+
+Labelled metrics create one child per label values, on first use. On hot paths keep
+the children, `labels` builds a tuple on every call:
+
+    received = Counter("messages_received_total", "Messages received", ["type"])
+    received_position = received.labels("position_update")
+    received_position.inc()
+"""
+
+import asyncio
+from bisect import bisect_left
+import functools
+import math
+import time
+from typing import Callable, Iterable, Iterator, Sequence
+
+# seconds, for the latency of calls and ticks
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+class Registry:
+    """Metrics exported together"""
+
+    def __init__(self):
+        self.metrics: dict[str, "Metric"] = {}
+
+    def register(self, metric: "Metric") -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def exposition(self) -> str:
+        """All the metrics in the Prometheus text format"""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# metrics of the process, exported by the http api
+registry = Registry()
+
+
+def format_labels(labels: Sequence[tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """A metric, or the family of its children by label values"""
+
+    type: str
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: Registry | None = registry,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], "Metric"] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values: str) -> "Metric":
+        """The child metric of these label values"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} has labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            # another thread may create it at the same time, keep the first one
+            child = self._children.setdefault(values, self._child())
+        return child
+
+    def samples(self) -> Iterator[tuple[str, list[tuple[str, str]], float]]:
+        """(sample name, labels, value) of the metric or of each of its children"""
+        if not self.labelnames:
+            yield from self._samples([])
+            return
+        for values, child in sorted(list(self._children.items())):
+            yield from child._samples(list(zip(self.labelnames, values)))
+
+    def _child(self) -> "Metric":
+        raise NotImplementedError
+
+    def _samples(
+        self, labels: list[tuple[str, str]]
+    ) -> Iterator[tuple[str, list[tuple[str, str]], float]]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """A total that only goes up.
+
+    Given a `function`, the counter reads its value from it when scraped, for totals
+    already counted elsewhere."""
+
+    type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: Registry | None = registry,
+        function: Callable[[], float] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.value = 0
+        self.function = function
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def _child(self) -> "Counter":
+        return Counter(self.name, self.documentation, registry=None)
+
+    def _samples(self, labels):
+        value = self.function() if self.function is not None else self.value
+        yield self.name, labels, value
+
+
+class Gauge(Metric):
+    """A value that goes up and down.
+
+    Given a `function`, the gauge reads its value from it when scraped."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: Registry | None = registry,
+        function: Callable[[], float] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.value = 0
+        self.function = function
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def _child(self) -> "Gauge":
+        return Gauge(self.name, self.documentation, registry=None)
+
+    def _samples(self, labels):
+        value = self.function() if self.function is not None else self.value
+        yield self.name, labels, value
+
+
+class Histogram(Metric):
+    """Observations counted in buckets by upper bound, with their sum"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: Registry | None = registry,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.bounds = tuple(sorted(buckets))
+        # observations by bucket, not cumulative, the last one is +Inf
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def _child(self) -> "Histogram":
+        return Histogram(
+            self.name, self.documentation, registry=None, buckets=self.bounds
+        )
+
+    def _samples(self, labels):
+        counts = list(self.counts)
+        total = 0
+        for bound, count in zip((*self.bounds, math.inf), counts):
+            total += count
+            yield f"{self.name}_bucket", [*labels, ("le", format_value(bound))], total
+        yield f"{self.name}_sum", labels, self.sum
+        yield f"{self.name}_count", labels, total
+
+
+def timed(histogram: Histogram):
+    """Decorator observing how long each call of a function or coroutine function
+    takes, exceptions included"""
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
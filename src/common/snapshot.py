@@ -0,0 +1,131 @@
+"""Build `world_snapshot` socket messages from per-entity fragments.
+
+A repeated protobuf field is encoded as the concatenation of its elements, so the
+serialization of a `WorldSnapshot` holding a single `EntityState` can be joined with
+others to form a snapshot holding all of them. The server serializes each entity once
+per tick and assembles the frame of every client from those fragments, whatever
+subset of the world the client is interested in.
+
+Snapshots may be deltas against a baseline snapshot the client acknowledged: only
+the entities that changed are included, with only their changed fields set.
+"""
+
+from typing import Iterable, Mapping
+
+from src.common.common_models import EntityState, SocketMessage, WorldSnapshot
+
+# positions by entity handle
+EntityPositions = dict[int, tuple[float, float]]
+
+# bits of the fields of an EntityState set in a delta
+POS_X_CHANGED = 1
+POS_Y_CHANGED = 2
+ALL_CHANGED = POS_X_CHANGED | POS_Y_CHANGED
+
+# wire type 2 (length delimited) key of SocketMessage.world_snapshot
+WORLD_SNAPSHOT_KEY = (
+    SocketMessage.DESCRIPTOR.fields_by_name["world_snapshot"].number << 3
+) | 2
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode a non negative int as a protobuf base 128 varint"""
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+WORLD_SNAPSHOT_TAG = encode_varint(WORLD_SNAPSHOT_KEY)
+
+
+def entity_state_fragment(
+    handle: int,
+    pos_x: float,
+    pos_y: float,
+    changed: int = ALL_CHANGED,
+    quantized: bool = False,
+    input_timestamp_us: int = 0,
+) -> bytes:
+    """Serialize the changed fields of one entity as a `WorldSnapshot` fragment.
+
+    Quantized positions are already encoded, see `PositionCodec.to_wire`."""
+    entity_state = EntityState(handle=handle, input_timestamp_us=input_timestamp_us)
+    if quantized:
+        if changed & POS_X_CHANGED:
+            entity_state.qpos_x = int(pos_x)
+        if changed & POS_Y_CHANGED:
+            entity_state.qpos_y = int(pos_y)
+    else:
+        if changed & POS_X_CHANGED:
+            entity_state.pos_x = pos_x
+        if changed & POS_Y_CHANGED:
+            entity_state.pos_y = pos_y
+    return WorldSnapshot(entities=[entity_state]).SerializeToString()
+
+
+def world_snapshot_message(
+    tick: int,
+    fragments: Iterable[bytes],
+    baseline_tick: int = 0,
+    removed_handles: Iterable[int] = (),
+) -> bytes:
+    """Serialized `SocketMessage` holding a snapshot made of the given fragments"""
+    header = WorldSnapshot(
+        tick=tick, baseline_tick=baseline_tick, removed_handles=removed_handles
+    )
+    payload = header.SerializeToString() + b"".join(fragments)
+    return WORLD_SNAPSHOT_TAG + encode_varint(len(payload)) + payload
+
+
+def diff_positions(
+    baseline: Mapping[int, tuple[float, float]] | None,
+    current: Mapping[int, tuple[float, float]],
+) -> tuple[list[tuple[int, int]], list[int]]:
+    """Changes of `current` against `baseline`.
+
+    Returns the (handle, changed fields) of the entities that changed and the handles
+    of the entities that are no longer there. Without baseline every entity changed."""
+    if baseline is None:
+        return [(handle, ALL_CHANGED) for handle in current], []
+
+    changes = []
+    for handle, (pos_x, pos_y) in current.items():
+        old_position = baseline.get(handle)
+        if old_position is None:
+            changes.append((handle, ALL_CHANGED))
+            continue
+        changed = 0
+        if pos_x != old_position[0]:
+            changed |= POS_X_CHANGED
+        if pos_y != old_position[1]:
+            changed |= POS_Y_CHANGED
+        if changed:
+            changes.append((handle, changed))
+    removed = [handle for handle in baseline if handle not in current]
+    return changes, removed
+
+
+def apply_snapshot(
+    baseline: Mapping[int, tuple[float, float]] | None, snapshot: WorldSnapshot
+) -> EntityPositions:
+    """Rebuild the full entity positions of a (possibly delta) snapshot.
+
+    Positions are kept as sent, quantized positions are not decoded."""
+    positions = dict(baseline) if baseline is not None else {}
+    for handle in snapshot.removed_handles:
+        positions.pop(handle, None)
+    for entity_state in snapshot.entities:
+        pos_x, pos_y = positions.get(entity_state.handle, (0.0, 0.0))
+        if entity_state.HasField("pos_x"):
+            pos_x = entity_state.pos_x
+        elif entity_state.HasField("qpos_x"):
+            pos_x = entity_state.qpos_x
+        if entity_state.HasField("pos_y"):
+            pos_y = entity_state.pos_y
+        elif entity_state.HasField("qpos_y"):
+            pos_y = entity_state.qpos_y
+        positions[entity_state.handle] = (pos_x, pos_y)
+    return positions
@@ -1,20 +1,35 @@
+from collections import OrderedDict
 import random
-from typing import List
+from typing import Iterator, MutableMapping
 import uuid
+
+import numpy as np
+
 from src.common.entity import PlayerEntity, NPCEntity, Entity
+from src.common.interest import SpatialGrid
+from src.common.map_encoding import encode_tiles, tiles_hash
+from src.common.world_map import ChunkKey, WorldMap, tile_at
 
 from src.common.common_models import (
+    MapChunk,
+    MapChunkDropped,
     MapData,
     PositionData,
-    TileRow,
+    PositionEncoding,
+    SocketMessage,
 )
+from src.common.quantization import PositionCodec
 
 
 class GameState:
     entities: dict[str, Entity]
     player_ids: set[str]
     npc_ids: set[str]
-    map: List[List[bool]]
+    map: WorldMap
+    # increases whenever the map changes
+    map_version: int
+    grid: SpatialGrid
+    tick: int
 
     # World dimensions
     WORLD_WIDTH: int = 100
@@ -22,39 +37,183 @@ class GameState:
 
     # game constants
     NPC_UPDATES_PER_SECOND = 30
+    # world units per second an npc moves along each axis
+    NPC_SPEED: float = 1.0
+
+    # interest management
+    GRID_CELL_SIZE: float = 10.0
+    INTEREST_RADIUS: float = 25.0
+
+    # wire encoding of positions, see src/common/quantization.py
+    POSITION_ENCODING: int = PositionEncoding.POSITION_ENCODING_QUANTIZED
+    # fixed point steps per world unit of quantized positions
+    POSITION_SCALE: float = 16.0
+
+    # maps with more tiles are streamed to the clients in chunks
+    MAP_STREAM_MIN_TILES: int = 256 * 256
+    MAP_CHUNK_SIZE: int = 32
+    # chunks sent around each player
+    MAP_CHUNK_RADIUS: int = 2
+    MAP_CHUNK_MESSAGES_CACHED: int = 1024
 
     def __init__(self):
         self.entities = {}
         self.player_ids = set()
         self.npc_ids = set()
-        self.map = []
+        self.map = WorldMap(0, 0)
+        self.map_version = 0
+        self.grid = SpatialGrid(self.GRID_CELL_SIZE)
+        self.tick = 0
+        # map_version, hash and serialized map_data socket messages, with and without
+        # tiles, of the current map
+        self._map_cache: tuple[int, bytes, bytes, bytes] | None = None
+        # chunk version and serialized map_chunk socket message by chunk
+        self._chunk_messages: OrderedDict[ChunkKey, tuple[int, bytes]] = OrderedDict()
+
+    def generate_map(
+        self,
+        width: int,
+        height: int,
+        blocked_probability: float = 0.2,
+        seed: int | None = None,
+    ):
+        """Chunks are generated when first used, this is instant whatever the size"""
+        self.set_map(
+            WorldMap(
+                width, height, seed, blocked_probability, chunk_size=self.MAP_CHUNK_SIZE
+            )
+        )
+
+    def load_map(self, path: str) -> None:
+        """Open a map file, see src/common/world_map.py. Instant whatever the size."""
+        self.set_map(WorldMap.load(path, chunk_size=self.MAP_CHUNK_SIZE))
+
+    def set_map(self, world_map: WorldMap) -> None:
+        self.map = world_map
+        self.map_version += 1
+        self._chunk_messages.clear()
+
+    def set_tile(self, x: int, y: int, walkable: bool) -> None:
+        if self.map.set_tile(x, y, walkable):
+            self.map_version += 1
 
-    def generate_map(self, width: int, height: int, blocked_probability: float = 0.2):
-        self.map = [
-            [random.random() > blocked_probability for _ in range(width)]
-            for _ in range(height)
-        ]
+    @property
+    def map_streamed(self) -> bool:
+        """Whether the map is streamed to the clients in chunks instead of sent whole"""
+        return self.map.width * self.map.height > self.MAP_STREAM_MIN_TILES
 
     def get_map_data(self) -> MapData:
+        if self.map_streamed:
+            return MapData(
+                width=self.map.width,
+                height=self.map.height,
+                version=self.map_version,
+                chunk_size=self.map.chunk_size,
+                chunk_radius=self.MAP_CHUNK_RADIUS,
+            )
+
+        tiles = self.map.to_array()
+        encoding, encoded_tiles = encode_tiles(tiles)
         return MapData(
-            width=len(self.map[0]),
-            height=len(self.map),
-            rows=[TileRow(tiles=row) for row in self.map],
+            width=self.map.width,
+            height=self.map.height,
+            encoding=encoding,
+            tiles=encoded_tiles,
+            version=self.map_version,
+            hash=tiles_hash(tiles),
         )
 
+    def map_message(self, client_map_hash: bytes = b"") -> bytes:
+        """Serialized `map_data` socket message, encoded once per map version.
+
+        If the client already has the map cached, the tiles are left out."""
+        if self._map_cache is None or self._map_cache[0] != self.map_version:
+            map_data = self.get_map_data()
+            full_message = SocketMessage(map_data=map_data).SerializeToString()
+            cached_map_data = MapData(
+                width=map_data.width,
+                height=map_data.height,
+                version=map_data.version,
+                hash=map_data.hash,
+                cached=True,
+            )
+            cached_message = SocketMessage(map_data=cached_map_data).SerializeToString()
+            self._map_cache = (
+                self.map_version,
+                map_data.hash,
+                full_message,
+                cached_message,
+            )
+
+        _version, map_hash, full_message, cached_message = self._map_cache
+        if map_hash and client_map_hash == map_hash:
+            return cached_message
+        return full_message
+
+    def map_chunk_at(self, pos_x: float, pos_y: float) -> ChunkKey:
+        """Chunk of the map under a world position"""
+        return self.map.chunk_of(
+            *tile_at(
+                pos_x,
+                pos_y,
+                self.WORLD_WIDTH,
+                self.WORLD_HEIGHT,
+                self.map.width,
+                self.map.height,
+            )
+        )
+
+    def map_chunk_message(self, key: ChunkKey) -> bytes:
+        """Serialized `map_chunk` socket message, encoded once per chunk version"""
+        version = self.map.chunk_version(key)
+        cached = self._chunk_messages.get(key)
+        if cached is not None and cached[0] == version:
+            self._chunk_messages.move_to_end(key)
+            return cached[1]
+
+        tiles = self.map.chunk(key)
+        encoding, encoded_tiles = encode_tiles(tiles)
+        message = SocketMessage(
+            map_chunk=MapChunk(
+                chunk_x=key[0],
+                chunk_y=key[1],
+                width=tiles.shape[1],
+                height=tiles.shape[0],
+                encoding=encoding,
+                tiles=encoded_tiles,
+            )
+        ).SerializeToString()
+        self._chunk_messages[key] = (version, message)
+        if len(self._chunk_messages) > self.MAP_CHUNK_MESSAGES_CACHED:
+            self._chunk_messages.popitem(last=False)
+        return message
+
+    def map_chunk_dropped_message(self, key: ChunkKey) -> bytes:
+        """Serialized `map_chunk_dropped` socket message"""
+        return SocketMessage(
+            map_chunk_dropped=MapChunkDropped(chunk_x=key[0], chunk_y=key[1])
+        ).SerializeToString()
+
+    def position_codec(self, encoding: int) -> PositionCodec:
+        """Codec of positions relative to the world origin"""
+        return PositionCodec(encoding, self.POSITION_SCALE)
+
     def add_player(self, player: PlayerEntity):
         self.entities[player.id] = player
         self.player_ids.add(player.id)
+        self.grid.insert(player.id, player.pos_x, player.pos_y)
 
     def add_npc(self, npc: NPCEntity) -> None:
         self.entities[npc.id] = npc
         self.npc_ids.add(npc.id)
+        self.grid.insert(npc.id, npc.pos_x, npc.pos_y)
 
     def delete_player(self, player_id: str) -> None:
         if player_id not in self.entities or player_id not in self.player_ids:
             raise KeyError()
         del self.entities[player_id]
         self.player_ids.remove(player_id)
+        self.grid.remove(player_id)
 
     def update_entity_position(
         self, entity_id: str, new_position: PositionData
@@ -64,16 +223,222 @@ class GameState:
 
         if not (
             0 <= new_position.pos_x <= self.WORLD_WIDTH
-            and 0 <= new_position.pos_x <= self.WORLD_HEIGHT
+            and 0 <= new_position.pos_y <= self.WORLD_HEIGHT
         ):
             raise ValueError("invalid position")
         self.entities[entity_id].update_position(new_position)
+        self.grid.move(entity_id, new_position.pos_x, new_position.pos_y)
 
-    def game_tick(self) -> None:
-        """execute 1 world update.
+    def game_tick(self, dt: float = 1 / NPC_UPDATES_PER_SECOND) -> None:
+        """execute 1 world update of `dt` seconds.
 
-        * Npcs move"""
+        * Npcs move, staying in the world"""
+        self.tick += 1
+        step = self.NPC_SPEED * dt
         for npc_id in self.npc_ids:
             npc_entity = self.entities[npc_id]
-            npc_entity.pos_x += random.randint(-1, 1)
-            npc_entity.pos_y += random.randint(-1, 1)
+            npc_entity.pos_x = min(
+                max(npc_entity.pos_x + random.randint(-1, 1) * step, 0.0),
+                self.WORLD_WIDTH,
+            )
+            npc_entity.pos_y = min(
+                max(npc_entity.pos_y + random.randint(-1, 1) * step, 0.0),
+                self.WORLD_HEIGHT,
+            )
+            self.grid.move(npc_id, npc_entity.pos_x, npc_entity.pos_y)
+
+
+class EntityArrays:
+    """Structure of arrays holding the positions, velocities and types of entities.
+
+    Entity `i` is row `i` of every array, rows `[0, count)` are in use. Removing an
+    entity moves the last row in its place, so the rows stay contiguous and whole
+    world updates are a few numpy operations."""
+
+    TYPE_PLAYER = 0
+    TYPE_NPC = 1
+
+    ids: list[str]
+    index: dict[str, int]
+    positions: np.ndarray
+    velocities: np.ndarray
+    type_ids: np.ndarray
+
+    def __init__(self, capacity: int = 64):
+        self.ids = []
+        self.index = {}
+        self.positions = np.zeros((capacity, 2), dtype=np.float64)
+        self.velocities = np.zeros((capacity, 2), dtype=np.float64)
+        self.type_ids = np.zeros(capacity, dtype=np.int8)
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    def add(self, entity_id: str, type_id: int, pos_x: float, pos_y: float) -> int:
+        if self.count == len(self.positions):
+            self._grow()
+        row = self.count
+        self.ids.append(entity_id)
+        self.index[entity_id] = row
+        self.positions[row] = (pos_x, pos_y)
+        self.velocities[row] = 0.0
+        self.type_ids[row] = type_id
+        return row
+
+    def remove(self, entity_id: str) -> None:
+        row = self.index.pop(entity_id)
+        last = self.count - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self.ids[row] = moved_id
+            self.index[moved_id] = row
+            self.positions[row] = self.positions[last]
+            self.velocities[row] = self.velocities[last]
+            self.type_ids[row] = self.type_ids[last]
+        self.ids.pop()
+
+    def position(self, entity_id: str) -> tuple[float, float]:
+        pos_x, pos_y = self.positions[self.index[entity_id]].tolist()
+        return pos_x, pos_y
+
+    def set_position(self, entity_id: str, pos_x: float, pos_y: float) -> None:
+        self.positions[self.index[entity_id]] = (pos_x, pos_y)
+
+    def _grow(self) -> None:
+        capacity = len(self.positions) * 2
+        self.positions = np.resize(self.positions, (capacity, 2))
+        self.velocities = np.resize(self.velocities, (capacity, 2))
+        self.type_ids = np.resize(self.type_ids, capacity)
+
+
+class EntityPositionsView(MutableMapping):
+    """Positions of `EntityArrays` as a mapping, used as `SpatialGrid.positions`.
+
+    Entities are added and removed through the arrays, deleting from the view does
+    nothing."""
+
+    def __init__(self, arrays: EntityArrays):
+        self.arrays = arrays
+
+    def __getitem__(self, entity_id: str) -> tuple[float, float]:
+        return self.arrays.position(entity_id)
+
+    def __setitem__(self, entity_id: str, position: tuple[float, float]) -> None:
+        self.arrays.set_position(entity_id, *position)
+
+    def __delitem__(self, entity_id: str) -> None:
+        pass
+
+    def __contains__(self, entity_id: object) -> bool:
+        return entity_id in self.arrays.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.arrays.ids)
+
+    def __len__(self) -> int:
+        return self.arrays.count
+
+
+class EntityView:
+    """An entity whose position is stored in `EntityArrays`.
+
+    Stands for the entity in `ArrayGameState.entities`, so code reading `pos_x` or
+    calling `update_position` works with either store. Other attributes are read
+    from the wrapped entity."""
+
+    __slots__ = ("arrays", "entity")
+
+    def __init__(self, arrays: EntityArrays, entity: Entity):
+        self.arrays = arrays
+        self.entity = entity
+
+    def __getattr__(self, name: str):
+        return getattr(self.entity, name)
+
+    @property
+    def pos_x(self) -> float:
+        return float(self.arrays.positions[self.arrays.index[self.entity.id], 0])
+
+    @pos_x.setter
+    def pos_x(self, value: float) -> None:
+        self.arrays.positions[self.arrays.index[self.entity.id], 0] = value
+
+    @property
+    def pos_y(self) -> float:
+        return float(self.arrays.positions[self.arrays.index[self.entity.id], 1])
+
+    @pos_y.setter
+    def pos_y(self, value: float) -> None:
+        self.arrays.positions[self.arrays.index[self.entity.id], 1] = value
+
+    def update_position(self, position: PositionData) -> None:
+        self.arrays.set_position(self.entity.id, position.pos_x, position.pos_y)
+
+    def to_json_dict(self) -> dict:
+        return self.entity.to_json_dict() | {"pos_x": self.pos_x, "pos_y": self.pos_y}
+
+
+class ArrayGameState(GameState):
+    """`GameState` keeping entity positions in numpy arrays.
+
+    `entities` holds `EntityView`s reading their position from `arrays`, and the npc
+    movement of `game_tick` is computed for all npcs at once."""
+
+    entities: dict[str, EntityView]
+    arrays: EntityArrays
+
+    def __init__(self, seed: int | None = None):
+        super().__init__()
+        self.arrays = EntityArrays()
+        self.grid = SpatialGrid(
+            self.GRID_CELL_SIZE, positions=EntityPositionsView(self.arrays)
+        )
+        self.rng = np.random.default_rng(seed)
+
+    def add_player(self, player: PlayerEntity):
+        self.arrays.add(player.id, EntityArrays.TYPE_PLAYER, player.pos_x, player.pos_y)
+        self.entities[player.id] = EntityView(self.arrays, player)
+        self.player_ids.add(player.id)
+        self.grid.insert(player.id, player.pos_x, player.pos_y)
+
+    def add_npc(self, npc: NPCEntity) -> None:
+        self.arrays.add(npc.id, EntityArrays.TYPE_NPC, npc.pos_x, npc.pos_y)
+        self.entities[npc.id] = EntityView(self.arrays, npc)
+        self.npc_ids.add(npc.id)
+        self.grid.insert(npc.id, npc.pos_x, npc.pos_y)
+
+    def delete_player(self, player_id: str) -> None:
+        super().delete_player(player_id)
+        self.arrays.remove(player_id)
+
+    def game_tick(self, dt: float = 1 / GameState.NPC_UPDATES_PER_SECOND) -> None:
+        """execute 1 world update of `dt` seconds.
+
+        * Npcs move, staying in the world"""
+        self.tick += 1
+        count = self.arrays.count
+        if not count:
+            return
+        positions = self.arrays.positions[:count]
+        velocities = self.arrays.velocities[:count]
+        npcs = self.arrays.type_ids[:count] == EntityArrays.TYPE_NPC
+
+        velocities[npcs] = self.NPC_SPEED * self.rng.integers(
+            -1, 2, size=(np.count_nonzero(npcs), 2)
+        )
+        old_cells = np.floor(positions / self.grid.cell_size)
+        positions[npcs] = np.clip(
+            positions[npcs] + velocities[npcs] * dt,
+            0.0,
+            (self.WORLD_WIDTH, self.WORLD_HEIGHT),
+        )
+        new_cells = np.floor(positions / self.grid.cell_size)
+
+        # only the entities that changed cell need to be moved in the grid
+        changed_cell = np.flatnonzero((old_cells != new_cells).any(axis=1))
+        ids = self.arrays.ids
+        for row, (cell_x, cell_y) in zip(
+            changed_cell.tolist(), new_cells[changed_cell].astype(np.int64).tolist()
+        ):
+            self.grid.move_to_cell(ids[row], (cell_x, cell_y))
@@ -0,0 +1,279 @@
+"""Tile map split in square chunks.
+
+Chunks are generated on first use from the map seed, so creating a map costs nothing
+whatever its size, and generated chunks that were not modified can be dropped and
+generated again when needed. Large maps are streamed to clients chunk by chunk.
+
+Maps can be saved to a map file and loaded back: chunks are then read from the file,
+memory mapped read only, so loading is instant whatever the size and the server
+processes using the same file share its pages.
+
+Map file format, little endian: the header (`MAP_FILE_HEADER`: magic, format
+version, padding, width, height, seed) then the tiles, one row after the other, one
+bit per tile, least significant bit first, each row padded to a whole byte.
+"""
+
+from collections import OrderedDict
+import math
+import os
+from pathlib import Path
+import random
+import struct
+import threading
+
+import numpy as np
+
+ChunkKey = tuple[int, int]
+
+MAP_FILE_MAGIC = b"TMAP"
+MAP_FILE_VERSION = 1
+MAP_FILE_HEADER = struct.Struct("<4sHxxIIQ")
+
+
+class WorldMap:
+    """Walkable (True) or blocked (False) tiles, indexed [y, x] within a chunk"""
+
+    width: int
+    height: int
+    chunk_size: int
+    seed: int
+    # generated chunks that were not modified, least recently used first
+    chunks: OrderedDict[ChunkKey, np.ndarray]
+    # chunks with modified tiles, they can't be generated again
+    modified_chunks: dict[ChunkKey, np.ndarray]
+    # increases when a tile of the chunk changes
+    chunk_versions: dict[ChunkKey, int]
+    # bit-packed rows of the map file the map was loaded from
+    tiles_file: np.memmap | None
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        seed: int | None = None,
+        blocked_probability: float = 0.2,
+        chunk_size: int = 32,
+        max_cached_chunks: int = 4096,
+    ):
+        self.width = width
+        self.height = height
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.blocked_probability = blocked_probability
+        self.chunk_size = chunk_size
+        self.max_cached_chunks = max_cached_chunks
+        self.chunks = OrderedDict()
+        self.modified_chunks = {}
+        self.chunk_versions = {}
+        self.tiles_file = None
+        # the http server reads the map from its own thread
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_array(cls, tiles: np.ndarray, chunk_size: int = 32) -> "WorldMap":
+        """Map of the given (height, width) tiles"""
+        tiles = np.asarray(tiles, dtype=bool)
+        world_map = cls(tiles.shape[1], tiles.shape[0], seed=0, chunk_size=chunk_size)
+        for chunk_y in range(world_map.chunks_y):
+            for chunk_x in range(world_map.chunks_x):
+                start_y = chunk_y * chunk_size
+                start_x = chunk_x * chunk_size
+                world_map.modified_chunks[(chunk_x, chunk_y)] = tiles[
+                    start_y : start_y + chunk_size, start_x : start_x + chunk_size
+                ].copy()
+        return world_map
+
+    @classmethod
+    def load(
+        cls,
+        path: str | os.PathLike,
+        chunk_size: int = 32,
+        max_cached_chunks: int = 4096,
+    ) -> "WorldMap":
+        """Open a map file. Tiles are read from the file when their chunk is used."""
+        with open(path, "rb") as map_file:
+            header = map_file.read(MAP_FILE_HEADER.size)
+        if len(header) < MAP_FILE_HEADER.size:
+            raise ValueError(f"{path} is not a map file")
+        magic, version, width, height, seed = MAP_FILE_HEADER.unpack(header)
+        if magic != MAP_FILE_MAGIC or version != MAP_FILE_VERSION:
+            raise ValueError(f"{path} is not a version {MAP_FILE_VERSION} map file")
+
+        world_map = cls(
+            width,
+            height,
+            seed,
+            chunk_size=chunk_size,
+            max_cached_chunks=max_cached_chunks,
+        )
+        if width and height:
+            world_map.tiles_file = np.memmap(
+                path,
+                dtype=np.uint8,
+                mode="r",
+                offset=MAP_FILE_HEADER.size,
+                shape=(height, math.ceil(width / 8)),
+            )
+        return world_map
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Write the map, with its modified tiles, to a map file.
+
+        The map is written one row of chunks at a time, it is never in memory whole."""
+        path = Path(path)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, "wb") as map_file:
+            map_file.write(
+                MAP_FILE_HEADER.pack(
+                    MAP_FILE_MAGIC, MAP_FILE_VERSION, self.width, self.height, self.seed
+                )
+            )
+            for chunk_y in range(self.chunks_y):
+                rows = np.concatenate(
+                    [
+                        self.chunk((chunk_x, chunk_y))
+                        for chunk_x in range(self.chunks_x)
+                    ],
+                    axis=1,
+                )
+                map_file.write(np.packbits(rows, axis=1, bitorder="little").tobytes())
+        os.replace(temp_path, path)
+
+    @property
+    def chunks_x(self) -> int:
+        return math.ceil(self.width / self.chunk_size)
+
+    @property
+    def chunks_y(self) -> int:
+        return math.ceil(self.height / self.chunk_size)
+
+    def chunk_of(self, x: int, y: int) -> ChunkKey:
+        return x // self.chunk_size, y // self.chunk_size
+
+    def chunk_shape(self, key: ChunkKey) -> tuple[int, int]:
+        """(height, width) of a chunk, smaller than chunk_size on the map edges"""
+        chunk_x, chunk_y = key
+        return (
+            min(self.chunk_size, self.height - chunk_y * self.chunk_size),
+            min(self.chunk_size, self.width - chunk_x * self.chunk_size),
+        )
+
+    def chunk(self, key: ChunkKey) -> np.ndarray:
+        with self._lock:
+            tiles = self.modified_chunks.get(key)
+            if tiles is not None:
+                return tiles
+            tiles = self.chunks.get(key)
+            if tiles is not None:
+                self.chunks.move_to_end(key)
+                return tiles
+
+            if self.tiles_file is not None:
+                tiles = self._read(key)
+            else:
+                tiles = self._generate(key)
+            self.chunks[key] = tiles
+            if len(self.chunks) > self.max_cached_chunks:
+                self.chunks.popitem(last=False)
+            return tiles
+
+    def chunk_version(self, key: ChunkKey) -> int:
+        return self.chunk_versions.get(key, 0)
+
+    def tile(self, x: int, y: int) -> bool:
+        chunk_x, chunk_y = self.chunk_of(x, y)
+        tiles = self.chunk((chunk_x, chunk_y))
+        return bool(tiles[y - chunk_y * self.chunk_size, x - chunk_x * self.chunk_size])
+
+    def set_tile(self, x: int, y: int, walkable: bool) -> bool:
+        """Returns True if the tile changed"""
+        key = self.chunk_of(x, y)
+        tiles = self.chunk(key)
+        local_y = y - key[1] * self.chunk_size
+        local_x = x - key[0] * self.chunk_size
+        if tiles[local_y, local_x] == walkable:
+            return False
+        with self._lock:
+            self.chunks.pop(key, None)
+            self.modified_chunks[key] = tiles
+            tiles[local_y, local_x] = walkable
+            self.chunk_versions[key] = self.chunk_version(key) + 1
+        return True
+
+    def chunks_within(self, center: ChunkKey, radius: int) -> list[ChunkKey]:
+        """Chunks of the map at most `radius` chunks away from `center`, closest first"""
+        center_x, center_y = center
+        keys = [
+            (chunk_x, chunk_y)
+            for chunk_y in range(
+                max(0, center_y - radius), min(self.chunks_y, center_y + radius + 1)
+            )
+            for chunk_x in range(
+                max(0, center_x - radius), min(self.chunks_x, center_x + radius + 1)
+            )
+        ]
+        keys.sort(key=lambda key: chunk_distance(key, center))
+        return keys
+
+    def to_array(self) -> np.ndarray:
+        """All the tiles as a (height, width) array. Generates every chunk."""
+        return self.window(0, 0, self.width, self.height)
+
+    def window(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """Tiles of a rectangle of the map as a (height, width) array"""
+        tiles = np.empty((height, width), dtype=bool)
+        first_chunk_x, first_chunk_y = self.chunk_of(x, y)
+        last_chunk_x, last_chunk_y = self.chunk_of(x + width - 1, y + height - 1)
+        for chunk_y in range(first_chunk_y, last_chunk_y + 1):
+            for chunk_x in range(first_chunk_x, last_chunk_x + 1):
+                chunk = self.chunk((chunk_x, chunk_y))
+                chunk_start_x = chunk_x * self.chunk_size
+                chunk_start_y = chunk_y * self.chunk_size
+                # overlap of the chunk and the window, in map coordinates
+                start_x = max(x, chunk_start_x)
+                start_y = max(y, chunk_start_y)
+                end_x = min(x + width, chunk_start_x + chunk.shape[1])
+                end_y = min(y + height, chunk_start_y + chunk.shape[0])
+                tiles[start_y - y : end_y - y, start_x - x : end_x - x] = chunk[
+                    start_y - chunk_start_y : end_y - chunk_start_y,
+                    start_x - chunk_start_x : end_x - chunk_start_x,
+                ]
+        return tiles
+
+    def _generate(self, key: ChunkKey) -> np.ndarray:
+        # the same chunk of the same seed is always the same
+        rng = np.random.default_rng((self.seed, *key))
+        return rng.random(self.chunk_shape(key)) > self.blocked_probability
+
+    def _read(self, key: ChunkKey) -> np.ndarray:
+        height, width = self.chunk_shape(key)
+        start_x = key[0] * self.chunk_size
+        start_y = key[1] * self.chunk_size
+        # bytes holding the columns of the chunk
+        first_byte = start_x // 8
+        end_byte = math.ceil((start_x + width) / 8)
+        bits = np.unpackbits(
+            self.tiles_file[start_y : start_y + height, first_byte:end_byte],
+            axis=1,
+            bitorder="little",
+        )
+        offset = start_x - first_byte * 8
+        return bits[:, offset : offset + width].astype(bool)
+
+
+def chunk_distance(key: ChunkKey, other: ChunkKey) -> int:
+    """Distance in chunks, diagonals count as one"""
+    return max(abs(key[0] - other[0]), abs(key[1] - other[1]))
+
+
+def tile_at(
+    pos_x: float,
+    pos_y: float,
+    world_width: float,
+    world_height: float,
+    map_width: int,
+    map_height: int,
+) -> tuple[int, int]:
+    """Tile of the map, stretched over the world, under a world position"""
+    x = int(pos_x * map_width / world_width)
+    y = int(pos_y * map_height / world_height)
+    return min(max(x, 0), map_width - 1), min(max(y, 0), map_height - 1)
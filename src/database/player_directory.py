@@ -0,0 +1,241 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+import threading
+import time
+from typing import Iterable
+
+from sqlalchemy import update
+
+from src.common.logging import logger
+from src.database.models import Player
+from src.database.sqlite_db import get_db_session
+
+
+@dataclass
+class PlayerRecord:
+    """Cached copy of a `Player` row"""
+
+    id: str
+    username: str
+    created_at: datetime
+    last_seen: datetime
+    expires_at: float = 0.0
+
+    @classmethod
+    def from_player(cls, player: Player) -> "PlayerRecord":
+        return cls(
+            id=player.id,
+            username=player.username,
+            created_at=player.created_at,
+            last_seen=player.last_seen,
+        )
+
+
+class PlayerDirectory:
+    """In process cache of the players table, shared by the websocket and http servers.
+
+    Players are loaded on demand and kept for `ttl` seconds, up to `max_size` players,
+    evicting the least recently used. The websocket server looks players up with
+    `load`, which runs the queries in a thread and loads the players looked up at the
+    same time with a single query, so a reconnect storm does not stall the event loop.
+
+    `last_seen` updates are kept in memory and written in one transaction by
+    `flush_last_seen`.
+    """
+
+    QUERY_BATCH_SIZE = 500
+
+    records: OrderedDict[str, PlayerRecord]
+    ids_by_username: dict[str, str]
+    pending_last_seen: dict[str, datetime]
+
+    # stats
+    hits: int
+    misses: int
+    queries: int
+    last_seen_written: int
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.records = OrderedDict()
+        self.ids_by_username = {}
+        self.pending_last_seen = {}
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+        self.last_seen_written = 0
+        # the http server runs in its own thread
+        self._lock = threading.Lock()
+        # players looked up by `load` waiting for the next batch query
+        self._to_load: dict[str, asyncio.Future] = {}
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.records),
+            "hits": self.hits,
+            "misses": self.misses,
+            "queries": self.queries,
+            "pending_last_seen": len(self.pending_last_seen),
+            "last_seen_written": self.last_seen_written,
+        }
+
+    def cached(self, player_id: str) -> PlayerRecord | None:
+        """The cached player, without querying the database"""
+        with self._lock:
+            record = self.records.get(player_id)
+            if record is None:
+                return None
+            if record.expires_at < time.monotonic():
+                self._evict(player_id)
+                return None
+            self.records.move_to_end(player_id)
+            self.hits += 1
+            return record
+
+    def get(self, player_id: str) -> PlayerRecord | None:
+        """Get a player, querying the database if it is not cached. Blocks."""
+        record = self.cached(player_id)
+        if record is None:
+            record = self._query([player_id]).get(player_id)
+        return record
+
+    def get_many(self, player_ids: Iterable[str]) -> list[PlayerRecord]:
+        """Get the players that exist among `player_ids`. Blocks."""
+        records = {}
+        missing = []
+        for player_id in player_ids:
+            record = self.cached(player_id)
+            if record is None:
+                missing.append(player_id)
+            else:
+                records[player_id] = record
+        if missing:
+            records.update(self._query(missing))
+        return list(records.values())
+
+    def get_by_username(self, username: str) -> PlayerRecord | None:
+        """Get a player by username, querying the database if it is not cached. Blocks."""
+        player_id = self.ids_by_username.get(username)
+        if player_id is not None:
+            record = self.cached(player_id)
+            if record is not None:
+                return record
+
+        with get_db_session() as db:
+            player = db.query(Player).filter(Player.username == username).first()
+        self.queries += 1
+        if player is None:
+            return None
+        return self.add(player)
+
+    async def load(self, player_id: str) -> PlayerRecord | None:
+        """Get a player without blocking the event loop.
+
+        Misses are gathered until the next iteration of the event loop and queried
+        together in a thread."""
+        record = self.cached(player_id)
+        if record is not None:
+            return record
+
+        future = self._to_load.get(player_id)
+        if future is None:
+            if not self._to_load:
+                asyncio.get_running_loop().call_soon(self._start_batch)
+            future = asyncio.get_running_loop().create_future()
+            self._to_load[player_id] = future
+        return await asyncio.shield(future)
+
+    def add(self, player: Player) -> PlayerRecord:
+        """Cache a player read from the database"""
+        record = PlayerRecord.from_player(player)
+        with self._lock:
+            last_seen = self.pending_last_seen.get(record.id)
+            if last_seen is not None:
+                # the database is behind
+                record.last_seen = last_seen
+            self._evict(record.id)
+            record.expires_at = time.monotonic() + self.ttl
+            self.records[record.id] = record
+            self.ids_by_username[record.username] = record.id
+            while len(self.records) > self.max_size:
+                self._evict(next(iter(self.records)))
+        return record
+
+    def touch(self, player_id: str) -> None:
+        """Set the last_seen of a player to now, written on the next flush"""
+        now = datetime.now()
+        with self._lock:
+            self.pending_last_seen[player_id] = now
+            record = self.records.get(player_id)
+            if record is not None:
+                record.last_seen = now
+
+    def flush_last_seen(self) -> None:
+        """Write the pending last_seen updates in one transaction. Blocks."""
+        with self._lock:
+            pending, self.pending_last_seen = self.pending_last_seen, {}
+        if not pending:
+            return
+        try:
+            with get_db_session() as db:
+                db.execute(
+                    update(Player),
+                    [
+                        {"id": player_id, "last_seen": last_seen}
+                        for player_id, last_seen in pending.items()
+                    ],
+                )
+                db.commit()
+        except Exception:
+            with self._lock:
+                # keep the updates for the next flush, unless newer ones came in
+                self.pending_last_seen = pending | self.pending_last_seen
+            raise
+        self.last_seen_written += len(pending)
+
+    async def run(self, flush_interval: float):
+        while True:
+            await asyncio.sleep(flush_interval)
+            try:
+                await asyncio.to_thread(self.flush_last_seen)
+            except Exception as e:
+                logger.error(f"Could not write players last_seen: {e!r}")
+
+    def _evict(self, player_id: str) -> None:
+        record = self.records.pop(player_id, None)
+        if (
+            record is not None
+            and self.ids_by_username.get(record.username) == player_id
+        ):
+            del self.ids_by_username[record.username]
+
+    def _query(self, player_ids: list[str]) -> dict[str, PlayerRecord]:
+        players = []
+        with get_db_session() as db:
+            # stay below the number of parameters sqlite allows in a query
+            for start in range(0, len(player_ids), self.QUERY_BATCH_SIZE):
+                batch = player_ids[start : start + self.QUERY_BATCH_SIZE]
+                players += db.query(Player).filter(Player.id.in_(batch)).all()
+                self.queries += 1
+        self.misses += len(player_ids)
+        return {player.id: self.add(player) for player in players}
+
+    def _start_batch(self) -> None:
+        to_load, self._to_load = self._to_load, {}
+        task = asyncio.create_task(asyncio.to_thread(self._query, list(to_load)))
+        task.add_done_callback(lambda task: self._resolve_batch(to_load, task))
+
+    @staticmethod
+    def _resolve_batch(to_load: dict[str, asyncio.Future], task: asyncio.Task) -> None:
+        for player_id, future in to_load.items():
+            if future.done():
+                continue
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result().get(player_id))
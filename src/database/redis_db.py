@@ -1,11 +1,20 @@
-from datetime import datetime
-from typing import List
+import struct
+import time
+from typing import Iterable, List
 import uuid
 
 import redis
+from redis import asyncio as aioredis
 
-from config import REDIS_DB, REDIS_HOST, REDIS_PASSWORD, REDIS_PORT
+from config import (
+    REDIS_DB,
+    REDIS_HOST,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_PASSWORD,
+    REDIS_PORT,
+)
 from src.common.common_models import NpcData, PositionData
+from src.common.metrics import Histogram, timed
 
 # Redis key prefixes
 PLAYER_PREFIX = "player:"
@@ -14,6 +23,34 @@ NUM_ONLINE_PLAYERS = "num_online_players"
 NPC_PREFIX = "npc:"
 NPCS_SET = "npcs"
 
+redis_seconds = Histogram(
+    "game_redis_call_seconds",
+    "Duration of the redis client calls",
+    ["client", "call"],
+)
+
+
+def redis_call(client: str):
+    """Decorator timing the calls of a redis client method in `redis_seconds`"""
+
+    def decorator(func):
+        return timed(redis_seconds.labels(client, func.__name__))(func)
+
+    return decorator
+
+
+# player positions are stored as pos_x, pos_y, unix time of the update
+PLAYER_POSITION_STRUCT = struct.Struct("<ffd")
+
+
+def encode_player_position(pos_x: float, pos_y: float, updated_at: float) -> bytes:
+    return PLAYER_POSITION_STRUCT.pack(pos_x, pos_y, updated_at)
+
+
+def decode_player_position(data: bytes) -> tuple[float, float, float]:
+    """(pos_x, pos_y, unix time of the update)"""
+    return PLAYER_POSITION_STRUCT.unpack(data)
+
 
 class RedisClient:
     def __init__(self):
@@ -34,18 +71,25 @@ class RedisClient:
         except redis.exceptions.ConnectionError:
             return False
 
+    @redis_call("sync")
     def add_player_to_online(self, player_id: str):
         """Add player to the set of online players"""
         self.redis_client.sadd(ONLINE_PLAYERS_SET, player_id)
 
+    @redis_call("sync")
     def remove_player_from_online(self, player_id: str):
         """Remove player from the set of online players"""
         self.redis_client.srem(ONLINE_PLAYERS_SET, player_id)
 
+    @redis_call("sync")
     def get_online_players(self) -> set[str]:
-        """Get all online players"""
-        return self.redis_client.smembers(ONLINE_PLAYERS_SET)
+        """Get the ids of all online players"""
+        return {
+            player_id.decode()
+            for player_id in self.redis_client.smembers(ONLINE_PLAYERS_SET)
+        }
 
+    @redis_call("sync")
     def save_player_position(
         self,
         player_id: str,
@@ -53,13 +97,22 @@ class RedisClient:
     ) -> None:
         """Save player position to Redis"""
         key = f"{PLAYER_PREFIX}{player_id}:position"
-        position_data = {
-            "last_update": datetime.now().isoformat(),
-            "pos_x": position_data.pos_x,
-            "pos_y": position_data.pos_y,
-        }
-        self.redis_client.set(key, str(position_data))
+        self.redis_client.set(
+            key,
+            encode_player_position(
+                position_data.pos_x, position_data.pos_y, time.time()
+            ),
+        )
+
+    @redis_call("sync")
+    def get_player_position(self, player_id: str) -> tuple[float, float, float] | None:
+        """Get (pos_x, pos_y, unix time of the update) of a player from Redis"""
+        data = self.redis_client.get(f"{PLAYER_PREFIX}{player_id}:position")
+        if data:
+            return decode_player_position(data)
+        return None
 
+    @redis_call("sync")
     def create_npc(self, npc_type: str, pos_x: float, pos_y: float) -> NpcData:
         """Create a new NPC and save it to Redis"""
         npc_id = str(uuid.uuid4())
@@ -69,6 +122,7 @@ class RedisClient:
         self.redis_client.sadd(NPCS_SET, npc_id)
         return npc_data
 
+    @redis_call("sync")
     def save_npc_position(self, npc_id: str, pos_x: float, pos_y: float):
         """Save NPC position to Redis"""
         key = f"{NPC_PREFIX}{npc_id}"
@@ -78,6 +132,7 @@ class RedisClient:
             npc_data.pos_y = pos_y
             self.redis_client.set(key, npc_data.SerializeToString())
 
+    @redis_call("sync")
     def get_npc(self, npc_id: str) -> NpcData | None:
         """Get NPC data from Redis"""
         key = f"{NPC_PREFIX}{npc_id}"
@@ -88,6 +143,7 @@ class RedisClient:
             return npc_data
         return None
 
+    @redis_call("sync")
     def get_npcs(self) -> List[NpcData]:
         """Get all NPCs from Redis"""
         npc_ids = self.redis_client.smembers(NPCS_SET)
@@ -97,3 +153,124 @@ class RedisClient:
             if npc_data:
                 npcs.append(npc_data)
         return npcs
+
+
+class AsyncRedisClient:
+    """asyncio Redis client for the game loop.
+
+    Commands never block the event loop, connections come from a pool, and the
+    writes of a tick are sent in a single pipeline. Keys and encodings are the same
+    as `RedisClient`, which stays the client of the (threaded) http api."""
+
+    def __init__(self):
+        self.pool = aioredis.ConnectionPool(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            password=REDIS_PASSWORD,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            decode_responses=False,
+        )
+        self.redis_client = aioredis.Redis(connection_pool=self.pool)
+
+    async def is_redis_available(self):
+        """Check if Redis is available"""
+        try:
+            return await self.redis_client.ping()
+        except redis.exceptions.ConnectionError:
+            return False
+
+    @redis_call("async")
+    async def add_player_to_online(self, player_id: str):
+        """Add player to the set of online players"""
+        await self.redis_client.sadd(ONLINE_PLAYERS_SET, player_id)
+
+    @redis_call("async")
+    async def remove_player_from_online(self, player_id: str):
+        """Remove player from the set of online players"""
+        await self.redis_client.srem(ONLINE_PLAYERS_SET, player_id)
+
+    @redis_call("async")
+    async def get_online_players(self) -> set[str]:
+        """Get the ids of all online players"""
+        return {
+            player_id.decode()
+            for player_id in await self.redis_client.smembers(ONLINE_PLAYERS_SET)
+        }
+
+    @redis_call("async")
+    async def save_player_position(
+        self,
+        player_id: str,
+        position_data: PositionData,
+    ) -> None:
+        """Save player position to Redis"""
+        key = f"{PLAYER_PREFIX}{player_id}:position"
+        await self.redis_client.set(
+            key,
+            encode_player_position(
+                position_data.pos_x, position_data.pos_y, time.time()
+            ),
+        )
+
+    @redis_call("async")
+    async def save_player_positions(
+        self, positions: dict[str, tuple[float, float, float]]
+    ) -> None:
+        """Save many (pos_x, pos_y, unix time of the update) player positions at once"""
+        if not positions:
+            return
+        await self.redis_client.mset(
+            {
+                f"{PLAYER_PREFIX}{player_id}:position": encode_player_position(
+                    *position
+                )
+                for player_id, position in positions.items()
+            }
+        )
+
+    @redis_call("async")
+    async def create_npc(self, npc_type: str, pos_x: float, pos_y: float) -> NpcData:
+        """Create a new NPC and save it to Redis"""
+        npc_id = str(uuid.uuid4())
+        npc_data = NpcData(id=npc_id, type=npc_type, pos_x=pos_x, pos_y=pos_y)
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(f"{NPC_PREFIX}{npc_id}", npc_data.SerializeToString())
+            pipe.sadd(NPCS_SET, npc_id)
+            await pipe.execute()
+        return npc_data
+
+    @redis_call("async")
+    async def save_npcs(self, npcs: Iterable[NpcData]) -> None:
+        """Save the full state of many NPCs in one pipeline.
+
+        Blind writes: the server owns the NPC state, nothing is read back."""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for npc_data in npcs:
+                pipe.set(f"{NPC_PREFIX}{npc_data.id}", npc_data.SerializeToString())
+            await pipe.execute()
+
+    @redis_call("async")
+    async def get_npc(self, npc_id: str) -> NpcData | None:
+        """Get NPC data from Redis"""
+        npc_data_str = await self.redis_client.get(f"{NPC_PREFIX}{npc_id}")
+        if npc_data_str:
+            return NpcData.FromString(npc_data_str)
+        return None
+
+    @redis_call("async")
+    async def get_npcs(self) -> List[NpcData]:
+        """Get all NPCs from Redis"""
+        npc_ids = await self.redis_client.smembers(NPCS_SET)
+        if not npc_ids:
+            return []
+        keys = [f"{NPC_PREFIX}{npc_id.decode()}" for npc_id in npc_ids]
+        return [
+            NpcData.FromString(npc_data_str)
+            for npc_data_str in await self.redis_client.mget(keys)
+            if npc_data_str
+        ]
+
+    async def close(self) -> None:
+        await self.redis_client.aclose()
+        await self.pool.aclose()
@@ -1,10 +1,12 @@
 from contextlib import contextmanager
+import time
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from config import SQLITE_DB_URL
+from src.common.metrics import Histogram
 
 from .models import Base
 
@@ -14,6 +16,40 @@ engine = create_engine(SQLITE_DB_URL, connect_args={"check_same_thread": False})
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+sqlite_seconds = Histogram(
+    "game_sqlite_query_seconds",
+    "Duration of the sqlite queries, by statement",
+    ["statement"],
+)
+SQLITE_STATEMENTS = ("select", "insert", "update", "delete")
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def observe_query_time(conn, cursor, statement, parameters, context, executemany):
+    observe_query(conn, statement)
+
+
+@event.listens_for(engine, "handle_error")
+def observe_failed_query_time(exception_context):
+    # the timer of a failed query is not stopped by after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        observe_query(conn, exception_context.statement or "")
+
+
+def observe_query(conn, statement: str) -> None:
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    kind = statement.lstrip()[:6].lower()
+    sqlite_seconds.labels(kind if kind in SQLITE_STATEMENTS else "other").observe(
+        duration
+    )
+
+
 # Ensure tables exist
 Base.metadata.create_all(bind=engine)
 
@@ -0,0 +1,298 @@
+"""Headless players for load tests, see bin/load_test.py.
+
+Bots speak the game protocol like `GameClient`, without pygame: they authenticate,
+acknowledge world snapshots and send positions following a scripted movement pattern.
+They count the traffic in each direction and measure the latency of the player
+updates they see, from the timestamp the bot that moved put in its position update
+(`PositionUpdateMessage.timestamp_us`, sent back in `EntityState.input_timestamp_us`).
+Latencies are only meaningful between bots sharing a clock, on the same host.
+"""
+
+import asyncio
+import math
+import random
+import time
+from typing import Callable
+
+import websockets
+
+from src.common.common_models import (
+    PlayerAuthMessage,
+    PositionEncoding,
+    PositionUpdateMessage,
+    SnapshotAckMessage,
+    SocketMessage,
+    WorldSnapshot,
+)
+from src.common.quantization import PositionCodec
+from src.common.snapshot import EntityPositions, apply_snapshot
+from src.common.world import GameState
+
+
+def now_us() -> int:
+    return time.time_ns() // 1000
+
+
+class LatencyHistogram:
+    """Latencies counted in buckets of `resolution` seconds, up to `max_latency`.
+
+    Histograms of several processes are merged by adding their counts."""
+
+    def __init__(self, resolution: float = 0.0001, max_latency: float = 10.0):
+        self.resolution = resolution
+        self.counts = [0] * (int(max_latency / resolution) + 1)
+        self.count = 0
+
+    def add(self, latency: float) -> None:
+        index = min(max(int(latency / self.resolution), 0), len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+
+    def merge(self, counts: list[int]) -> None:
+        for index, count in enumerate(counts):
+            if count:
+                self.counts[index] += count
+                self.count += count
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the latency of the given fraction of the samples"""
+        if not self.count:
+            return math.nan
+        target = max(math.ceil(fraction * self.count), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return (index + 1) * self.resolution
+        return len(self.counts) * self.resolution
+
+
+class SwarmStats:
+    """Traffic and latencies of the bots of one process"""
+
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.closed = 0
+        self.connect_seconds = 0.0
+        self.first_connect = math.inf
+        self.last_connect = 0.0
+        self.reset_traffic()
+
+    def reset_traffic(self) -> None:
+        """Start measuring the traffic from now"""
+        self.window_start = time.perf_counter()
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.messages_received = 0
+        self.bytes_received = 0
+        self.latencies = LatencyHistogram()
+
+    def as_dict(self) -> dict:
+        return {
+            "connected": self.connected,
+            "failed": self.failed,
+            "closed": self.closed,
+            "connect_seconds": self.connect_seconds,
+            "first_connect": self.first_connect,
+            "last_connect": self.last_connect,
+            "window_seconds": time.perf_counter() - self.window_start,
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "messages_received": self.messages_received,
+            "bytes_received": self.bytes_received,
+            "latencies": self.latencies.counts,
+        }
+
+
+# Movement patterns: position of a bot `t` seconds after it connected
+
+
+def circle(bot: "Bot", t: float) -> tuple[float, float]:
+    angle = bot.phase + bot.speed * t / bot.radius
+    return (
+        bot.origin[0] + bot.radius * math.cos(angle),
+        bot.origin[1] + bot.radius * math.sin(angle),
+    )
+
+
+def patrol(bot: "Bot", t: float) -> tuple[float, float]:
+    """Back and forth on a line"""
+    distance = (bot.phase * bot.radius + bot.speed * t) % (4 * bot.radius)
+    offset = abs(distance - 2 * bot.radius) - bot.radius
+    return bot.origin[0] + offset, bot.origin[1]
+
+
+def wander(bot: "Bot", t: float) -> tuple[float, float]:
+    """Random walk"""
+    pos_x, pos_y = bot.position
+    step = bot.speed / bot.send_rate
+    angle = bot.rng.uniform(0, 2 * math.pi)
+    return pos_x + step * math.cos(angle), pos_y + step * math.sin(angle)
+
+
+def idle(bot: "Bot", t: float) -> tuple[float, float]:
+    return bot.origin
+
+
+MOVEMENT_PATTERNS: dict[str, Callable[["Bot", float], tuple[float, float]]] = {
+    "circle": circle,
+    "patrol": patrol,
+    "wander": wander,
+    "idle": idle,
+}
+
+
+class Bot:
+    """One player connected to the websocket server, moving by itself"""
+
+    # seconds between two sends of an unchanged position
+    KEEPALIVE_SECONDS = 1.0
+
+    def __init__(
+        self,
+        player_id: str,
+        pattern: str,
+        stats: SwarmStats,
+        send_rate: float,
+        rng: random.Random,
+    ):
+        self.player_id = player_id
+        self.move = MOVEMENT_PATTERNS[pattern]
+        self.stats = stats
+        self.send_rate = send_rate
+        self.rng = rng
+        self.origin = (
+            rng.uniform(0, GameState.WORLD_WIDTH),
+            rng.uniform(0, GameState.WORLD_HEIGHT),
+        )
+        self.position = self.origin
+        self.radius = rng.uniform(2.0, 10.0)
+        self.phase = rng.uniform(0, 2 * math.pi)
+        # world units per second
+        self.speed = rng.uniform(2.0, 10.0)
+        self.codec: PositionCodec | None = None
+        self.sequence = 0
+        # received world snapshots that the server may use as delta baseline
+        self.snapshots: dict[int, EntityPositions] = {}
+        # latest input timestamp seen by entity handle, resent states count once
+        self.seen_timestamps: dict[int, int] = {}
+
+    async def run(self, ws_url: str, stop: asyncio.Event) -> None:
+        connect_start = time.perf_counter()
+        try:
+            async with websockets.connect(ws_url, max_size=None) as websocket:
+                self.websocket = websocket
+                await self.send(
+                    SocketMessage(
+                        player_auth=PlayerAuthMessage(
+                            player_id=self.player_id,
+                            position_encodings=[
+                                PositionEncoding.POSITION_ENCODING_QUANTIZED,
+                                PositionEncoding.POSITION_ENCODING_FLOAT,
+                            ],
+                        )
+                    )
+                )
+                receive_task = asyncio.create_task(self.receive(connect_start))
+                try:
+                    await self.send_positions(stop, receive_task)
+                finally:
+                    receive_task.cancel()
+        except (OSError, websockets.exceptions.WebSocketException):
+            pass
+        if self.codec is None:
+            # never authenticated
+            self.stats.failed += 1
+        elif not stop.is_set():
+            self.stats.closed += 1
+
+    async def send(self, message: SocketMessage) -> None:
+        data = message.SerializeToString()
+        await self.websocket.send(data)
+        self.stats.messages_sent += 1
+        self.stats.bytes_sent += len(data)
+
+    async def send_positions(self, stop: asyncio.Event, receive_task: asyncio.Task):
+        """Send the position of the bot, when it changed or as keepalive"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        next_send = start
+        sent_position = None
+        sent_time = 0.0
+        while not stop.is_set() and not receive_task.done():
+            now = loop.time()
+            if self.codec is not None:
+                pos_x, pos_y = self.move(self, now - start)
+                self.position = (
+                    min(max(pos_x, 0.0), GameState.WORLD_WIDTH),
+                    min(max(pos_y, 0.0), GameState.WORLD_HEIGHT),
+                )
+                position_data = self.codec.encode(*self.position)
+                if (
+                    position_data != sent_position
+                    or now - sent_time >= self.KEEPALIVE_SECONDS
+                ):
+                    self.sequence += 1
+                    await self.send(
+                        SocketMessage(
+                            position_update=PositionUpdateMessage(
+                                position_data=position_data,
+                                sequence=self.sequence,
+                                timestamp_us=now_us(),
+                            )
+                        )
+                    )
+                    sent_position = position_data
+                    sent_time = now
+            next_send = max(next_send + 1 / self.send_rate, loop.time())
+            await asyncio.sleep(next_send - loop.time())
+        if receive_task.done() and not receive_task.cancelled():
+            # raises if the connection failed
+            receive_task.result()
+
+    async def receive(self, connect_start: float) -> None:
+        async for data in self.websocket:
+            self.stats.messages_received += 1
+            self.stats.bytes_received += len(data)
+            message = SocketMessage.FromString(data)
+            match message.WhichOneof("data"):
+                case "session_info":
+                    session_info = message.session_info
+                    self.codec = PositionCodec(
+                        session_info.position_encoding, session_info.position_scale
+                    )
+                    connected_at = time.perf_counter()
+                    self.stats.connected += 1
+                    self.stats.connect_seconds += connected_at - connect_start
+                    self.stats.first_connect = min(
+                        self.stats.first_connect, connect_start
+                    )
+                    self.stats.last_connect = max(self.stats.last_connect, connected_at)
+                case "world_snapshot":
+                    await self.apply_snapshot(message.world_snapshot)
+
+    async def apply_snapshot(self, snapshot: WorldSnapshot) -> None:
+        baseline = None
+        if snapshot.baseline_tick:
+            baseline = self.snapshots.get(snapshot.baseline_tick)
+            if baseline is None:
+                return
+        positions = apply_snapshot(baseline, snapshot)
+        self.snapshots = {
+            tick: tick_positions
+            for tick, tick_positions in self.snapshots.items()
+            if tick >= snapshot.baseline_tick
+        }
+        self.snapshots[snapshot.tick] = positions
+
+        received_us = now_us()
+        for entity_state in snapshot.entities:
+            timestamp_us = entity_state.input_timestamp_us
+            if timestamp_us > self.seen_timestamps.get(entity_state.handle, 0):
+                self.seen_timestamps[entity_state.handle] = timestamp_us
+                self.stats.latencies.add((received_us - timestamp_us) / 1_000_000)
+
+        await self.send(
+            SocketMessage(snapshot_ack=SnapshotAckMessage(tick=snapshot.tick))
+        )
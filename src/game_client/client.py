@@ -2,25 +2,58 @@ import asyncio
 import logging
 from typing import cast
 
+import numpy as np
 import pygame
 
 from src.common.common_models import (
+    EntityEnteredMessage,
+    MapChunk,
+    MapChunkDropped,
     MapData,
     NpcPositionUpdateMessage,
     PositionData,
     PositionUpdateMessage,
     SocketMessage,
     NewPlayerConnectedMessage,
+    NpcSpawnedMessage,
     PlayerAuthMessage,
+    PositionEncoding,
+    SessionInfoMessage,
+    SnapshotAckMessage,
+    WorldSnapshot,
 )
 from src.common.entity import PlayerEntity, NPCEntity, Entity
+from src.common.map_encoding import decode_tiles
+from src.game_client.map_cache import MapCache
+from src.game_client.receiver import MessageReceiver
+from src.common.quantization import FLOAT_CODEC, PositionCodec
+from src.common.snapshot import EntityPositions, apply_snapshot
 from src.common.world import GameState
+from src.common.world_map import ChunkKey
 from src.common.logging import logger
+from config import (
+    CLIENT_KEEPALIVE_SECONDS,
+    CLIENT_SEND_RATE,
+    MAP_CACHE_DIR,
+    MAP_CACHE_MAX_MAPS,
+)
 
 # Game constants
 
 WIDTH, HEIGHT = 800, 600
 
+# pixels per world unit, the whole world fits the screen
+SCREEN_SCALE_X = WIDTH / GameState.WORLD_WIDTH
+SCREEN_SCALE_Y = HEIGHT / GameState.WORLD_HEIGHT
+
+# world units the player moves per frame
+PLAYER_STEP = 5 / SCREEN_SCALE_X
+
+FPS = 60
+
+# log the network stats every this many seconds
+STATS_LOG_SECONDS = 10
+
 NPC_SIZE = 20
 
 WHITE = (255, 255, 255)
@@ -29,6 +62,13 @@ RED = (255, 0, 0)
 
 PLAYER_SIZE = 50
 
+BLUE = (0, 0, 255)
+
+OLIVE = (128, 128, 0)
+
+# above this many changed rects per frame, updating the whole display is faster
+MAX_DIRTY_RECTS = 300
+
 
 class LocalGameState:
     player_id: str
@@ -36,7 +76,22 @@ class LocalGameState:
     npc_ids: set[str]
     map_width: int
     map_height: int
-    map_tiles: list[list[bool]]
+    map_tiles: np.ndarray | None
+    # chunks of a streamed map around the player, see MapData.chunk_size
+    map_chunk_size: int
+    map_chunks: dict[ChunkKey, np.ndarray]
+    # increases when the tiles we have change, to draw the map again
+    map_version: int
+    # map loaded from the map cache, announced to the server
+    cached_map: MapData | None
+    # received world snapshots that the server may use as delta baseline
+    snapshots: dict[int, EntityPositions]
+    # entity ids by the handle the server announced for them, and back
+    entity_ids_by_handle: dict[int, str]
+    entity_handles: dict[str, int]
+    # encoding of positions negotiated with the server
+    position_codec: PositionCodec
+    session_started: bool
 
     def __init__(self, player_id: str, username: str):
         self._state = GameState()
@@ -54,54 +109,132 @@ class LocalGameState:
         self.npc_ids = set()
         self.map_width = 0
         self.map_height = 0
-        self.map_tiles = []
+        self.map_tiles = None
+        self.map_chunk_size = 0
+        self.map_chunks = {}
+        self.map_version = 0
+        self.cached_map = None
+        self.snapshots = {}
+        self.entity_ids_by_handle = {}
+        self.entity_handles = {}
+        self.position_codec = FLOAT_CODEC
+        self.session_started = False
+
+    def start_session(self, session_info: SessionInfoMessage):
+        self.position_codec = PositionCodec(
+            session_info.position_encoding, session_info.position_scale
+        )
+        self.session_started = True
+
+    def set_handle(self, entity_id: str, handle: int):
+        if handle:
+            self.entity_ids_by_handle[handle] = entity_id
+            self.entity_handles[entity_id] = handle
+
+    def forget_handle(self, entity_id: str):
+        handle = self.entity_handles.pop(entity_id, None)
+        if handle is not None:
+            del self.entity_ids_by_handle[handle]
 
     def update_state_other_player(self, position_update: PositionUpdateMessage):
         """Update a position of another player.
 
         This player may or may have not been seen before."""
-        if (position_update.player_id not in self.entities) or (
-            position_update.player_id not in self.other_player_ids
-        ):
+        player_id = position_update.player_id or self.entity_ids_by_handle.get(
+            position_update.player_handle
+        )
+        if player_id is None:
+            logger.warning(f"Unknown player handle {position_update.player_handle}")
+            return
+
+        if (player_id not in self.entities) or (player_id not in self.other_player_ids):
             # havent seen this guy
-            logger.info(f"New player with id {position_update.player_id} joined")
-            self.entities[position_update.player_id] = PlayerEntity(
-                player_id=position_update.player_id,
-                id=position_update.player_id,
+            logger.info(f"New player with id {player_id} joined")
+            self.entities[player_id] = PlayerEntity(
+                player_id=player_id,
+                id=player_id,
                 pos_x=0,
                 pos_y=0.0,
             )
-            self.other_player_ids.add(position_update.player_id)
+            self.other_player_ids.add(player_id)
 
-        self.entities[
-            position_update.player_id
-        ].pos_x = position_update.position_data.pos_x
-        self.entities[
-            position_update.player_id
-        ].pos_y = position_update.position_data.pos_y
+        player = self.entities[player_id]
+        player.pos_x, player.pos_y = self.position_codec.decode(
+            position_update.position_data
+        )
 
     def update_state_npc(self, npc_update: NpcPositionUpdateMessage):
         """Update a position of an NPC.
 
         This NPC may or may have not been seen before."""
-        if (npc_update.npc_id not in self.entities) or (
-            npc_update.npc_id not in self.npc_ids
-        ):
+        npc_id = npc_update.npc_id or self.entity_ids_by_handle.get(
+            npc_update.npc_handle
+        )
+        if npc_id is None:
+            logger.warning(f"Unknown npc handle {npc_update.npc_handle}")
+            return
+
+        if (npc_id not in self.entities) or (npc_id not in self.npc_ids):
             # havent seen this npc
-            logger.info(f"New npc with id {npc_update.npc_id} joined")
-            self.entities[npc_update.npc_id] = NPCEntity(
-                id=npc_update.npc_id,
+            logger.info(f"New npc with id {npc_id} joined")
+            self.entities[npc_id] = NPCEntity(
+                id=npc_id,
                 type="enemy",  # TODO: get npc type from server
                 pos_x=0,
                 pos_y=0.0,
             )
-            self.npc_ids.add(npc_update.npc_id)
-
-        self.entities[npc_update.npc_id].pos_x = npc_update.position_data.pos_x
-        self.entities[npc_update.npc_id].pos_y = npc_update.position_data.pos_y
+            self.npc_ids.add(npc_id)
+
+        npc = self.entities[npc_id]
+        npc.pos_x, npc.pos_y = self.position_codec.decode(npc_update.position_data)
+
+    def spawn_npc(self, npc_spawned: NpcSpawnedMessage):
+        """An npc spawned or entered our area of interest."""
+        npc_id = npc_spawned.npc_id
+        pos_x, pos_y = self.position_codec.decode(npc_spawned.position_data)
+        self.entities[npc_id] = NPCEntity(
+            id=npc_id,
+            type=npc_spawned.type,
+            pos_x=pos_x,
+            pos_y=pos_y,
+        )
+        self.npc_ids.add(npc_id)
+        self.set_handle(npc_id, npc_spawned.npc_handle)
+
+    def apply_snapshot(self, snapshot: WorldSnapshot) -> bool:
+        """Update the positions of the entities in a world snapshot.
+
+        Returns False if the snapshot is a delta of a baseline we do not have anymore."""
+        baseline = None
+        if snapshot.baseline_tick:
+            baseline = self.snapshots.get(snapshot.baseline_tick)
+            if baseline is None:
+                logger.warning(f"Missing baseline {snapshot.baseline_tick} of snapshot")
+                return False
+        positions = apply_snapshot(baseline, snapshot)
+
+        # the server never goes back to baselines older than the one it used
+        self.snapshots = {
+            tick: tick_positions
+            for tick, tick_positions in self.snapshots.items()
+            if tick >= snapshot.baseline_tick
+        }
+        self.snapshots[snapshot.tick] = positions
+
+        for entity_state in snapshot.entities:
+            entity_id = self.entity_ids_by_handle.get(entity_state.handle)
+            if entity_id is None or entity_id not in self.entities:
+                # announced entities only, the snapshot may race their removal
+                continue
+            entity = self.entities[entity_id]
+            entity.pos_x, entity.pos_y = self.position_codec.from_wire(
+                *positions[entity_state.handle]
+            )
+        return True
 
-    def add_other_player(self, player_id: str, username: str):
+    def add_other_player(self, player_id: str, username: str, handle: int = 0):
         logger.info(f"New player with id {player_id} joined")
+        self.set_handle(player_id, handle)
         self.entities[player_id] = PlayerEntity(
             player_id=player_id,
             id=player_id,
@@ -112,8 +245,70 @@ class LocalGameState:
         self.other_player_ids.add(player_id)
 
     def delete_player(self, player_id: str):
-        del self.entities[player_id]
-        self.other_player_ids.remove(player_id)
+        # the player may already be gone if it left our area of interest
+        self.entities.pop(player_id, None)
+        self.other_player_ids.discard(player_id)
+        self.forget_handle(player_id)
+
+    def add_entity(self, entity_entered: EntityEnteredMessage):
+        """A player entered our area of interest, npcs come with `spawn_npc`."""
+        entity_id = entity_entered.entity_id
+        if entity_entered.entity_type != "player":
+            logger.warning(f"Unexpected entity type {entity_entered.entity_type}")
+            return
+        self.set_handle(entity_id, entity_entered.handle)
+        if entity_id not in self.other_player_ids:
+            self.add_other_player(
+                entity_id, entity_entered.username or "Unknown Player"
+            )
+        entity = self.entities[entity_id]
+        entity.pos_x, entity.pos_y = self.position_codec.decode(
+            entity_entered.position_data
+        )
+
+    def remove_entity(self, entity_id: str):
+        """An entity left our area of interest."""
+        self.entities.pop(entity_id, None)
+        self.other_player_ids.discard(entity_id)
+        self.npc_ids.discard(entity_id)
+        self.forget_handle(entity_id)
+
+    def set_map(self, map_data: MapData) -> None:
+        self.map_width = map_data.width
+        self.map_height = map_data.height
+        self.map_chunk_size = map_data.chunk_size
+        self.map_chunks = {}
+        if map_data.chunk_size:
+            # the tiles are streamed
+            self.map_tiles = None
+        else:
+            self.map_tiles = decode_tiles(map_data)
+        self.map_version += 1
+
+    def add_map_chunk(self, map_chunk: MapChunk) -> None:
+        if not self.map_chunk_size:
+            logger.warning("Received a map chunk but the map is not streamed")
+            return
+        key = (map_chunk.chunk_x, map_chunk.chunk_y)
+        self.map_chunks[key] = decode_tiles(map_chunk)
+        self.map_version += 1
+
+    def drop_map_chunk(self, map_chunk_dropped: MapChunkDropped) -> None:
+        """Drop a chunk the player went away from, the server sends it again when the
+        player comes back"""
+        key = (map_chunk_dropped.chunk_x, map_chunk_dropped.chunk_y)
+        if self.map_chunks.pop(key, None) is not None:
+            self.map_version += 1
+
+    def map_blocks(self) -> list[tuple[tuple[int, int], np.ndarray]]:
+        """(position of the first tile, (height, width) tiles) of the parts of the map
+        we have"""
+        if not self.map_chunk_size:
+            return [((0, 0), self.map_tiles)] if self.map_tiles is not None else []
+        return [
+            ((chunk_x * self.map_chunk_size, chunk_y * self.map_chunk_size), tiles)
+            for (chunk_x, chunk_y), tiles in self.map_chunks.items()
+        ]
 
     @property
     def entities(self) -> dict[str, Entity]:
@@ -125,7 +320,7 @@ class LocalGameState:
 
     @property
     def player_position_data(self) -> PositionData:
-        return PositionData(pos_x=self.player.pos_x, pos_y=self.player.pos_y)
+        return self.position_codec.encode(self.player.pos_x, self.player.pos_y)
 
 
 class GameClient:
@@ -134,24 +329,59 @@ class GameClient:
         self.player_id = player_id
         self.game_state = LocalGameState(player_id, player_username)
         self.websocket = websocket
-        # message queue
-        self.new_socket_messages = []
+        # messages from the server, parsed as they arrive
+        self.receiver = MessageReceiver(websocket)
+        # latest world snapshot applied, to be acknowledged to the server
+        self.snapshot_ack_tick = 0
+        # position sent last, its sequence number and when, see send_state
+        self.sent_position: PositionData | None = None
+        self.sent_sequence = 0
+        self.sent_time = 0.0
+        self.next_send_time = 0.0
+        self.map_cache = MapCache(MAP_CACHE_DIR, MAP_CACHE_MAX_MAPS)
+        self.game_state.cached_map = self.map_cache.latest()
 
         # Send authentication message
-        auth_message = SocketMessage(player_auth=PlayerAuthMessage(player_id=player_id))
+        auth_message = SocketMessage(
+            player_auth=PlayerAuthMessage(
+                player_id=player_id,
+                position_encodings=[
+                    PositionEncoding.POSITION_ENCODING_QUANTIZED,
+                    PositionEncoding.POSITION_ENCODING_FLOAT,
+                ],
+                map_hash=self.game_state.cached_map.hash
+                if self.game_state.cached_map
+                else b"",
+            )
+        )
         asyncio.create_task(self.websocket.send(auth_message.SerializeToString()))
 
     async def run(self):
         running = True
         logging.info("init game")
-        while running:
+        receive_task = asyncio.create_task(self.receiver.run())
+        loop = asyncio.get_running_loop()
+        next_frame = loop.time()
+        next_stats_log = next_frame + STATS_LOG_SECONDS
+        while running and not receive_task.done():
             running = self.handle_events()
-            await self.get_socket_messages()
             self.update_state()
             self.draw()
             await self.send_state()
-            self.clock.tick(60)
+            self.clock.tick()
+            if loop.time() >= next_stats_log:
+                logger.info(f"Received messages: {self.receiver.stats()}")
+                next_stats_log += STATS_LOG_SECONDS
+            # messages are received while waiting for the next frame
+            next_frame = max(next_frame + 1 / FPS, loop.time())
+            await asyncio.sleep(next_frame - loop.time())
         pygame.quit()
+        if receive_task.done():
+            # raises if the connection failed
+            receive_task.result()
+            logger.info("Server closed the connection")
+        else:
+            receive_task.cancel()
 
     def pygame_init(self):
         pygame.init()
@@ -159,31 +389,24 @@ class GameClient:
         pygame.display.set_caption("Multiplayer Game")
         self.clock = pygame.time.Clock()
         self.approx_fps: float = -1.0
-
-    async def get_socket_messages(self) -> None:
-        """Get the updates sent from the server."""
-        while True:
-            # read messages until TO (no new messages)
-            try:
-                message_str = await asyncio.wait_for(
-                    self.websocket.recv(), timeout=1 / 180.0
-                )
-                try:
-                    message = SocketMessage()
-                    message.ParseFromString(message_str)
-                    self.new_socket_messages.append(message)
-                except Exception as e:
-                    logger.warning(f"could not load {message_str}: {e}")
-            except asyncio.TimeoutError:
-                break
+        self.screen_rect = self.screen.get_rect()
+        self.font = pygame.font.Font("freesansbold.ttf", 25)
+        self.fps_text = ""
+        self.fps_surface: pygame.Surface | None = None
+        # the map on a white screen, entities are drawn over it
+        self.background = pygame.Surface((WIDTH, HEIGHT))
+        self.background_map_version = -1
+        # parts of the screen drawn over the background last frame
+        self.dirty_rects: list[pygame.Rect] = []
 
     def update_state(self) -> None:
         """Update the game state, after processing keyboard events and socket messages"""
-        while self.new_socket_messages:
-            socket_message = self.new_socket_messages.pop(0)
+        for socket_message in self.receiver.drain():
             message_type = socket_message.WhichOneof("data")
 
             match message_type:
+                case "session_info":
+                    self.game_state.start_session(socket_message.session_info)
                 case "position_update":
                     self.game_state.update_state_other_player(
                         socket_message.position_update,
@@ -191,7 +414,9 @@ class GameClient:
                 case "new_player_connected":
                     new_player_message = socket_message.new_player_connected
                     self.game_state.add_other_player(
-                        new_player_message.player_id, new_player_message.username
+                        new_player_message.player_id,
+                        new_player_message.username,
+                        new_player_message.player_handle,
                     )
                 case "player_disconnected":
                     self.game_state.delete_player(
@@ -199,111 +424,166 @@ class GameClient:
                     )
                 case "npc_position_update":
                     self.game_state.update_state_npc(socket_message.npc_position_update)
+                case "entity_entered":
+                    self.game_state.add_entity(socket_message.entity_entered)
+                case "npc_spawned":
+                    self.game_state.spawn_npc(socket_message.npc_spawned)
+                case "entity_left":
+                    self.game_state.remove_entity(socket_message.entity_left.entity_id)
+                case "world_snapshot":
+                    snapshot = socket_message.world_snapshot
+                    if self.game_state.apply_snapshot(snapshot):
+                        self.snapshot_ack_tick = snapshot.tick
                 case "map_data":
-                    map_data = socket_message.map_data
-                    self.game_state.map_width = map_data.width
-                    self.game_state.map_height = map_data.height
-                    self.game_state.map_tiles = [row.tiles for row in map_data.rows]
+                    self.receive_map(socket_message.map_data)
+                case "map_chunk":
+                    self.game_state.add_map_chunk(socket_message.map_chunk)
+                case "map_chunk_dropped":
+                    self.game_state.drop_map_chunk(socket_message.map_chunk_dropped)
 
                 case _:
                     logger.warning(f"Unknown message type: {message_type}")
 
+    def receive_map(self, map_data: MapData) -> None:
+        """Use the map sent by the server, or the cached one if the server says so"""
+        if map_data.cached:
+            cached_map = self.game_state.cached_map
+            if cached_map is None or cached_map.hash != map_data.hash:
+                logger.error("Server sent no tiles for a map that is not cached")
+                return
+            self.map_cache.touch(cached_map.hash)
+            map_data = cached_map
+        else:
+            self.map_cache.save(map_data)
+        self.game_state.set_map(map_data)
+
     async def send_state(self):
-        """Broadcast updated player position to the server."""
-        state = SocketMessage(
-            position_update=PositionUpdateMessage(
-                player_id=self.player_id,
-                position_data=self.game_state.player_position_data,
-            ),
-        )
-        await self.websocket.send(state.SerializeToString())
+        """Send the player position to the server, CLIENT_SEND_RATE times per second at
+        most, when it changed or CLIENT_KEEPALIVE_SECONDS after the last send."""
+        if not self.game_state.session_started:
+            # positions are encoded as negotiated for the session
+            return
+        now = asyncio.get_running_loop().time()
+        if now < self.next_send_time:
+            return
+        self.next_send_time = max(self.next_send_time + 1 / CLIENT_SEND_RATE, now)
+
+        position_data = self.game_state.player_position_data
+        if (
+            position_data != self.sent_position
+            or now - self.sent_time >= CLIENT_KEEPALIVE_SECONDS
+        ):
+            self.sent_sequence += 1
+            state = SocketMessage(
+                # the server knows who we are from the authenticated connection
+                position_update=PositionUpdateMessage(
+                    position_data=position_data,
+                    sequence=self.sent_sequence,
+                ),
+            )
+            await self.websocket.send(state.SerializeToString())
+            self.sent_position = position_data
+            self.sent_time = now
+
+        if self.snapshot_ack_tick:
+            ack = SocketMessage(
+                snapshot_ack=SnapshotAckMessage(tick=self.snapshot_ack_tick)
+            )
+            await self.websocket.send(ack.SerializeToString())
+            self.snapshot_ack_tick = 0
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
         keys = pygame.key.get_pressed()
+        player = self.game_state.player
         self.game_state.player_changed = False
         if keys[pygame.K_LEFT]:
-            self.game_state.player.pos_x -= 5
+            player.pos_x -= PLAYER_STEP
             self.game_state.player_changed = True
         if keys[pygame.K_RIGHT]:
-            self.game_state.player.pos_x += 5
+            player.pos_x += PLAYER_STEP
             self.game_state.player_changed = True
         if keys[pygame.K_UP]:
-            self.game_state.player.pos_y -= 5
+            player.pos_y -= PLAYER_STEP
             self.game_state.player_changed = True
         if keys[pygame.K_DOWN]:
-            self.game_state.player.pos_y += 5
+            player.pos_y += PLAYER_STEP
             self.game_state.player_changed = True
+        # the server ignores positions out of the world
+        player.pos_x = min(max(player.pos_x, 0.0), GameState.WORLD_WIDTH)
+        player.pos_y = min(max(player.pos_y, 0.0), GameState.WORLD_HEIGHT)
         return True
 
     def draw(self):
-        self.screen.fill(WHITE)
-        self.draw_map()
-        player = self.game_state.entities[self.game_state.player_id]
-        pygame.draw.rect(
-            self.screen,
-            RED,
-            (
-                player.pos_x,
-                player.pos_y,
-                PLAYER_SIZE,
-                PLAYER_SIZE,
-            ),
-        )
-        # # Draw other players
+        """Draw the entities over the map. Only the parts of the screen that changed
+        are updated, unless the map changed."""
+        map_changed = self.draw_map()
+        # erase the entities of the last frame
+        for rect in self.dirty_rects:
+            self.screen.blit(self.background, rect, rect)
+
+        rects = []
+        self.draw_entity(self.game_state.player, RED, PLAYER_SIZE, rects)
         for other_player_id in self.game_state.other_player_ids:
             other = self.game_state.entities[other_player_id]
-            pygame.draw.rect(
-                self.screen,
-                (0, 0, 255),
-                (
-                    other.pos_x,
-                    other.pos_y,
-                    PLAYER_SIZE,
-                    PLAYER_SIZE,
-                ),
-            )
-        # draw npcs
+            self.draw_entity(other, BLUE, PLAYER_SIZE, rects)
         for npc_id in self.game_state.npc_ids:
             npc = self.game_state.entities[npc_id]
-            pygame.draw.rect(
-                self.screen,
-                (128, 128, 0),
-                (
-                    npc.pos_x,
-                    npc.pos_y,
-                    NPC_SIZE,
-                    NPC_SIZE,
-                ),
-            )
-        self.draw_fps()
-        pygame.display.flip()
-
-    def draw_map(self):
-        if not self.game_state.map_tiles:
+            self.draw_entity(npc, OLIVE, NPC_SIZE, rects)
+        rects.append(self.draw_fps())
+
+        if map_changed or len(self.dirty_rects) + len(rects) > MAX_DIRTY_RECTS:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.dirty_rects + rects)
+        self.dirty_rects = rects
+
+    def draw_entity(
+        self, entity: Entity, color, size: int, rects: list[pygame.Rect]
+    ) -> None:
+        rect = pygame.Rect(
+            entity.pos_x * SCREEN_SCALE_X, entity.pos_y * SCREEN_SCALE_Y, size, size
+        )
+        if not self.screen_rect.colliderect(rect):
+            # off the screen
             return
-        tile_width = WIDTH / self.game_state.map_width
-        tile_height = HEIGHT / self.game_state.map_height
-        for y, row in enumerate(self.game_state.map_tiles):
-            for x, tile in enumerate(row):
-                color = WHITE if tile else (0, 0, 0)
-                pygame.draw.rect(
-                    self.screen,
-                    color,
-                    (x * tile_width, y * tile_height, tile_width, tile_height),
+        rects.append(pygame.draw.rect(self.screen, color, rect))
+
+    def draw_map(self) -> bool:
+        """Draw the map on the background if it changed, and then the background on
+        the screen. Returns True if the map changed."""
+        if self.background_map_version == self.game_state.map_version:
+            return False
+        self.background_map_version = self.game_state.map_version
+
+        self.background.fill(WHITE)
+        if self.game_state.map_width:
+            tile_width = WIDTH / self.game_state.map_width
+            tile_height = HEIGHT / self.game_state.map_height
+            for (start_x, start_y), tiles in self.game_state.map_blocks():
+                left = round(start_x * tile_width)
+                top = round(start_y * tile_height)
+                width = round((start_x + tiles.shape[1]) * tile_width) - left
+                height = round((start_y + tiles.shape[0]) * tile_height) - top
+                if not width or not height:
+                    continue
+                # one pixel per tile, white if walkable, stretched over the tiles
+                pixels = np.repeat(tiles.T[:, :, np.newaxis], 3, axis=2)
+                block = pygame.surfarray.make_surface(pixels.astype(np.uint8) * 255)
+                self.background.blit(
+                    pygame.transform.scale(block, (width, height)), (left, top)
                 )
+        self.screen.blit(self.background, (0, 0))
+        return True
 
-    def draw_fps(self):
-        font = pygame.font.Font("freesansbold.ttf", 25)
-        text_surface = font.render(
-            f"fps: {int(self.clock.get_fps())}\nothers: {len(self.game_state.other_player_ids)}",
-            True,
-            RED,
-            WHITE,
-        )
-        text_rect = text_surface.get_rect()
+    def draw_fps(self) -> pygame.Rect:
+        text = f"fps: {int(self.clock.get_fps())}\nothers: {len(self.game_state.other_player_ids)}"
+        if text != self.fps_text:
+            self.fps_text = text
+            self.fps_surface = self.font.render(text, True, RED, WHITE)
+        text_rect = self.fps_surface.get_rect()
         # set the text to the top right of the screen
         text_rect.topright = (WIDTH, 0)
-        self.screen.blit(text_surface, text_rect)
+        return self.screen.blit(self.fps_surface, text_rect)
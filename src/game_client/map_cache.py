@@ -0,0 +1,71 @@
+import os
+from pathlib import Path
+
+from google.protobuf.message import DecodeError
+
+from src.common.common_models import MapData
+from src.common.logging import logger
+from src.common.map_encoding import decode_tiles, tiles_hash
+
+
+class MapCache:
+    """Maps received from the server, saved on disk by content hash.
+
+    The client announces the hash of the latest map it has in its auth message, the
+    server then only sends the tiles if its map is a different one."""
+
+    def __init__(self, directory: str, max_maps: int):
+        self.directory = Path(directory)
+        self.max_maps = max_maps
+
+    def latest(self) -> MapData | None:
+        """Latest map saved or used, if it can still be read"""
+        for path in self._paths_newest_first():
+            map_data = self._read(path)
+            if map_data is not None:
+                return map_data
+        return None
+
+    def save(self, map_data: MapData) -> None:
+        """Save a map received with its tiles"""
+        if not map_data.hash or map_data.cached:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(map_data.hash)
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_bytes(map_data.SerializeToString())
+            os.replace(temp_path, path)
+            for old_path in self._paths_newest_first()[self.max_maps :]:
+                old_path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not cache map: {e}")
+
+    def touch(self, map_hash: bytes) -> None:
+        """Mark a map as the latest used"""
+        try:
+            self._path(map_hash).touch()
+        except OSError:
+            pass
+
+    def _path(self, map_hash: bytes) -> Path:
+        return self.directory / f"{map_hash.hex()}.map"
+
+    def _paths_newest_first(self) -> list[Path]:
+        try:
+            paths = list(self.directory.glob("*.map"))
+        except OSError:
+            return []
+        return sorted(paths, key=lambda path: path.stat().st_mtime, reverse=True)
+
+    def _read(self, path: Path) -> MapData | None:
+        try:
+            map_data = MapData.FromString(path.read_bytes())
+            valid = tiles_hash(decode_tiles(map_data)) == map_data.hash
+        except (OSError, DecodeError, ValueError):
+            valid = False
+        if not valid:
+            logger.warning(f"Discarding unreadable cached map {path}")
+            path.unlink(missing_ok=True)
+            return None
+        return map_data
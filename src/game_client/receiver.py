@@ -0,0 +1,81 @@
+from collections import deque
+import time
+
+from src.common.common_models import SocketMessage
+from src.common.logging import logger
+
+
+class MessageReceiver:
+    """Reads and parses the messages of the server as they arrive, in a task of its own.
+
+    The game loop takes the parsed messages between frames without waiting on the
+    socket. Stats tell if it keeps up: how many messages wait at each frame and how
+    long parsing them takes."""
+
+    messages: deque[SocketMessage]
+
+    # stats
+    received: int
+    received_bytes: int
+    parse_errors: int
+    parse_seconds: float
+    max_parse_seconds: float
+    frames: int
+    # messages waiting at the last frame, in total and at most
+    depth: int
+    total_depth: int
+    max_depth: int
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.messages = deque()
+        self.received = 0
+        self.received_bytes = 0
+        self.parse_errors = 0
+        self.parse_seconds = 0.0
+        self.max_parse_seconds = 0.0
+        self.frames = 0
+        self.depth = 0
+        self.total_depth = 0
+        self.max_depth = 0
+
+    async def run(self) -> None:
+        """Until the connection closes"""
+        async for data in self.websocket:
+            start = time.perf_counter()
+            try:
+                message = SocketMessage.FromString(data)
+            except Exception as e:
+                self.parse_errors += 1
+                logger.warning(f"could not load {data}: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            self.received += 1
+            self.received_bytes += len(data)
+            self.parse_seconds += elapsed
+            self.max_parse_seconds = max(self.max_parse_seconds, elapsed)
+            self.messages.append(message)
+
+    def drain(self) -> list[SocketMessage]:
+        """Messages received since the last frame, oldest first"""
+        messages = list(self.messages)
+        self.messages.clear()
+        self.frames += 1
+        self.depth = len(messages)
+        self.total_depth += self.depth
+        self.max_depth = max(self.max_depth, self.depth)
+        return messages
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "received_bytes": self.received_bytes,
+            "parse_errors": self.parse_errors,
+            "mean_parse_ms": round(
+                self.parse_seconds / max(self.received, 1) * 1000, 3
+            ),
+            "max_parse_ms": round(self.max_parse_seconds * 1000, 3),
+            "depth": self.depth,
+            "mean_depth": round(self.total_depth / max(self.frames, 1), 1),
+            "max_depth": self.max_depth,
+        }
@@ -1,16 +1,23 @@
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import Depends, FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from src.common.metrics import registry
 from src.database.models import Player
 from src.database.redis_db import RedisClient
 from src.database.sqlite_db import get_db_session
-from src.game_server.game import game_state
+from src.game_server.game import game_state, player_directory
+from src.game_server.map_render import (
+    MapRenderCache,
+    MapWindow,
+    render_bits,
+    render_html,
+    render_png,
+)
 
 from src.common.logging import logger
 
@@ -20,6 +27,12 @@ if not redis_client.is_redis_available():
 
 app = FastAPI(title="Game Server API")
 
+map_renders = MapRenderCache(game_state)
+
+# largest windows of the map rendered per request, in tiles
+MAP_HTML_MAX_TILES = 256 * 256
+MAP_IMAGE_MAX_TILES = 8192 * 8192
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -56,16 +69,18 @@ def create_player(player: PlayerCreate):
 
     If already exists one return it.
     """
+    existing_player = player_directory.get_by_username(player.username)
+    if existing_player:
+        return existing_player
+
     with get_db_session() as db:
-        db_player = db.query(Player).filter(Player.username == player.username).first()
-        if not db_player:
-            # Create new player
-            db_player = Player(username=player.username)
-            db.add(db_player)
-            db.commit()
-            db.refresh(db_player)
+        # Create new player
+        db_player = Player(username=player.username)
+        db.add(db_player)
+        db.commit()
+        db.refresh(db_player)
     logger.info(f"Created Player {db_player}")
-    return db_player
+    return player_directory.add(db_player)
 
 
 @app.get("/players", response_model=List[PlayerResponse])
@@ -79,8 +94,7 @@ def get_players():
 @app.get("/players/{player_id}", response_model=PlayerResponse)
 def get_player(player_id: str):
     """Get player by ID"""
-    with get_db_session() as db:
-        player = db.query(Player).filter(Player.id == player_id).first()
+    player = player_directory.get(player_id)
     if player is None:
         raise HTTPException(status_code=404, detail="Player not found")
     return player
@@ -89,8 +103,7 @@ def get_player(player_id: str):
 @app.get("/players/get_by_name/{player_name}", response_model=PlayerResponse)
 def get_player_by_name(player_name: str):
     """Get player by player_name"""
-    with get_db_session() as db:
-        player = db.query(Player).filter(Player.username == player_name).first()
+    player = player_directory.get_by_username(player_name)
     if player is None:
         raise HTTPException(
             status_code=404, detail=f"Player with name {player_name} not found"
@@ -109,8 +122,7 @@ def get_online_players():
         return []
 
     # Get player details from SQLite
-    with get_db_session() as db:
-        players = db.query(Player).filter(Player.id.in_(online_player_ids)).all()
+    players = player_directory.get_many(online_player_ids)
 
     # Combine with Redis data
     result = []
@@ -133,18 +145,102 @@ def get_online_players():
     return result
 
 
-@app.get("/map", response_class=HTMLResponse)
-def get_map():
-    """Return a simple html view of the map"""
-    html_content = "<html><body><table>"
-    for row in game_state.map:
-        html_content += "<tr>"
-        for tile in row:
-            color = "white" if tile else "black"
-            html_content += f'<td style="width: 20px; height: 20px; background-color: {color};"></td>'
-        html_content += "</tr>"
-    html_content += "</table></body></html>"
-    return HTMLResponse(content=html_content, status_code=200)
+def map_window(
+    x: int, y: int, w: Optional[int], h: Optional[int], max_tiles: int
+) -> MapWindow:
+    """Window of the map requested, the rest of the map from x, y by default"""
+    world_map = game_state.map
+    if w is None:
+        w = world_map.width - x
+    if h is None:
+        h = world_map.height - y
+    if x < 0 or y < 0 or w < 1 or h < 1:
+        raise HTTPException(status_code=400, detail="Invalid map window")
+    if x + w > world_map.width or y + h > world_map.height:
+        raise HTTPException(status_code=400, detail="Map window outside of the map")
+    if w * h > max_tiles:
+        raise HTTPException(
+            status_code=413, detail=f"Map window larger than {max_tiles} tiles"
+        )
+    return x, y, w, h
+
+
+def map_response(
+    request: Request,
+    render_format: str,
+    media_type: str,
+    window: MapWindow,
+    headers: Optional[dict] = None,
+) -> Response:
+    """Cached rendering of a window of the map, or 304 if the client has it"""
+    map_version = game_state.map_version
+    etag = map_renders.etag(map_version)
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match == "*" or etag in (
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    ):
+        return Response(status_code=304, headers=headers)
+
+    render = {"html": render_html, "png": render_png, "bits": render_bits}
+    content = map_renders.get(render_format, render[render_format], window, map_version)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+@app.get("/map")
+def get_map(
+    request: Request,
+    x: int = 0,
+    y: int = 0,
+    w: Optional[int] = None,
+    h: Optional[int] = None,
+):
+    """Return a simple html view of the map, or of a window of it"""
+    window = map_window(x, y, w, h, MAP_HTML_MAX_TILES)
+    return map_response(request, "html", "text/html", window)
+
+
+@app.get("/map.png")
+def get_map_png(
+    request: Request,
+    x: int = 0,
+    y: int = 0,
+    w: Optional[int] = None,
+    h: Optional[int] = None,
+):
+    """Return the map, or a window of it, as a png of one pixel per tile"""
+    window = map_window(x, y, w, h, MAP_IMAGE_MAX_TILES)
+    return map_response(request, "png", "image/png", window)
+
+
+@app.get("/map.bin")
+def get_map_bits(
+    request: Request,
+    x: int = 0,
+    y: int = 0,
+    w: Optional[int] = None,
+    h: Optional[int] = None,
+):
+    """Return the map, or a window of it, as rows of one bit per tile.
+
+    Bits are least significant first, each row padded to a whole byte, 1 is walkable.
+    The window is given back in the X-Map-Window header as x,y,w,h."""
+    window = map_window(x, y, w, h, MAP_IMAGE_MAX_TILES)
+    return map_response(
+        request,
+        "bits",
+        "application/octet-stream",
+        window,
+        headers={"X-Map-Window": ",".join(map(str, window))},
+    )
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Metrics of the game server in the Prometheus text format"""
+    return Response(
+        registry.exposition(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
 # Health check endpoint
@@ -1,29 +1,161 @@
 import asyncio
-from typing import cast, List
+import math
+import time
+from typing import cast, Hashable, Iterable, List
 import websockets
 from websockets import WebSocketServerProtocol
-from datetime import datetime
 
 from src.common.common_models import (
+    EntityEnteredMessage,
+    EntityLeftMessage,
     MapData,
-    NpcPositionUpdateMessage,
+    NpcData,
+    NpcSpawnedMessage,
     PlayerDisconectedMessage,
     PositionData,
+    SessionInfoMessage,
     SocketMessage,
-    PositionUpdateMessage,
     NewPlayerConnectedMessage,
 )
-from src.database.redis_db import RedisClient
-from src.database.sqlite_db import get_db_session
-from src.database.models import Player
+from src.database.redis_db import AsyncRedisClient
 from src.common.entity import NPCEntity, PlayerEntity
-from src.game_server.game import game_state
+from src.common.interest import InterestManager
+from src.common.metrics import Counter, Gauge, Histogram, timed
+from src.common.quantization import PositionCodec, negotiate_position_encoding
+from src.common.snapshot import (
+    diff_positions,
+    entity_state_fragment,
+    world_snapshot_message,
+)
+from src.game_server.broadcast import ClientConnection, SlowConsumerPolicy
+from src.game_server.delta import SnapshotBaselines
+from src.game_server.handles import EntityHandleTable
+from src.game_server.inputs import InputBuffer
+from src.game_server.map_stream import MapStreamer
+from src.game_server.persistence import NpcWriteBehind, PositionWriteBehind
+from src.game_server.priority import PriorityAccumulator, entity_priority
+from src.game_server.tick import FixedTimestepLoop
+from src.game_server.game import game_state, player_directory
 from src.common.logging import logger
+from config import (
+    MAP_CHUNKS_PER_SEND,
+    MAP_FILE,
+    MAP_HEIGHT,
+    MAP_SEED,
+    MAP_WIDTH,
+    NETWORK_SEND_RATE,
+    NPC_STATE_FLUSH_SECONDS,
+    PLAYER_LAST_SEEN_FLUSH_SECONDS,
+    PLAYER_POSITION_FLUSH_SECONDS,
+    SEND_QUEUE_MAX_SIZE,
+    SLOW_CONSUMER_MAX_LAG_SECONDS,
+    SLOW_CONSUMER_POLICY,
+    SNAPSHOT_BUDGET_BYTES,
+    SNAPSHOT_MAX_UNACKED,
+    TICK_RATE,
+)
 
-redis_client = RedisClient()
+redis_client = AsyncRedisClient()
+
+# Latest player positions, written to redis in batches
+player_positions = PositionWriteBehind(redis_client, PLAYER_POSITION_FLUSH_SECONDS)
 
 # Connected clients
-connected_clients: dict[str, WebSocketServerProtocol] = {}
+connected_clients: dict[str, ClientConnection] = {}
+
+# What to do with the clients too slow to read their messages, a bad value fails here
+slow_consumer_policy = SlowConsumerPolicy(SLOW_CONSUMER_POLICY)
+
+# Handles standing for the entity ids in position traffic
+entity_handles = EntityHandleTable()
+
+# What each connected client can see
+interest = InterestManager(game_state.grid, game_state.INTEREST_RADIUS)
+
+# Chunks of the map each connected client has, if the map is streamed
+map_streamer = MapStreamer(game_state.MAP_CHUNK_RADIUS, MAP_CHUNKS_PER_SEND)
+
+# Position encoding negotiated with each connected client
+position_codecs: dict[str, PositionCodec] = {}
+
+# Snapshots each connected client can use as delta baseline
+snapshot_baselines: dict[str, SnapshotBaselines] = {}
+network_tick = 0
+
+# The loops running as long as the server, kept so they are not garbage collected
+background_tasks: set[asyncio.Task] = set()
+
+# Priority of the entity updates waiting for each connected client
+update_priorities: dict[str, PriorityAccumulator] = {}
+
+# Positions sent by the connected players, applied at the next simulation tick
+player_inputs = InputBuffer()
+# timestamp of the position update each player is at, if it had one
+input_timestamps: dict[str, int] = {}
+# positions out of the world ignored, logged at most once per second
+invalid_positions = 0
+last_invalid_position_log = 0.0
+
+# Metrics, exported by the http api
+messages_received = Counter(
+    "game_messages_received_total", "Messages received from the clients", ["type"]
+)
+bytes_received = Counter(
+    "game_bytes_received_total",
+    "Bytes of the messages received from the clients",
+    ["type"],
+)
+# (messages, bytes) counters by message type, None for unparsable messages
+received_counters = {
+    field.name: (
+        messages_received.labels(field.name),
+        bytes_received.labels(field.name),
+    )
+    for field in SocketMessage.DESCRIPTOR.oneofs_by_name["data"].fields
+}
+received_counters[None] = (
+    messages_received.labels("none"),
+    bytes_received.labels("none"),
+)
+connections = Counter("game_connections_total", "WebSocket connections opened")
+authentications = Counter(
+    "game_authentications_total", "Authentications of the connections", ["result"]
+)
+disconnections = Counter(
+    "game_disconnections_total", "Authenticated players disconnected"
+)
+Gauge(
+    "game_connected_clients",
+    "Authenticated players connected",
+    function=lambda: len(connected_clients),
+)
+send_seconds = Histogram(
+    "game_send_seconds", "Duration of the parts of the network sends", ["part"]
+)
+send_queue_depth = Histogram(
+    "game_send_queue_depth",
+    "Messages queued for each client, sampled every network send",
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+Counter("game_ticks_total", "Simulation steps run", function=lambda: game_loop.ticks)
+Counter(
+    "game_network_sends_total", "Network sends run", function=lambda: game_loop.sends
+)
+Counter(
+    "game_tick_overruns_total",
+    "Game loop iterations over their time budget",
+    function=lambda: game_loop.overruns,
+)
+Counter(
+    "game_tick_dropped_seconds_total",
+    "Simulation time skipped by the game loop when too far behind",
+    function=lambda: game_loop.dropped_time,
+)
+Counter(
+    "game_tick_errors_total",
+    "Simulation steps and network sends that raised",
+    function=lambda: game_loop.errors,
+)
 
 
 # Message handler
@@ -32,7 +164,11 @@ async def handle_message(websocket: WebSocketServerProtocol, player_id: str):
 
     types:
     position_update: A client sends the new position of its player.
-    Update its new position in redis and broadcast its new position to the rest of connected players.
+    It is buffered in `player_inputs` and applied at the next simulation tick, see
+    `apply_player_input`. Positions with a sequence number not above the last one
+    received are stale (reordered or duplicated) and dropped.
+
+    snapshot_ack: A client received a world snapshot, it becomes its delta baseline.
     """
     try:
         async for message_str in websocket:
@@ -40,17 +176,25 @@ async def handle_message(websocket: WebSocketServerProtocol, player_id: str):
             message.ParseFromString(message_str)
 
             message_type = message.WhichOneof("data")
+            received_messages, received_bytes = received_counters[message_type]
+            received_messages.inc()
+            received_bytes.inc(len(message_str))
             match message_type:
                 case "position_update":
-                    position_update_message = message.position_update
-                    redis_client.save_player_position(
-                        player_id,
-                        position_update_message.position_data,
+                    pos_x, pos_y = position_codecs[player_id].decode(
+                        message.position_update.position_data
                     )
-                    await broadcast_position_update(
+                    player_inputs.receive(
                         player_id,
-                        position_update_message,
+                        message.position_update.sequence,
+                        pos_x,
+                        pos_y,
+                        message.position_update.timestamp_us,
                     )
+                case "snapshot_ack":
+                    baselines = snapshot_baselines.get(player_id)
+                    if baselines is not None:
+                        baselines.ack(message.snapshot_ack.tick)
                 case _:
                     logger.warning(f"Unknown message type: {message_type}")
 
@@ -58,12 +202,29 @@ async def handle_message(websocket: WebSocketServerProtocol, player_id: str):
         logger.info(f"Connection closed for player {player_id}")
     finally:
         # Clean up when connection is closed
-        if player_id in connected_clients:
-            del connected_clients[player_id]
-        redis_client.remove_player_from_online(player_id)
+        disconnections.inc()
+        connection = connected_clients.pop(player_id, None)
+        if connection is not None:
+            connection.stop()
+        interest.remove_client(player_id)
+        map_streamer.remove_client(player_id)
+        snapshot_baselines.pop(player_id, None)
+        update_priorities.pop(player_id, None)
+        position_codecs.pop(player_id, None)
+        player_inputs.remove_player(player_id)
+        input_timestamps.pop(player_id, None)
+        if player_id in game_state.player_ids:
+            game_state.delete_player(player_id)
+        try:
+            await player_positions.flush_player(player_id)
+        except Exception as e:
+            logger.error(f"Could not write position of player {player_id}: {e!r}")
+        player_directory.touch(player_id)
+        await redis_client.remove_player_from_online(player_id)
 
         # Notify other players that this player has disconnected
-        await broadcast_player_disconnect(player_id)
+        broadcast_player_disconnect(player_id)
+        entity_handles.release(player_id)
 
 
 # Authentication handler
@@ -76,6 +237,11 @@ async def authenticate(
         auth_data = SocketMessage()
         logger.info(auth_message)
         auth_data.ParseFromString(auth_message)
+        received_messages, received_bytes = received_counters[
+            auth_data.WhichOneof("data")
+        ]
+        received_messages.inc()
+        received_bytes.inc(len(auth_message))
 
         player_id = auth_data.player_auth.player_id
         if not player_id:
@@ -83,20 +249,31 @@ async def authenticate(
             return None
 
         # Verify player exists in database
-        with get_db_session() as db:
-            player = db.query(Player).filter(Player.id == player_id).first()
-            if not player:
-                # await websocket.send(json.dumps({"error": "Player not found"}))
-                return None
+        player = await player_directory.load(player_id)
+        if not player:
+            # await websocket.send(json.dumps({"error": "Player not found"}))
+            return None
+
+        # Update last_seen, written to the database on the next flush
+        player_directory.touch(player_id)
+        username = player.username
 
-            # Update last_seen
-            player.last_seen = datetime.now()
-            db.commit()
-            username = player.username
+        entity_handles.assign(player_id)
+        position_encoding = negotiate_position_encoding(
+            list(auth_data.player_auth.position_encodings),
+            game_state.POSITION_ENCODING,
+        )
+        position_codecs[player_id] = game_state.position_codec(position_encoding)
 
         # Add to connected clients
-        connected_clients[player_id] = websocket
-        redis_client.add_player_to_online(player_id)
+        connected_clients[player_id] = ClientConnection(
+            player_id,
+            websocket,
+            max_queue_size=SEND_QUEUE_MAX_SIZE,
+            policy=slow_consumer_policy,
+            max_lag_seconds=SLOW_CONSUMER_MAX_LAG_SECONDS,
+        )
+        await redis_client.add_player_to_online(player_id)
 
         # Send welcome message
         # await websocket.send(
@@ -109,13 +286,21 @@ async def authenticate(
         #     )
         # )
 
-        # Send map data
-        map_data = game_state.get_map_data()
-        map_message = SocketMessage(map_data=map_data)
-        await websocket.send(map_message.SerializeToString())
+        session_info = SessionInfoMessage(
+            position_encoding=position_encoding,
+            position_scale=game_state.POSITION_SCALE,
+        )
+        connected_clients[player_id].enqueue(
+            SocketMessage(session_info=session_info).SerializeToString()
+        )
+
+        # Send map data, unless the client has it cached already
+        connected_clients[player_id].enqueue(
+            game_state.map_message(auth_data.player_auth.map_hash)
+        )
 
         # Notify other players about this player connecting
-        await broadcast_player_connect(player_id)
+        broadcast_player_connect(player_id, username)
 
         return player_id
 
@@ -123,111 +308,354 @@ async def authenticate(
         return None
 
 
-# Broadcast position update to all other connected players
-async def broadcast_position_update(
-    player_id: str,
-    position_data_message: PositionUpdateMessage,
-):
-    message = SocketMessage(position_update=position_data_message)
-    await broadcast_to_others(player_id, message.SerializeToString())
+@timed(send_seconds.labels("snapshots"))
+def broadcast_world_snapshot():
+    """Message every connected player with one snapshot of the entities around them.
+
+    The snapshot is a delta against the last snapshot the player acknowledged, and
+    is not sent at all if the player is already up to date. Each entity state is
+    serialized once per set of changed fields and position encoding, and shared by
+    every snapshot that includes it.
+
+    Each snapshot carries at most SNAPSHOT_BUDGET_BYTES of entity updates, picked by
+    the priority accumulator of the player: updates that don't fit wait for the next
+    snapshot, so a crowded area slows updates down rather than flooding the client."""
+    global network_tick
+    network_tick += 1
+
+    fragments: dict[tuple[int, int, int], bytes] = {}
+    for player_id in list(connected_clients):
+        baselines = snapshot_baselines.get(player_id)
+        codec = position_codecs.get(player_id)
+        priorities = update_priorities.get(player_id)
+        viewer = game_state.entities.get(player_id)
+        if baselines is None or codec is None or priorities is None or viewer is None:
+            continue
+        # positions as sent, so quantized positions only change when their ints do
+        current = {}
+        entity_ids = {}
+        for entity_id in interest.visible.get(player_id, ()):
+            entity = game_state.entities.get(entity_id)
+            if entity is None:
+                continue
+            handle = entity_handles[entity_id]
+            current[handle] = codec.to_wire(entity.pos_x, entity.pos_y)
+            entity_ids[handle] = entity_id
+        if baselines.up_to_date(current):
+            continue
+
+        baseline_tick, baseline = baselines.baseline()
+        changes, removed = diff_positions(baseline, current)
+        changed_fields = dict(changes)
+        gains = {}
+        for handle in changed_fields:
+            entity_id = entity_ids[handle]
+            entity = game_state.entities[entity_id]
+            distance = math.dist(
+                (viewer.pos_x, viewer.pos_y), (entity.pos_x, entity.pos_y)
+            )
+            gains[handle] = entity_priority(
+                distance, game_state.INTEREST_RADIUS, entity_id in game_state.player_ids
+            )
+
+        # what the player has once it applies the snapshot
+        sent_positions = dict(baseline) if baseline is not None else {}
+        for handle in removed:
+            del sent_positions[handle]
+        player_fragments = []
+        sent_handles = []
+        budget = SNAPSHOT_BUDGET_BYTES
+        for handle in priorities.accumulate(gains):
+            changed = changed_fields[handle]
+            fragment_key = (handle, changed, codec.encoding)
+            fragment = fragments.get(fragment_key)
+            if fragment is None:
+                fragment = entity_state_fragment(
+                    handle,
+                    *current[handle],
+                    changed,
+                    codec.quantized,
+                    input_timestamps.get(entity_ids[handle], 0),
+                )
+                fragments[fragment_key] = fragment
+            if player_fragments and len(fragment) > budget:
+                break
+            budget -= len(fragment)
+            player_fragments.append(fragment)
+            sent_handles.append(handle)
+            sent_positions[handle] = current[handle]
+        priorities.mark_sent(sent_handles)
+
+        message = world_snapshot_message(
+            network_tick, player_fragments, baseline_tick, removed
+        )
+        baselines.record(network_tick, sent_positions)
+        send_to_clients([player_id], message, key="world_snapshot")
+
+
+def entity_entered_message(entity_id: str, codec: PositionCodec) -> SocketMessage:
+    if entity_id in game_state.npc_ids:
+        return npc_spawned_message(entity_id, codec)
+    entity = game_state.entities[entity_id]
+    return SocketMessage(
+        entity_entered=EntityEnteredMessage(
+            entity_id=entity_id,
+            entity_type="player",
+            position_data=codec.encode(entity.pos_x, entity.pos_y),
+            handle=entity_handles[entity_id],
+            username=entity.username,
+        )
+    )
 
 
-async def broadcast_npc_position_updates():
-    """Message every connected player with the updates to npc around them"""
-    for npc_id in game_state.npc_ids:
-        npc_entity = game_state.entities[npc_id]
-        npc_position_update = NpcPositionUpdateMessage(
-            npc_id=npc_entity.id,
-            position_data=PositionData(pos_x=npc_entity.pos_x, pos_y=npc_entity.pos_y),
+def npc_spawned_message(npc_id: str, codec: PositionCodec) -> SocketMessage:
+    npc_entity = game_state.entities[npc_id]
+    return SocketMessage(
+        npc_spawned=NpcSpawnedMessage(
+            npc_handle=entity_handles[npc_id],
+            npc_id=npc_id,
+            type=npc_entity.type,
+            position_data=codec.encode(npc_entity.pos_x, npc_entity.pos_y),
         )
-        message = SocketMessage(npc_position_update=npc_position_update)
-        await broadcast_to_others(None, message.SerializeToString())
+    )
 
 
-# Broadcast player connection to all other connected players
-async def broadcast_player_connect(player_id: str):
-    with get_db_session() as db:
-        player = db.query(Player).filter(Player.id == player_id).first()
-        if not player:
-            return
+@timed(send_seconds.labels("interest"))
+def update_interest():
+    """Recompute the area of interest of every connected player.
+
+    Each player is told about the entities that entered or left its interest radius
+    since the last update."""
+    for player_id in list(connected_clients):
+        entered, left = interest.refresh(player_id)
+        if not entered and not left:
+            continue
+        codec = position_codecs[player_id]
+        messages = [
+            entity_entered_message(entity_id, codec).SerializeToString()
+            for entity_id in entered
+        ]
+        messages.extend(
+            SocketMessage(
+                entity_left=EntityLeftMessage(entity_id=entity_id)
+            ).SerializeToString()
+            for entity_id in left
+        )
+        for message in messages:
+            send_to_clients([player_id], message)
 
-        username = player.username
 
+# Broadcast player connection to all other connected players
+def broadcast_player_connect(player_id: str, username: str):
     message = SocketMessage(
         new_player_connected=NewPlayerConnectedMessage(
             player_id=player_id,
             username=username,
+            player_handle=entity_handles[player_id],
         )
     )
-    await broadcast_to_others(player_id, message.SerializeToString())
+    broadcast_to_others(player_id, message.SerializeToString())
 
 
 # Broadcast player disconnection to all other connected players
-async def broadcast_player_disconnect(player_id: str):
+def broadcast_player_disconnect(player_id: str):
     message = SocketMessage(
         player_disconnected=PlayerDisconectedMessage(player_id=player_id)
     )
 
-    await broadcast_to_others(player_id, message.SerializeToString())
+    broadcast_to_others(player_id, message.SerializeToString())
 
 
 # Helper to broadcast to all connected clients except the sender
-async def broadcast_to_others(sender_id: str | None, message: str):
-    for player_id, websocket in connected_clients.items():
+def broadcast_to_others(
+    sender_id: str | None, message: bytes, key: Hashable | None = None
+):
+    for player_id, connection in list(connected_clients.items()):
         if sender_id is None or player_id != sender_id:
-            try:
-                await websocket.send(message)
-            except websockets.exceptions.ConnectionClosed:
-                # This will be cleaned up in the handler
-                pass
+            connection.enqueue(message, key)
+
+
+# Helper to send a message to a group of connected clients
+def send_to_clients(
+    player_ids: Iterable[str], message: bytes, key: Hashable | None = None
+):
+    for player_id in list(player_ids):
+        connection = connected_clients.get(player_id)
+        if connection is not None:
+            connection.enqueue(message, key)
 
 
 # WebSocket connection handler
 async def websocket_handler(websocket: WebSocketServerProtocol):
+    connections.inc()
     player_id = await authenticate(websocket)
+    authentications.labels("failed" if player_id is None else "ok").inc()
 
     if player_id is not None:
-        # create player in the game state
+        # create player in the game state, authenticate just loaded it
+        player = player_directory.cached(player_id)
         game_state.add_player(
-            PlayerEntity(id=player_id, player_id=player_id, pos_x=0, pos_y=0)
+            PlayerEntity(
+                id=player_id,
+                player_id=player_id,
+                username=player.username if player else "Unknown Player",
+                pos_x=0,
+                pos_y=0,
+            )
         )
+        interest.add_client(player_id)
+        map_streamer.add_client(player_id)
+        snapshot_baselines[player_id] = SnapshotBaselines(SNAPSHOT_MAX_UNACKED)
+        update_priorities[player_id] = PriorityAccumulator()
         await handle_message(websocket, player_id)
 
 
 async def periodic_logger():
     while True:
         logger.info("Server healthy; Connected players: %s", len(game_state.player_ids))
+        if game_loop.last_tick is not None:
+            logger.info(
+                "Game loop: %s ticks, %s sends, %s overruns, %s errors, last tick used %.0f%% of its budget",
+                game_loop.ticks,
+                game_loop.sends,
+                game_loop.overruns,
+                game_loop.errors,
+                game_loop.last_tick.budget_used * 100,
+            )
+        logger.info("Player positions: %s", player_positions.stats())
+        logger.info("Npc states: %s", npc_writer.stats())
+        logger.info("Player inputs: %s", player_inputs.stats())
+        logger.info("Player directory: %s", player_directory.stats())
+        if game_state.map_streamed:
+            logger.info("Map chunks sent: %s", map_streamer.chunks_sent)
+        for player_id, connection in list(connected_clients.items()):
+            stats = connection.stats()
+            if stats["depth"] or stats["dropped"] or stats["merged"]:
+                logger.info("Send queue of %s: %s", player_id, stats)
+        for player_id, priorities in list(update_priorities.items()):
+            if priorities.deferred:
+                logger.info("Snapshot budget of %s: %s", player_id, priorities.stats())
         await asyncio.sleep(10)  # Log every 10 seconds
 
 
-async def update_npcs():
-    """Update the game state every second"""
-    while True:
-        game_state.game_tick()
-        for npc_id in game_state.npc_ids:
-            npc = game_state.entities[npc_id]
-            redis_client.save_npc_position(npc.id, npc.pos_x, npc.pos_y)
-        await broadcast_npc_position_updates()
-        await asyncio.sleep(1)
+def npc_states() -> list[NpcData]:
+    """Current state of the npcs, as written to redis by `npc_writer`"""
+    return [
+        NpcData(id=npc.id, type=npc.type, pos_x=npc.pos_x, pos_y=npc.pos_y)
+        for npc in (game_state.entities[npc_id] for npc_id in game_state.npc_ids)
+    ]
+
+
+# Npc states, written to redis periodically
+npc_writer = NpcWriteBehind(redis_client, NPC_STATE_FLUSH_SECONDS, npc_states)
+
+
+def log_task_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task failed: {task.exception()!r}")
+
+
+def apply_player_input(
+    player_id: str, pos_x: float, pos_y: float, timestamp_us: int
+) -> bool:
+    """Move a player to the position it sent. It is sent to the connected players
+    interested in it with the next world snapshot, and written to redis on the next
+    flush of `player_positions`."""
+    global invalid_positions, last_invalid_position_log
+    try:
+        game_state.update_entity_position(
+            player_id, PositionData(pos_x=pos_x, pos_y=pos_y)
+        )
+    except KeyError:
+        # disconnected
+        return False
+    except ValueError:
+        invalid_positions += 1
+        now = time.monotonic()
+        if now - last_invalid_position_log >= 1.0:
+            last_invalid_position_log = now
+            logger.warning(
+                f"Ignoring invalid position from player {player_id}, "
+                f"{invalid_positions} invalid positions so far"
+            )
+        return False
+    player_positions.record(player_id, pos_x, pos_y)
+    input_timestamps[player_id] = timestamp_us
+    return True
+
+
+def simulate_tick(dt: float):
+    """Advance the world by one fixed timestep"""
+    player_inputs.apply(apply_player_input)
+    game_state.game_tick(dt)
+
+
+def send_updates():
+    """Send the connected players what changed around them"""
+    update_interest()
+    stream_map_chunks()
+    broadcast_world_snapshot()
+    for connection in connected_clients.values():
+        send_queue_depth.observe(len(connection.queue))
+
+
+@timed(send_seconds.labels("map_chunks"))
+def stream_map_chunks():
+    """Send the connected players the chunks of a streamed map around them"""
+    if not game_state.map_streamed:
+        return
+    for player_id, connection in connected_clients.items():
+        player = game_state.entities.get(player_id)
+        if player is None:
+            continue
+        center = game_state.map_chunk_at(player.pos_x, player.pos_y)
+        to_send, to_drop = map_streamer.update(player_id, center, game_state.map)
+        for key in to_drop:
+            connection.enqueue(game_state.map_chunk_dropped_message(key))
+        for key in to_send:
+            connection.enqueue(game_state.map_chunk_message(key))
+
+
+game_loop = FixedTimestepLoop(
+    tick_rate=TICK_RATE or game_state.NPC_UPDATES_PER_SECOND,
+    send_rate=NETWORK_SEND_RATE,
+    simulate=simulate_tick,
+    send=send_updates,
+)
 
 
 # Entrypoint of the websocket server.
 async def start_websocket_server(host: str, port: int):
-    if not redis_client.is_redis_available():
+    if not await redis_client.is_redis_available():
         raise RuntimeError("Could not connect to redis server, aborting")
 
-    # Generate the map
-    game_state.generate_map(20, 20)
+    # Load or generate the map
+    if MAP_FILE:
+        game_state.load_map(MAP_FILE)
+        logger.info(
+            f"Loaded {game_state.map.width}x{game_state.map.height} map {MAP_FILE}"
+        )
+    else:
+        game_state.generate_map(MAP_WIDTH, MAP_HEIGHT, seed=MAP_SEED or None)
 
     # Create some npcs
     for _ in range(5):
-        npc = redis_client.create_npc("enemy", 10, 10)
+        npc = await redis_client.create_npc("enemy", 10, 10)
         game_state.add_npc(
             NPCEntity(id=npc.id, type=npc.type, pos_x=npc.pos_x, pos_y=npc.pos_y)
         )
-
-    logger_task = asyncio.create_task(periodic_logger())
-    npc_task = asyncio.create_task(update_npcs())
+        entity_handles.assign(npc.id)
+
+    for coroutine in (
+        periodic_logger(),
+        game_loop.run(),
+        player_positions.run(),
+        npc_writer.run(),
+        player_directory.run(PLAYER_LAST_SEEN_FLUSH_SECONDS),
+    ):
+        task = asyncio.create_task(coroutine)
+        task.add_done_callback(log_task_error)
+        background_tasks.add(task)
     server = await websockets.serve(websocket_handler, host, port)
     logger.info(f"WebSocket server started on ws://{host}:{port}")
     return server
@@ -0,0 +1,222 @@
+import asyncio
+from collections import deque
+from enum import Enum
+from typing import Hashable
+
+import websockets
+from websockets import WebSocketServerProtocol
+
+from src.common.common_models import SocketMessage
+from src.common.logging import logger
+from src.common.metrics import Counter
+
+messages_sent = Counter(
+    "game_messages_sent_total", "Messages written to the client sockets", ["type"]
+)
+bytes_sent = Counter(
+    "game_bytes_sent_total",
+    "Bytes of the messages written to the client sockets",
+    ["type"],
+)
+messages_dropped = Counter(
+    "game_send_queue_dropped_total", "Droppable messages dropped from full send queues"
+)
+messages_merged = Counter(
+    "game_send_queue_merged_total", "Queued messages replaced by a newer one"
+)
+slow_disconnects = Counter(
+    "game_slow_consumer_disconnects_total",
+    "Clients disconnected for reading too slowly",
+)
+
+# (messages, bytes) counters of each type of SocketMessage by the first byte of the
+# serialized message: the tag of its oneof field, one byte for field numbers below 16
+sent_counters_by_tag = {
+    (field.number << 3) | 2: (
+        messages_sent.labels(field.name),
+        bytes_sent.labels(field.name),
+    )
+    for field in SocketMessage.DESCRIPTOR.oneofs_by_name["data"].fields
+}
+other_sent_counters = (messages_sent.labels("other"), bytes_sent.labels("other"))
+
+
+class SlowConsumerPolicy(str, Enum):
+    """What to do when a client does not read its messages fast enough.
+
+    drop_oldest: drop the oldest queued droppable messages (position updates).
+    merge: replace a queued droppable message with a newer one with the same key.
+    disconnect: close the connection once its oldest queued message is too old.
+    """
+
+    DROP_OLDEST = "drop_oldest"
+    MERGE = "merge"
+    DISCONNECT = "disconnect"
+
+
+class ClientConnection:
+    """Outgoing side of a client websocket.
+
+    Messages are put in a bounded queue without blocking and written to the socket by
+    a dedicated writer task, so a slow client never delays the rest.
+
+    A message enqueued with a `key` is droppable: it only carries the latest state of
+    something (e.g. the position of an entity) and can be dropped or replaced by a
+    newer message with the same key. Messages without key are always delivered.
+    """
+
+    player_id: str
+    websocket: WebSocketServerProtocol
+    # entries are [key, enqueued_at, message], mutated in place when merged
+    queue: deque[list]
+    pending: dict[Hashable, list]
+
+    # stats
+    sent: int
+    dropped: int
+    merged: int
+    max_depth: int
+
+    def __init__(
+        self,
+        player_id: str,
+        websocket: WebSocketServerProtocol,
+        max_queue_size: int,
+        policy: SlowConsumerPolicy,
+        max_lag_seconds: float,
+    ):
+        self.player_id = player_id
+        self.websocket = websocket
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.max_lag_seconds = max_lag_seconds
+        self.queue = deque()
+        self.pending = {}
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.merged = 0
+        self.max_depth = 0
+        self._wakeup = asyncio.Event()
+        self._writer_task = asyncio.create_task(self._writer())
+        self._close_task: asyncio.Task | None = None
+
+    @property
+    def depth(self) -> int:
+        return len(self.queue)
+
+    @property
+    def lag(self) -> float:
+        """Seconds the oldest queued message has been waiting"""
+        if not self.queue:
+            return 0.0
+        return asyncio.get_running_loop().time() - self.queue[0][1]
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "lag": self.lag,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "merged": self.merged,
+        }
+
+    def enqueue(self, message: bytes, key: Hashable | None = None) -> None:
+        """Queue a message to be sent to the client. Never blocks."""
+        if self.closed:
+            return
+
+        if key is not None and self.policy is SlowConsumerPolicy.MERGE:
+            entry = self.pending.get(key)
+            if entry is not None:
+                entry[2] = message
+                self.merged += 1
+                messages_merged.inc()
+                return
+
+        if self.policy is SlowConsumerPolicy.DISCONNECT and (
+            self.lag > self.max_lag_seconds or len(self.queue) >= self.max_queue_size
+        ):
+            logger.warning(
+                f"Disconnecting slow client {self.player_id}: "
+                f"{len(self.queue)} queued messages, {self.lag:.1f}s behind"
+            )
+            slow_disconnects.inc()
+            self.close()
+            return
+
+        if len(self.queue) >= self.max_queue_size and not self._drop_oldest():
+            if key is not None:
+                # nothing else can be dropped, drop the new message instead
+                self.dropped += 1
+                messages_dropped.inc()
+                return
+            # messages without key are never dropped, the queue grows past its bound
+
+        entry = [key, asyncio.get_running_loop().time(), message]
+        self.queue.append(entry)
+        if key is not None:
+            self.pending[key] = entry
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        """Stop the writer and discard the queued messages"""
+        self.closed = True
+        self._writer_task.cancel()
+        self.queue.clear()
+        self.pending.clear()
+
+    def close(self, code: int = 1013, reason: str = "too slow") -> None:
+        """Stop the writer and close the socket"""
+        if self.closed:
+            return
+        self.stop()
+        # keep a reference, the event loop only keeps a weak one to its tasks
+        self._close_task = asyncio.create_task(
+            self.websocket.close(code=code, reason=reason)
+        )
+
+    def _drop_oldest(self) -> bool:
+        """Drop the oldest droppable message. Returns False if there is none."""
+        for index, entry in enumerate(self.queue):
+            key = entry[0]
+            if key is None:
+                continue
+            del self.queue[index]
+            if self.pending.get(key) is entry:
+                del self.pending[key]
+            self.dropped += 1
+            messages_dropped.inc()
+            return True
+        return False
+
+    async def _writer(self):
+        while True:
+            while not self.queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            entry = self.queue.popleft()
+            key, _, message = entry
+            if key is not None and self.pending.get(key) is entry:
+                del self.pending[key]
+            try:
+                await self.websocket.send(message)
+            except websockets.exceptions.ConnectionClosed:
+                # the connection handler cleans up
+                self.closed = True
+                self.queue.clear()
+                self.pending.clear()
+                return
+            except Exception as e:
+                logger.error(f"Could not send to client {self.player_id}: {e!r}")
+                self.close(1011, "send failed")
+                return
+            self.sent += 1
+            sent_messages, sent_bytes = sent_counters_by_tag.get(
+                message[0], other_sent_counters
+            )
+            sent_messages.inc()
+            sent_bytes.inc(len(message))
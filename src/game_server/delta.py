@@ -0,0 +1,48 @@
+from src.common.snapshot import EntityPositions
+
+
+class SnapshotBaselines:
+    """The snapshots sent to a client that it may still use as a delta baseline.
+
+    The baseline is the latest snapshot the client acknowledged. Once more than
+    `max_unacked` snapshots were sent after it, it is considered too old and is
+    forgotten, so the next snapshot is a full one.
+    """
+
+    sent: dict[int, EntityPositions]
+    acked_tick: int
+
+    def __init__(self, max_unacked: int):
+        self.max_unacked = max_unacked
+        self.sent = {}
+        self.acked_tick = 0
+        self.last_sent_tick = 0
+
+    def ack(self, tick: int) -> None:
+        if tick <= self.acked_tick or tick not in self.sent:
+            return
+        self.acked_tick = tick
+        for sent_tick in [t for t in self.sent if t < tick]:
+            del self.sent[sent_tick]
+
+    def baseline(self) -> tuple[int, EntityPositions | None]:
+        """(tick, positions) of the baseline, (0, None) when a full snapshot is due"""
+        positions = self.sent.get(self.acked_tick)
+        if positions is None:
+            return 0, None
+        return self.acked_tick, positions
+
+    def up_to_date(self, current: EntityPositions) -> bool:
+        """The client acknowledged the last snapshot sent and it is still current"""
+        return (
+            self.acked_tick != 0
+            and self.acked_tick == self.last_sent_tick
+            and self.sent[self.acked_tick] == current
+        )
+
+    def record(self, tick: int, positions: EntityPositions) -> None:
+        self.sent[tick] = positions
+        self.last_sent_tick = tick
+        while len(self.sent) > self.max_unacked + 1:
+            # dicts keep insertion order, the first one is the oldest
+            del self.sent[next(iter(self.sent))]
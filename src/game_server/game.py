@@ -1,3 +1,8 @@
-from src.common.world import GameState
+from config import ENTITY_STORE, PLAYER_CACHE_MAX_SIZE, PLAYER_CACHE_TTL_SECONDS
+from src.common.world import ArrayGameState, GameState
+from src.database.player_directory import PlayerDirectory
 
-game_state = GameState()
+game_state = ArrayGameState() if ENTITY_STORE == "arrays" else GameState()
+
+# shared by the websocket and http servers
+player_directory = PlayerDirectory(PLAYER_CACHE_TTL_SECONDS, PLAYER_CACHE_MAX_SIZE)
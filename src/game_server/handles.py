@@ -0,0 +1,33 @@
+class EntityHandleTable:
+    """Small integer handles standing for entity ids on the wire.
+
+    A handle is a varint of 1 to 3 bytes where the id is a 36 character uuid. Handles
+    live for the whole server session and are never reused, so a client can not
+    mistake a new entity for one it still remembers."""
+
+    handles: dict[str, int]
+    entity_ids: dict[int, str]
+
+    def __init__(self):
+        self.handles = {}
+        self.entity_ids = {}
+        # 0 is the protobuf default, it means no handle
+        self._next_handle = 1
+
+    def assign(self, entity_id: str) -> int:
+        """Get the handle of an entity, assigning one if it has none"""
+        handle = self.handles.get(entity_id)
+        if handle is None:
+            handle = self._next_handle
+            self._next_handle += 1
+            self.handles[entity_id] = handle
+            self.entity_ids[handle] = entity_id
+        return handle
+
+    def release(self, entity_id: str) -> None:
+        handle = self.handles.pop(entity_id, None)
+        if handle is not None:
+            del self.entity_ids[handle]
+
+    def __getitem__(self, entity_id: str) -> int:
+        return self.handles[entity_id]
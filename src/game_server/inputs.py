@@ -0,0 +1,94 @@
+from typing import Callable
+
+
+class InputBuffer:
+    """Positions sent by the players, applied once per simulation tick.
+
+    Only the latest position of each player received during a tick is kept, so a
+    client sending faster than the tick rate costs one update and one broadcast per
+    tick. Positions with a sequence number not above the last one received from the
+    player are stale (reordered or duplicated) and dropped, unnumbered (0) ones are
+    always kept."""
+
+    # latest position, and its timestamp, of each player received since the last tick
+    pending: dict[str, tuple[float, float, int]]
+    # sequence number of the last position of each player
+    sequences: dict[str, int]
+
+    # stats
+    received: int
+    coalesced: int
+    stale: int
+    applied: int
+    rejected: int
+    # of the last tick that had inputs
+    last_tick_received: int
+    last_tick_applied: int
+
+    def __init__(self):
+        self.pending = {}
+        self.sequences = {}
+        self.received = 0
+        self.coalesced = 0
+        self.stale = 0
+        self.applied = 0
+        self.rejected = 0
+        self.last_tick_received = 0
+        self.last_tick_applied = 0
+        self._tick_received = 0
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "stale": self.stale,
+            "applied": self.applied,
+            "rejected": self.rejected,
+            "last_tick_received": self.last_tick_received,
+            "last_tick_applied": self.last_tick_applied,
+        }
+
+    def receive(
+        self,
+        player_id: str,
+        sequence: int,
+        pos_x: float,
+        pos_y: float,
+        timestamp_us: int = 0,
+    ) -> bool:
+        """Returns False if the position is stale"""
+        if sequence:
+            if sequence <= self.sequences.get(player_id, 0):
+                self.stale += 1
+                return False
+            self.sequences[player_id] = sequence
+        self.received += 1
+        self._tick_received += 1
+        if player_id in self.pending:
+            self.coalesced += 1
+        self.pending[player_id] = (pos_x, pos_y, timestamp_us)
+        return True
+
+    def apply(self, apply_input: Callable[[str, float, float, int], bool]) -> int:
+        """Apply the positions received since the last tick, returns how many were
+        applied. `apply_input` returns False when it rejects a position."""
+        if not self.pending:
+            return 0
+        pending = self.pending
+        self.pending = {}
+        applied = 0
+        for player_id, (pos_x, pos_y, timestamp_us) in pending.items():
+            if apply_input(player_id, pos_x, pos_y, timestamp_us):
+                applied += 1
+            else:
+                self.rejected += 1
+        self.applied += applied
+        self.last_tick_received = self._tick_received
+        self.last_tick_applied = applied
+        self._tick_received = 0
+        return applied
+
+    def remove_player(self, player_id: str) -> None:
+        self.pending.pop(player_id, None)
+        self.sequences.pop(player_id, None)
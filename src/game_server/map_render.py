@@ -0,0 +1,120 @@
+"""Renderings of the tile map for the http api: html, png and raw bit-packed rows.
+
+Renderings are cached by map version so polling the map costs nothing until it
+changes, the version is also the ETag clients revalidate with.
+"""
+
+from collections import OrderedDict
+import struct
+import threading
+from typing import Callable
+import uuid
+import zlib
+
+import numpy as np
+
+from src.common.world import GameState
+
+# MapWindow: (x, y, width, height) in tiles
+MapWindow = tuple[int, int, int, int]
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def render_html(tiles: np.ndarray) -> bytes:
+    cells = (
+        '<td style="width: 20px; height: 20px; background-color: black;"></td>',
+        '<td style="width: 20px; height: 20px; background-color: white;"></td>',
+    )
+    rows = "".join(
+        "<tr>" + "".join([cells[tile] for tile in row]) + "</tr>"
+        for row in tiles.tolist()
+    )
+    return f"<html><body><table>{rows}</table></body></html>".encode()
+
+
+def render_png(tiles: np.ndarray) -> bytes:
+    """1 bit grayscale png, one pixel per tile, walkable tiles white"""
+    height, width = tiles.shape
+    # png rows are packed most significant bit first and start with their filter type
+    rows = np.packbits(tiles, axis=1)
+    scanlines = np.hstack([np.zeros((height, 1), dtype=np.uint8), rows])
+    header = struct.pack(">IIBBBBB", width, height, 1, 0, 0, 0, 0)
+    return b"".join(
+        (
+            PNG_SIGNATURE,
+            _png_chunk(b"IHDR", header),
+            _png_chunk(b"IDAT", zlib.compress(scanlines.tobytes())),
+            _png_chunk(b"IEND", b""),
+        )
+    )
+
+
+def render_bits(tiles: np.ndarray) -> bytes:
+    """Rows of one bit per tile, least significant bit first, each padded to a byte.
+
+    The layout of the tiles in map files, see `src.common.world_map`."""
+    return np.packbits(tiles, axis=1, bitorder="little").tobytes()
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return b"".join(
+        (
+            struct.pack(">I", len(data)),
+            chunk_type,
+            data,
+            struct.pack(">I", zlib.crc32(chunk_type + data)),
+        )
+    )
+
+
+class MapRenderCache:
+    """Most recently requested renderings of map windows, for the current map version.
+
+    Renderings are made in the http server threads, from the chunks of the map which
+    the game loop may be modifying: a rendering made while the map changes is cached
+    under the version it was requested for and made again on the next request."""
+
+    # (format, window) -> (map version, rendering), least recently used first
+    renderings: OrderedDict[tuple[str, MapWindow], tuple[int, bytes]]
+
+    # stats
+    hits: int
+    renders: int
+
+    def __init__(self, game_state: GameState, max_size: int = 64):
+        self.game_state = game_state
+        self.max_size = max_size
+        self.renderings = OrderedDict()
+        self.hits = 0
+        self.renders = 0
+        # map versions restart with the server, tag them with the server run
+        self.server_run = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+
+    def etag(self, map_version: int) -> str:
+        return f'"{self.server_run}-{map_version}"'
+
+    def get(
+        self,
+        render_format: str,
+        render: Callable[[np.ndarray], bytes],
+        window: MapWindow,
+        map_version: int,
+    ) -> bytes:
+        key = (render_format, window)
+        with self._lock:
+            cached = self.renderings.get(key)
+            if cached is not None and cached[0] == map_version:
+                self.renderings.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+
+        rendering = render(self.game_state.map.window(*window))
+        with self._lock:
+            self.renders += 1
+            self.renderings[key] = (map_version, rendering)
+            self.renderings.move_to_end(key)
+            if len(self.renderings) > self.max_size:
+                self.renderings.popitem(last=False)
+        return rendering
@@ -0,0 +1,64 @@
+from src.common.world_map import ChunkKey, WorldMap, chunk_distance
+
+
+class MapStreamer:
+    """Which chunks of a streamed map each client holds, and which to send next.
+
+    Each client gets the chunks within `radius` chunks of its player, closest first
+    and at most `max_chunks_per_send` at a time. The chunks further than `radius + 1`
+    chunks are dropped: the server tells the client so, and they are sent again when
+    the player comes back. Modified chunks are sent again."""
+
+    # chunk versions each client holds, by client
+    sent: dict[str, dict[ChunkKey, int]]
+
+    # stats
+    chunks_sent: int
+
+    def __init__(self, radius: int, max_chunks_per_send: int):
+        self.radius = radius
+        self.max_chunks_per_send = max_chunks_per_send
+        self.sent = {}
+        self.chunks_sent = 0
+        self.world_map: WorldMap | None = None
+
+    def add_client(self, client_id: str) -> None:
+        self.sent[client_id] = {}
+
+    def remove_client(self, client_id: str) -> None:
+        self.sent.pop(client_id, None)
+
+    def update(
+        self, client_id: str, center: ChunkKey, world_map: WorldMap
+    ) -> tuple[list[ChunkKey], list[ChunkKey]]:
+        """Chunks to send to a client whose player is in the `center` chunk, and chunks
+        it must drop"""
+        if world_map is not self.world_map:
+            # a new map, nobody has any of its chunks
+            self.world_map = world_map
+            for client_chunks in self.sent.values():
+                client_chunks.clear()
+
+        client_chunks = self.sent.get(client_id)
+        if client_chunks is None:
+            return [], []
+
+        to_drop = [
+            key
+            for key in client_chunks
+            if chunk_distance(key, center) > self.radius + 1
+        ]
+        for key in to_drop:
+            del client_chunks[key]
+
+        to_send = []
+        for key in world_map.chunks_within(center, self.radius):
+            version = world_map.chunk_version(key)
+            if client_chunks.get(key) == version:
+                continue
+            client_chunks[key] = version
+            to_send.append(key)
+            if len(to_send) == self.max_chunks_per_send:
+                break
+        self.chunks_sent += len(to_send)
+        return to_send, to_drop
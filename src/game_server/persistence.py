@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Callable
+
+from src.common.common_models import NpcData
+from src.common.logging import logger
+from src.database.redis_db import AsyncRedisClient
+
+
+class PositionWriteBehind:
+    """Write-behind buffer of player positions.
+
+    Clients send their position every frame, but only the latest one of each player
+    matters. Positions are kept in memory, overwriting the previous one, and written
+    to redis in a single batch every `flush_interval` seconds, or when the player
+    disconnects. Redis load follows the flush cadence instead of the input rate."""
+
+    pending: dict[str, tuple[float, float, float]]
+
+    # stats
+    received: int
+    coalesced: int
+    written: int
+    flushes: int
+
+    def __init__(self, redis_client: AsyncRedisClient, flush_interval: float):
+        self.redis_client = redis_client
+        self.flush_interval = flush_interval
+        self.pending = {}
+        self.received = 0
+        self.coalesced = 0
+        self.written = 0
+        self.flushes = 0
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "flushes": self.flushes,
+        }
+
+    def record(self, player_id: str, pos_x: float, pos_y: float) -> None:
+        self.received += 1
+        if player_id in self.pending:
+            self.coalesced += 1
+        self.pending[player_id] = (pos_x, pos_y, time.time())
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+        positions, self.pending = self.pending, {}
+        try:
+            await self.redis_client.save_player_positions(positions)
+        except Exception:
+            # keep the positions for the next flush, unless newer ones came in
+            self.pending = positions | self.pending
+            raise
+        self.written += len(positions)
+        self.flushes += 1
+
+    async def flush_player(self, player_id: str) -> None:
+        position = self.pending.pop(player_id, None)
+        if position is None:
+            return
+        try:
+            await self.redis_client.save_player_positions({player_id: position})
+        except Exception:
+            # written by the next flush instead
+            self.pending.setdefault(player_id, position)
+            raise
+        self.written += 1
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Could not write player positions to redis: {e!r}")
+
+
+class NpcWriteBehind:
+    """Periodic write of the npc states.
+
+    The server owns the npc state and moves npcs every tick, but redis only needs a
+    recent copy. Every `flush_interval` seconds the current states are read with
+    `snapshot` and written to redis in a single batch; nothing is built between
+    writes."""
+
+    # stats
+    written: int
+    flushes: int
+
+    def __init__(
+        self,
+        redis_client: AsyncRedisClient,
+        flush_interval: float,
+        snapshot: Callable[[], list[NpcData]],
+    ):
+        self.redis_client = redis_client
+        self.flush_interval = flush_interval
+        self.snapshot = snapshot
+        self.written = 0
+        self.flushes = 0
+
+    def stats(self) -> dict:
+        return {"written": self.written, "flushes": self.flushes}
+
+    async def flush(self) -> None:
+        npcs = self.snapshot()
+        if not npcs:
+            return
+        await self.redis_client.save_npcs(npcs)
+        self.written += len(npcs)
+        self.flushes += 1
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Could not write npc states to redis: {e!r}")
@@ -0,0 +1,61 @@
+from typing import Iterable
+
+# priority an entity update gains per send, before the distance falloff
+PLAYER_PRIORITY = 2.0
+NPC_PRIORITY = 1.0
+# fraction of its priority an update at the interest radius still gains
+EDGE_PRIORITY = 0.25
+
+
+def entity_priority(distance: float, radius: float, is_player: bool) -> float:
+    """Priority an entity update gains per send: players and closer entities first"""
+    weight = PLAYER_PRIORITY if is_player else NPC_PRIORITY
+    falloff = min(distance / radius, 1.0) if radius else 0.0
+    return weight * (1.0 - (1.0 - EDGE_PRIORITY) * falloff)
+
+
+class PriorityAccumulator:
+    """Priority of the entity updates waiting to be sent to one client.
+
+    Each send, every entity that changed since what the client has gains priority
+    (see `entity_priority`), and the updates are sent highest priority first until
+    the budget of the client is spent. Sent updates go back to 0, the others keep
+    their priority and gain more at the next send, so even low priority updates are
+    sent eventually."""
+
+    # accumulated priority by entity handle
+    priorities: dict[int, float]
+
+    # stats
+    sent: int
+    deferred: int
+
+    def __init__(self):
+        self.priorities = {}
+        self.sent = 0
+        self.deferred = 0
+
+    def stats(self) -> dict:
+        return {
+            "waiting": len(self.priorities),
+            "sent": self.sent,
+            "deferred": self.deferred,
+        }
+
+    def accumulate(self, gains: dict[int, float]) -> list[int]:
+        """Add the priority gained by the updates waiting this send, keyed by handle.
+
+        Entities without update are forgotten. Returns the handles of the updates,
+        highest priority first."""
+        priorities = self.priorities
+        self.priorities = {
+            handle: priorities.get(handle, 0.0) + gain for handle, gain in gains.items()
+        }
+        return sorted(self.priorities, key=self.priorities.__getitem__, reverse=True)
+
+    def mark_sent(self, handles: Iterable[int]) -> None:
+        """The updates of these entities were sent, the others wait"""
+        for handle in handles:
+            del self.priorities[handle]
+            self.sent += 1
+        self.deferred += len(self.priorities)
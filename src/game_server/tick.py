@@ -0,0 +1,138 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Callable
+
+from src.common.logging import logger
+from src.common.metrics import Histogram
+
+tick_seconds = Histogram(
+    "game_tick_seconds",
+    "Duration of the game loop iterations, simulation steps and network send",
+)
+
+
+@dataclass
+class TickStats:
+    """How long the last loop iteration took and how much of its time budget it used.
+
+    The duration covers the simulation steps run in the iteration (more than one when
+    catching up) and the network send, if one was due. The budget is one timestep per
+    simulation step, at least one."""
+
+    tick: int
+    steps: int
+    sent: bool
+    duration: float
+    budget_used: float
+
+
+class FixedTimestepLoop:
+    """Run the simulation at a fixed timestep and the network sends at their own rate.
+
+    Deadlines are absolute, so the time spent simulating and sending does not make the
+    loop drift. When the loop falls behind, the accumulated time is caught up by running
+    several simulation steps in a row, up to `max_catch_up_steps`; past that the backlog
+    is dropped rather than letting the loop spiral.
+
+    A step or send that raises is logged and counted in `errors`, the loop goes on with
+    the next one.
+    """
+
+    def __init__(
+        self,
+        tick_rate: float,
+        send_rate: float,
+        simulate: Callable[[float], None],
+        send: Callable[[], None],
+        max_catch_up_steps: int = 5,
+    ):
+        self.timestep = 1.0 / tick_rate
+        self.send_interval = 1.0 / send_rate
+        self.simulate = simulate
+        self.send = send
+        self.max_catch_up_steps = max_catch_up_steps
+
+        self.ticks = 0
+        self.sends = 0
+        self.overruns = 0
+        self.dropped_time = 0.0
+        self.errors = 0
+        self.last_tick: TickStats | None = None
+        self._last_overrun_log = 0.0
+        self._last_error_log = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        previous = loop.time()
+        next_send = previous
+        accumulator = 0.0
+
+        while True:
+            start = loop.time()
+            accumulator += start - previous
+            previous = start
+
+            steps = 0
+            while accumulator >= self.timestep:
+                if steps == self.max_catch_up_steps:
+                    # too far behind, skip ahead instead of simulating the backlog
+                    self.dropped_time += accumulator
+                    accumulator = 0.0
+                    break
+                self._call(loop, self.simulate, self.timestep)
+                self.ticks += 1
+                accumulator -= self.timestep
+                steps += 1
+
+            now = loop.time()
+            sent = now >= next_send
+            if sent:
+                self._call(loop, self.send)
+                self.sends += 1
+                next_send += self.send_interval
+                if next_send < now:
+                    # missed whole send periods, realign instead of bursting
+                    next_send = now + self.send_interval
+
+            if steps or sent:
+                self._record(loop, steps, sent, loop.time() - start)
+
+            next_tick = start + self.timestep - accumulator
+            await asyncio.sleep(max(0.0, min(next_tick, next_send) - loop.time()))
+
+    def _call(self, loop: asyncio.AbstractEventLoop, func: Callable, *args) -> None:
+        try:
+            func(*args)
+        except Exception:
+            self.errors += 1
+            # log at most once per second, a broken step fails on every tick
+            if loop.time() - self._last_error_log >= 1.0:
+                self._last_error_log = loop.time()
+                logger.exception(
+                    f"Tick {self.ticks} failed, {self.errors} errors so far"
+                )
+
+    def _record(
+        self, loop: asyncio.AbstractEventLoop, steps: int, sent: bool, duration: float
+    ) -> None:
+        # each simulation step run to catch up brings its own timestep of budget
+        budget = max(steps, 1) * self.timestep
+        budget_used = duration / budget
+        tick_seconds.observe(duration)
+        self.last_tick = TickStats(
+            tick=self.ticks,
+            steps=steps,
+            sent=sent,
+            duration=duration,
+            budget_used=budget_used,
+        )
+        if budget_used > 1.0:
+            self.overruns += 1
+            # log at most once per second, overruns come in bursts
+            if loop.time() - self._last_overrun_log >= 1.0:
+                self._last_overrun_log = loop.time()
+                logger.warning(
+                    f"Tick {self.ticks} overran its budget: {duration * 1000:.1f}ms "
+                    f"({budget_used:.0%} of {budget * 1000:.1f}ms), "
+                    f"{self.overruns} overruns so far"
+                )